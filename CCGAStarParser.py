@@ -0,0 +1,253 @@
+"""
+CCG A* Parser
+
+This module implements an agenda-based A* parser for Combinatory Categorial
+Grammars (CCG). Instead of filling the whole CKY chart, it pops chart items
+from an agenda in decreasing order of their inside score times an estimate
+of their outside score, and stops at the first item of the terminal
+category spanning the whole input, which is then the best parse.
+
+Scores are the weights of `CCGCKYParser.inside_score`: the product of the
+weights of the grammar's Weight rules used by a derivation (lexical entries
+all score 1.0). Each node of a binary derivation splits its span at its own
+split point, so a complete derivation makes exactly one combination at each
+of the n - 1 split points of the input. The outside score of an item is thus
+at most the product, over the split points outside its span, of the best
+weight a combination can have there. This estimate never underestimates the
+outside score (it is admissible) and never decreases along a derivation (it
+is consistent): the first time an item is popped, its inside score is the
+best one, and the first complete parse popped is the best parse.
+
+Functions:
+- type_atoms: Collect the atomic categories and annotations of a category.
+- split_bounds: Compute the best weight of the combination at each split
+                point of an input.
+- CCGAStarParser: Find the best parse of an input string.
+
+Example:
+>>> ccg = CCGrammar(...)
+>>> stats = {}
+>>> parses, weight = CCGAStarParser(ccg, "John eats apples", stats=stats)
+>>> print(weight, stats["popped"])
+1.8 9
+"""
+from heapq import heappush, heappop
+from itertools import count
+from CCGCKYParser import (BINARY_COMBINATORS, TypeRaisingLeft, TypeRaisingRight,
+                          TokenError, lexical_cell, inside_score, viterbi, raise_types)
+from CCGTypes import CCGTypeAtomic, CCGTypeComposite, CCGTypeAnnotation
+
+
+def type_atoms(ccgtype):
+    """
+    Collect the atomic categories and annotations of a category.
+
+    Args:
+        ccgtype (CCGType): The category.
+
+    Returns:
+        set: The names of its atomic categories and its annotations, or None
+             if it holds a variable, which may stand for any of them.
+
+    Example:
+    >>> type_atoms(ccg.rules["chat"][0].type)
+    {'Nom', 'Masc'}
+    """
+    if isinstance(ccgtype, CCGTypeAtomic):
+        return {ccgtype.name}
+    if isinstance(ccgtype, CCGTypeComposite):
+        left, right = type_atoms(ccgtype.left), type_atoms(ccgtype.right)
+        return None if left is None or right is None else left | right
+    if isinstance(ccgtype, CCGTypeAnnotation):
+        atoms = type_atoms(ccgtype.type)
+        return None if atoms is None else atoms | {ccgtype.annot}
+    return None
+
+
+def split_bounds(ccg, tokens, use_typer=False):
+    """
+    Compute the best weight of the combination at each split point of an
+    input.
+
+    The weight of a combination is the product of the Weight rules of its
+    combinator whose premises match its premises (see
+    `CCGCKYParser.rule_weight`), or 1.0 if none matches. The premises of the
+    combination at the split point k derive from the tokens before and after
+    k, and the categories derived from tokens only hold the atomic categories
+    and annotations of their lexical categories: a group of Weight rules can
+    only apply at k if the atoms of its premises are found on their side of
+    k. With type raising, or lexical categories holding variables, this
+    filter does not hold and every group is kept; a premise may then also be
+    raised before it is combined, adding the weight of the raising.
+
+    Args:
+        ccg (CCGrammar): The grammar holding the Weight rules.
+        tokens (list of str): The tokens of the input.
+        use_typer (bool, optional): Flag to enable type-raising (default is
+                                    False).
+
+    Returns:
+        list of float: The upper bounds of the weight of the combination at
+                       the split points 1 to len(tokens) - 1, at least 1.0.
+
+    Raises:
+        TokenError: If a token is not recognized in the CCG grammar.
+
+    Example:
+    >>> split_bounds(ccg, "le chat dort".split())
+    [2.0, 1.8]
+    """
+    def groups(names):
+        found = {}
+        for name in names:
+            for weight in ccg.weights.get(name, []):
+                key = (name,) + tuple(premise.show() for premise in weight.premices)
+                atoms = [type_atoms(premise) or set() for premise in weight.premices]
+                found[key] = (found.get(key, (1.0,))[0] * weight.weight, atoms)
+        return [(value, atoms) for value, atoms in found.values() if value > 1.0]
+
+    num_tokens = len(tokens)
+    binary = groups(combinator.name for combinator in BINARY_COMBINATORS)
+    if use_typer:
+        raising = max([1.0] + [value for value, _ in groups([TypeRaisingLeft.name,
+                                                             TypeRaisingRight.name])])
+        best = max([1.0] + [value for value, _ in binary]) * raising
+        return [best] * (num_tokens - 1)
+
+    atoms = []
+    for token in tokens:
+        if token not in ccg.rules:
+            raise TokenError(token)
+        found = set()
+        for entry in ccg.rules[token]:
+            entry_atoms = type_atoms(entry.type)
+            if entry_atoms is None:
+                return [max([1.0] + [value for value, _ in binary])] * (num_tokens - 1)
+            found |= entry_atoms
+        atoms.append(found)
+
+    bounds = []
+    for split in range(1, num_tokens):
+        before = set().union(*atoms[:split])
+        after = set().union(*atoms[split:])
+        bounds.append(max([1.0] + [value for value, (left, right) in binary
+                                   if left <= before and right <= after]))
+    return bounds
+
+
+def CCGAStarParser(ccg, input_string, use_typer=False, stats=None):
+    """
+    Find the best parse of an input string.
+
+    Items are identified by their span and canonical category. An item is
+    finished when it is popped from the agenda; it is then combined with the
+    finished items of the adjacent spans, by the binary combinators (and
+    type raising) of `CCGCKYParser`, and the new items are pushed with
+    their priority. Pushes of an item whose score is not better than an
+    earlier push of the same item are skipped.
+
+    Args:
+        ccg (CCGrammar): The CCG grammar for parsing.
+        input_string (str): The input string to parse.
+        use_typer (bool, optional): Flag to enable type-raising (default is
+                                    False).
+        stats (dict, optional): A dictionary updated with the statistics of
+                                the search: "pushed" and "popped" count the
+                                items pushed on and popped from the agenda,
+                                "items" the finished items.
+
+    Returns:
+        tuple: A list holding the best derivation (empty if there is no
+               parse) and its weight (1.0 if there is none), as
+               `CCGCKYParser` in "best" mode.
+
+    Example:
+    >>> parses, weight = CCGAStarParser(ccg, "John eats apples")
+    >>> print(parses[0].show())
+
+    Raises:
+        SyntaxError: If the input is empty.
+        TokenError: If a token in the input string is not recognized in the
+                    CCG grammar.
+    """
+    if stats is None:
+        stats = {}
+    for key in ("pushed", "popped", "items"):
+        stats.setdefault(key, 0)
+    if not input_string or input_string.isspace():
+        raise SyntaxError("Empty input")
+    tokens = input_string.strip().split()
+    num_tokens = len(tokens)
+    bounds = split_bounds(ccg, tokens, use_typer)
+    # prefix[k] is the product of the bounds of the split points 1 to k.
+    prefix = [1.0]
+    for bound in bounds:
+        prefix.append(prefix[-1] * bound)
+
+    agenda = []
+    ids = count()
+    seen = {}
+    finished = {}
+    raised = {TypeRaisingLeft.name: {}, TypeRaisingRight.name: {}}
+    ending = [[] for _ in range(num_tokens + 1)]
+    starting = [[] for _ in range(num_tokens + 1)]
+
+    def push(item, start, end):
+        key = (start, end, item.type.canonical())
+        if key in finished:
+            return
+        score = inside_score(item, ccg)
+        if key in seen and seen[key] >= score:
+            return
+        seen[key] = score
+        outside = prefix[start] * prefix[-1] / prefix[end - 1]
+        # Ties go to the longest spans, which are closer to a complete parse.
+        heappush(agenda, (-score * outside, start - end, next(ids), start, end, item))
+        stats["pushed"] += 1
+
+    def combine(left, right, start, end):
+        for combinator in BINARY_COMBINATORS:
+            result = combinator.match([left, right], ccg)
+            if result:
+                push(result, start, end)
+        if not use_typer:
+            return
+        for new_right in raised[TypeRaisingRight.name][id(right)]:
+            for combinator in BINARY_COMBINATORS:
+                result = combinator.match([left, new_right], ccg)
+                if result:
+                    push(result, start, end)
+        for new_left in raised[TypeRaisingLeft.name][id(left)]:
+            for combinator in BINARY_COMBINATORS:
+                result = combinator.match([new_left, right], ccg)
+                if result:
+                    push(result, start, end)
+
+    for i, token in enumerate(tokens):
+        for item in lexical_cell(ccg, token):
+            push(item, i, i + 1)
+
+    while agenda:
+        _, _, _, start, end, item = heappop(agenda)
+        stats["popped"] += 1
+        key = (start, end, item.type.canonical())
+        if key in finished:
+            continue
+        finished[key] = item
+        stats["items"] += 1
+        if use_typer:
+            # Finished items are raised once, as in `ChartCell.raised`.
+            for combinator in (TypeRaisingLeft, TypeRaisingRight):
+                raised[combinator.name][id(item)] = [
+                    combinator.conclude(ccgtype, [item])
+                    for ccgtype in raise_types(combinator, item.type, ccg)]
+        if start == 0 and end == num_tokens and item.type.show() == ccg.terminal:
+            best = viterbi(item, ccg)
+            return ([best], best.weight)
+        for left_start, left in ending[start]:
+            combine(left, item, left_start, end)
+        for right_end, right in starting[end]:
+            combine(item, right, start, right_end)
+        ending[end].append((start, item))
+        starting[start].append((end, item))
+    return ([], 1.0)
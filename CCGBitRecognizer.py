@@ -0,0 +1,235 @@
+"""
+CCG Bit Recognizer
+
+This module implements a vectorized CKY recognizer over a compiled
+Combinatory Categorial Grammar (CCG). Once the categories of a grammar are
+finite and numbered (see `CCGCompiler.compile_grammar`), a chart cell is
+just a boolean vector over the category ids, and combining two cells is a
+boolean matrix product against the rule table of the compiled grammar.
+
+All the cells of a diagonal of the chart (the spans of the same length) are
+computed together, and so are the charts of a batch of inputs of the same
+length:
+- for every split point, the left and right cells are gathered on the pairs
+  of categories that have rules, and their conjunctions are reduced into one
+  boolean vector of pairs per cell,
+- those vectors are multiplied by the rule tensor, mapping each pair to the
+  categories it derives.
+Only the pairs of categories already found in the chart are gathered, which
+keeps the vectors short when the inventory is large and the cells sparse.
+
+Classes:
+- BitRecognizer: A vectorized recognizer for the sentences of a compiled
+                 grammar.
+
+Example:
+>>> ccg = CCGrammar(...)
+>>> recognizer = BitRecognizer(ccg, compile_grammar(ccg))
+>>> print(recognizer.recognize("John eats apples"))
+True
+>>> print(recognizer.recognize_batch(["John eats apples", "eats John"]))
+[True, False]
+
+Raises:
+- ValueError: If the compiled grammar is incomplete or misses a lexical
+              category.
+- TokenError: If a token in the input string is not recognized in the
+              CCG grammar.
+"""
+import numpy as np
+from CCGCKYParser import TokenError
+
+# The number of tokens of the inputs recognized together by
+# `BitRecognizer.recognize_batch`. A group gathers the pairs of categories
+# found in any of its charts, so large groups of long inputs gather more
+# pairs than they save calls: with the grammar of main.py, groups of 8
+# inputs of 5 tokens are 3.5 times faster than single inputs, while inputs
+# of 30 tokens are fastest alone.
+BATCH_TOKENS = 48
+
+
+class BitRecognizer:
+    """
+    A vectorized recognizer for the sentences of a compiled grammar.
+
+    The rule tensor has one row per pair of category ids that combine, and
+    one column per category id: `rules[k, c]` is 1 if the k-th pair derives
+    the category `c` by some combinator. Cells are boolean vectors over the
+    category ids; the product with the rule tensor runs in float32, through
+    BLAS.
+
+    Type raising is not supported, as the categories it derives are not
+    finite; neither are lexical categories with variables, which are left
+    out of compiled grammars.
+
+    Attributes:
+    - ccg (CCGrammar): The grammar.
+    - compiled (CompiledGrammar): The compiled grammar.
+    - left_ids (numpy.ndarray): The left category ids of the pairs of
+                                categories that combine.
+    - right_ids (numpy.ndarray): The right category ids of the same pairs.
+    - rules (numpy.ndarray): The rule tensor, of shape (len(left_ids), N).
+    - goals (numpy.ndarray): A boolean vector of the categories that are the
+                             terminal of the grammar.
+
+    Methods:
+    - lexical(token): Return the vector of the categories of a token.
+    - recognize(input_string): Decide whether an input string is recognized.
+    - recognize_batch(input_strings): Decide whether each input string of a
+                                      list is recognized.
+
+    Example:
+    >>> recognizer = BitRecognizer(ccg, compile_grammar(ccg))
+    >>> print(recognizer.rules.shape)
+    (1485, 287)
+    """
+
+    def __init__(self, ccg, compiled):
+        """
+        Initialize a BitRecognizer, building the rule tensor of a compiled
+        grammar.
+
+        Args:
+        - ccg (CCGrammar): The grammar.
+        - compiled (CompiledGrammar): The grammar compiled by
+                                      `CCGCompiler.compile_grammar`.
+
+        Raises:
+        - ValueError: If the compiled grammar is incomplete.
+        """
+        if not compiled.complete:
+            raise ValueError("Bit recognition needs a complete compiled grammar")
+        self.ccg = ccg
+        self.compiled = compiled
+        size = len(compiled)
+        keys = sorted(compiled.table)
+        self.left_ids = np.array([left for left, _ in keys], dtype=np.intp)
+        self.right_ids = np.array([right for _, right in keys], dtype=np.intp)
+        self.rules = np.zeros((len(keys), size), dtype=np.float32)
+        for row, key in enumerate(keys):
+            for _, result_id in compiled.table[key]:
+                self.rules[row, result_id] = 1.0
+        self.goals = np.array([category.show() == ccg.terminal
+                               for category in compiled.categories], dtype=bool)
+        self._lexicon = {}
+
+    def lexical(self, token):
+        """
+        Return the vector of the categories of a token.
+
+        Args:
+        - token (str): The token.
+
+        Returns:
+        numpy.ndarray: A boolean vector over the category ids.
+
+        Raises:
+        - TokenError: If the token is not in the lexicon.
+        - ValueError: If a category of the token is not in the compiled
+                      grammar.
+        """
+        if token not in self._lexicon:
+            if token not in self.ccg.rules:
+                raise TokenError(token)
+            vector = np.zeros(len(self.compiled), dtype=bool)
+            for entry in self.ccg.rules[token]:
+                category_id = self.compiled.category_id(entry.type)
+                if category_id is None:
+                    raise ValueError(f"Category {entry.type.show()} of {token} is not compiled")
+                vector[category_id] = True
+            self._lexicon[token] = vector
+        return self._lexicon[token]
+
+    def recognize(self, input_string):
+        """
+        Decide whether an input string is recognized by the grammar.
+
+        Args:
+        - input_string (str): The input string.
+
+        Returns:
+        bool: True if the terminal category of the grammar spans the whole
+              input.
+
+        Raises:
+        - SyntaxError: If the input is empty.
+        - TokenError: If a token in the input string is not recognized in the
+                      CCG grammar.
+
+        Example:
+        >>> recognizer.recognize("apples eats")
+        False
+        """
+        return bool(self._recognize_group([self._tokens(input_string)])[0])
+
+    def recognize_batch(self, input_strings):
+        """
+        Decide whether each input string of a list is recognized by the
+        grammar.
+
+        The input strings are grouped by number of tokens, up to
+        BATCH_TOKENS tokens per group, and the charts of a group are filled
+        together: each diagonal is one gather and one matrix product for the
+        whole group, instead of one per input.
+
+        Args:
+        - input_strings (iterable of str): The input strings.
+
+        Returns:
+        list of bool: Whether each input string is recognized.
+
+        Raises:
+        - SyntaxError: If an input is empty.
+        - TokenError: If a token of an input string is not recognized in the
+                      CCG grammar.
+
+        Example:
+        >>> recognizer.recognize_batch(["John eats apples", "eats John"])
+        [True, False]
+        """
+        groups = {}
+        for index, input_string in enumerate(input_strings):
+            tokens = self._tokens(input_string)
+            groups.setdefault(len(tokens), []).append((index, tokens))
+        results = {}
+        for num_tokens, inputs in groups.items():
+            step = max(1, BATCH_TOKENS // num_tokens)
+            for first in range(0, len(inputs), step):
+                group = inputs[first:first + step]
+                found = self._recognize_group([tokens for _, tokens in group])
+                results.update((index, bool(value)) for (index, _), value in zip(group, found))
+        return [results[index] for index in range(len(results))]
+
+    def _tokens(self, input_string):
+        if not input_string or input_string.isspace():
+            raise SyntaxError("Empty input")
+        return input_string.strip().split()
+
+    def _recognize_group(self, token_lists):
+        """
+        Recognize inputs of the same number of tokens together, returning a
+        boolean vector with one value per input.
+        """
+        batch, num_tokens, size = len(token_lists), len(token_lists[0]), len(self.compiled)
+        # chart[b, span - 1, start] holds the categories of the span starting
+        # at start of the input b.
+        chart = np.zeros((batch, num_tokens, num_tokens, size), dtype=bool)
+        for b, tokens in enumerate(token_lists):
+            for i, token in enumerate(tokens):
+                chart[b, 0, i] = self.lexical(token)
+
+        for span in range(2, num_tokens + 1):
+            starts = num_tokens - span + 1
+            # Only the pairs of categories found in shorter spans can combine.
+            active = chart[:, :span - 1].any(axis=(0, 1, 2))
+            pairs = np.flatnonzero(active[self.left_ids] & active[self.right_ids])
+            if not len(pairs):
+                continue
+            steps = np.arange(1, span)[:, None]
+            positions = np.arange(starts)[None, :]
+            left = chart[:, steps - 1, positions][..., self.left_ids[pairs]]
+            right = chart[:, span - steps - 1, positions + steps][..., self.right_ids[pairs]]
+            found = (left & right).any(axis=1)
+            chart[:, span - 1, :starts] = (found.astype(np.float32) @ self.rules[pairs]) > 0
+
+        return np.any(self.goals & chart[:, num_tokens - 1, 0], axis=1)
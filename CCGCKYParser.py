@@ -18,6 +18,12 @@ Classes:
 - CKYDerivation: Represents a derivation in the CKY parsing algorithm. This
                  class is used to construct parse trees and is part of the
                  CCG CKY parser.
+- ChartCell: Represents a cell of the CKY chart, holding one judgement per
+             canonical category; the different ways of building a category
+             are merged as backpointers of that judgement, or only the best
+             one is kept in Viterbi mode.
+- ParseForest: Represents the packed forest of the parses of an input, from
+               which derivations can be extracted lazily in weight order.
 
 Functions:
 - CCGCKYParser: Parse a given input string using Combinatory Categorial Grammar
@@ -27,8 +33,22 @@ Functions:
 - compute_chart: Computes the chart of valid derivations for a given span of
                  input.
 - reconstruct: Reconstructs CKY derivations from judgements.
+- iter_derivations: Yields the CKY derivations of judgements lazily.
+- count_derivations: Counts the derivations of every category of a chart,
+                     without building them.
+- rule_weight: Computes the weight of the grammar's Weight rules matching a
+               combination.
+- inside_score: Computes the weight of the best derivation of a chart item.
+- viterbi: Builds the best derivation of a chart item.
 - add_combinations : Add valid combinations of combinators to the current
                     chart.
+- combination_pairs: Enumerates the pairs of judgements of two cells that a
+                     combinator may combine, using the indexes of the cells.
+- table_combinations: Add the combinations of two cells to the current chart
+                      using the rule table of a compiled grammar.
+- composition_tag: Returns the composition that produced a chart item.
+- normal_form_allows: Checks a combination against the Eisner normal form
+                      constraints.
 
 Example:
 >>> ccg = CCGGrammar(...)
@@ -42,12 +62,16 @@ Raises:
 - TokenError: If a token in the input string is not recognized in the
               CCG grammar.
 """
-from CCGrammar import Judgement
+import pickle
+from heapq import heappush, heappop
+from itertools import count, product
+from math import prod
+from CCGrammar import Judgement, SemanticThunk
 from CCGLambdas import LambdaTermVar, LambdaTermApplication, LambdaTermLambda
-from CCGTypes import CCGType, CCGTypeVar, CCGTypeComposite, CCGTypeAtomicVar
+from CCGTypes import (CCGType, CCGTypeVar, CCGTypeComposite, CCGTypeAtomicVar,
+                      CCGTypeAnnotation, CCGUnifier)
 from CCGExprs import CCGExprVar, CCGExprConcat
 from nltk.tree import Tree
-import random
 
 
 class TokenError(Exception):
@@ -70,9 +94,13 @@ class TokenError(Exception):
                                     (default is "Token not found: {token}").
         """
         self.token = token
+        self.prefix = message
         self.message = message + f"\"{token}\""
         super().__init__(self.message)
 
+    def __reduce__(self):
+        return (type(self), (self.token, self.prefix))
+
 
 ####################################
 # Inference Class
@@ -98,8 +126,14 @@ class Inference:
     - show(): Returns a formatted string representation of the inference rule.
     - match(data): Matches the inference rule with given data, updating
                     variable substitutions.
+    - match_types(types): Matches the categories of the hypotheses with
+                    given categories, returning the category derived.
+    - conclude(ccgtype, data): Builds the conclusion of the rule for given
+                    data, knowing the category it derives.
     - replace(sigma): Replaces variables in the inference rule using a
                         substitution dictionary.
+    - index_paths(): Returns the paths to the variable shared by the two
+                     hypotheses of a binary rule, used to index chart cells.
 
     Example:
     >>> hyp1 = CCGExprVar("X")
@@ -135,6 +169,18 @@ class Inference:
         self.concl = concl
         self.sem = sem
         self.helper = helper if helper else lambda x: x
+        self.memoizable = helper is None
+        self._paths = None
+
+    def __reduce__(self):
+        """
+        Pickle the combinators of this module by name, since their semantic
+        functions are lambdas: they are unpickled as the same objects.
+        """
+        for name, value in globals().items():
+            if value is self:
+                return name
+        raise pickle.PicklingError(f"Inference {self.name} is not a module-level combinator")
 
     def __str__(self):
         """
@@ -195,13 +241,18 @@ class Inference:
         ctr = center(wdt, ldn)
         return f"{center(wdt, lup)}{up}\n{rep}{name}\n{ctr}{down}{xxx}"
 
-    def match(self, data, ccg):
+    def match(self, data, ccg=None):
         """
         Matches the inference rule with given data, updating variable
         substitutions.
 
+        For rules over judgements, the category derived from the categories
+        of the data is computed by `match_types`, then the conclusion is
+        built by `conclude`.
+
         Args:
         - data (list): A list of CCG expressions to match with the hypotheses.
+        - ccg (CCGrammar, optional): The grammar being parsed.
 
         Returns:
         InferenceResult or None: An InferenceResult object if the data matches
@@ -212,12 +263,15 @@ class Inference:
         >>> data = [CCGExprVar("X"), CCGExprString("apple")]
         >>> result = inference.match(data)
         """
-        sigma = {}
-        hyps, concl = self.helper((self.hyps, self.concl))
+        if len(self.hyps) != len(data):
+            return None
 
+        if all(isinstance(hyp, Judgement) for hyp in self.hyps):
+            ccgtype = self.match_types([dat.type for dat in data], ccg)
+            return self.conclude(ccgtype, data) if ccgtype is not None else None
 
-        if len(hyps) != len(data):
-             return None
+        sigma = {}
+        hyps, concl = self.helper((self.hyps, self.concl))
 
         for (pat, dat) in zip(hyps, data):
             pat = pat.replace(sigma)
@@ -232,6 +286,81 @@ class Inference:
         conc = concl.replace(sigma)
         return conc.deriving(self, sigma, data, sem, 1.0)
 
+    def match_types(self, types, ccg=None):
+        """
+        Matches the categories of the hypotheses of the rule with given
+        categories, and returns the category it derives.
+
+        The categories are unified by a `CCGUnifier`, which binds the
+        variables in place: types are only rebuilt once, for the conclusion.
+
+        When the grammar is given and the categories are ground, the result
+        is looked up in the combination cache of the grammar first, keyed by
+        the name of the rule and the categories, so that unification only
+        runs the first time a pair of categories is seen. Rules with a
+        helper are not cached, since the helper introduces fresh variables.
+
+        Args:
+        - types (list of CCGType): The categories to match with the
+                                   hypotheses.
+        - ccg (CCGrammar, optional): The grammar being parsed.
+
+        Returns:
+        CCGType or None: The category derived by the rule, or None if there
+                         is no match.
+
+        Example:
+        >>> left = CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAtomic("NP"))
+        >>> print(ApplicationRight.match_types([left, CCGTypeAtomic("NP")]).show())
+        S
+        """
+        cache = ccg.combination_cache if ccg is not None else None
+        key = None
+        if cache is not None and self.memoizable and all(t.ground for t in types):
+            key = (self.name,) + tuple(types)
+            found = cache.get(key)
+            if found is not None:
+                return found or None
+
+        unifier = CCGUnifier()
+        hyps, concl = self.helper((self.hyps, self.concl))
+        result = None
+        if len(hyps) == len(types) and all(unifier.unify(pat.type, t) for (pat, t) in zip(hyps, types)):
+            result = unifier.resolve(concl.type)
+
+        if key is not None:
+            cache.put(key, result if result is not None else False)
+        return result
+
+    def conclude(self, ccgtype, data):
+        """
+        Builds the conclusion of the rule for given data, knowing the
+        category it derives.
+
+        Only the expressions of the hypotheses are matched with the data,
+        which is enough to build the expression of the conclusion. Its
+        semantics is a `SemanticThunk`, only computed if it is read: the
+        derivations extracted from the chart compute their own semantics.
+
+        Args:
+        - ccgtype (CCGType): The category derived by the rule.
+        - data (list): A list of judgements matching the hypotheses.
+
+        Returns:
+        Judgement or None: The conclusion of the rule, derived from the data,
+                           or None if the expressions do not match.
+
+        Example:
+        >>> result = ApplicationRight.conclude(CCGTypeAtomic("S"), [left, right])
+        """
+        sigma = {}
+        for (pat, dat) in zip(self.hyps, data):
+            if not pat.expr.match(dat.expr, sigma):
+                return None
+        sem = SemanticThunk(self.sem, data) if self.sem else None
+        conc = Judgement(self.concl.expr.replace(sigma), ccgtype)
+        return conc.deriving(self, sigma, data, sem, 1.0)
+
     def replace(self, sigma):
         """
         Replaces variables in the inference rule using a substitution
@@ -252,6 +381,37 @@ class Inference:
         concl_rep = self.concl.replace(sigma)
         return Inference(self.name, hyps_rep, concl_rep, self.sem)
 
+    def index_paths(self):
+        """
+        Returns the paths to the variable shared by the two hypotheses of a
+        binary rule.
+
+        A path is a tuple of steps (direction, side) going down through the
+        composite types of a hypothesis, e.g. the path to `Y` in `X/Y` is
+        `((True, "right"),)`. Two judgements can only match the hypotheses
+        if the subterms of their types at these paths unify, which is used
+        to index the chart cells (see `index_key`).
+
+        Returns:
+        tuple or None: The paths in the left and right hypotheses, or None if
+                       the rule is not binary or its hypotheses do not share
+                       a variable.
+
+        Example:
+        >>> print(ApplicationRight.index_paths())
+        (((True, 'right'),), ())
+        """
+        if self._paths is None:
+            self._paths = False
+            if len(self.hyps) == 2:
+                left, right = (hyp.type for hyp in self.hyps)
+                for var in left.variables():
+                    paths = (type_path(left, var), type_path(right, var))
+                    if paths[1] is not None:
+                        self._paths = paths
+                        break
+        return self._paths or None
+
 
 ####################################
 # Concrete Inferences Rules (aka Combinators)
@@ -448,6 +608,20 @@ TypeRaisingLeft = Inference("T>",
      lambda x: (x[0], x[1].replace({"T": CCGTypeVar(x[1].type.fresh("T"))}))
 )
 
+# The binary combinators used to fill the chart.
+BINARY_COMBINATORS = (ApplicationLeft, ApplicationRight, CompositionLeft,
+                      CompositionRight)
+
+# The Eisner normal form constraints: for each combinator, the side of its
+# primary premise (the functor) and the composition that premise may not
+# come from.
+NORMAL_FORM = {
+    ApplicationRight.name: (0, CompositionRight.name),
+    CompositionRight.name: (0, CompositionRight.name),
+    ApplicationLeft.name: (1, CompositionLeft.name),
+    CompositionLeft.name: (1, CompositionLeft.name),
+}
+
 
 class CKYDerivation:
     """
@@ -520,6 +694,28 @@ class CKYDerivation:
             return self.current.show()
         return Tree(self.current.show(), [child.to_nltk_tree() for child in self.past])
 
+    def to_dict(self):
+        """
+        Convert a CKYDerivation object into a dictionary of plain values,
+        which can be serialized to JSON.
+
+        Returns:
+        - dict: The expression ("expr"), category ("type") and semantics
+                ("sem", or None) of the current judgement, the name of the
+                combinator ("rule", None for lexical entries), the weight
+                and the dictionaries of the past derivations ("children").
+
+        Example:
+        >>> print(derivation.to_dict()["rule"])
+        >
+        """
+        sem = self.current.sem
+        return {"expr": self.current.expr.show(),
+                "type": self.current.type.show(),
+                "sem": sem.show() if sem else None,
+                "rule": self.combinator.name if self.combinator else None,
+                "weight": self.weight,
+                "children": [child.to_dict() for child in self.past or []]}
 
     def __str__(self):
         """
@@ -653,7 +849,492 @@ class CKYDerivation:
         return self.sub_show(sem=sem)[0]
 
 
-def add_combinations(combinators, left, right, current_chart, ccg):
+WILDCARD = "*"
+
+
+def type_path(ccgtype, var):
+    """
+    Return the path to a variable in a type.
+
+    Args:
+        ccgtype (CCGType): The type.
+        var (CCGType): The variable to look for.
+
+    Returns:
+        tuple or None: The steps (direction, side) from the type to the first
+                       occurrence of the variable, or None if it does not
+                       occur in the type.
+
+    Example:
+    >>> type_path(CCGTypeComposite(1, CCGTypeVar("X"), CCGTypeVar("Y")), CCGTypeVar("Y"))
+    ((True, 'right'),)
+    """
+    if ccgtype == var:
+        return ()
+    if isinstance(ccgtype, CCGTypeComposite):
+        for side in ("left", "right"):
+            path = type_path(getattr(ccgtype, side), var)
+            if path is not None:
+                return ((bool(ccgtype.dir), side),) + path
+    return None
+
+
+def erase_annotations(ccgtype):
+    """
+    Return a type with all of its annotations removed.
+
+    Args:
+        ccgtype (CCGType): The type.
+
+    Returns:
+        CCGType: The type without annotations.
+
+    Example:
+    >>> erase_annotations(CCGTypeAnnotation(CCGTypeAtomic("NP"), "Masc")).show()
+    'NP'
+    """
+    # Types are interned, so the erased type is computed once per type.
+    if ccgtype.erased_form is None:
+        if isinstance(ccgtype, CCGTypeAnnotation):
+            ccgtype.erased_form = erase_annotations(ccgtype.type)
+        elif isinstance(ccgtype, CCGTypeComposite):
+            ccgtype.erased_form = CCGTypeComposite(bool(ccgtype.dir), erase_annotations(ccgtype.left),
+                                                   erase_annotations(ccgtype.right))
+        else:
+            ccgtype.erased_form = ccgtype
+    return ccgtype.erased_form
+
+
+def index_key(ccgtype, path):
+    """
+    Compute the key of a type in the index of a cell for a path.
+
+    The key is the subterm of the type at the path, without annotations.
+    Since `CCGType.unify` ignores an annotation facing a type without one,
+    and fails on different annotations, two ground subterms can only unify
+    if their keys are equal. Subterms containing variables, or types having
+    a variable where the path expects a composite type, get the WILDCARD key
+    and are tried against everything.
+
+    Args:
+        ccgtype (CCGType): The type of a judgement.
+        path (tuple): A path, as returned by `Inference.index_paths`.
+
+    Returns:
+        CCGType or str or None: The key of the type, WILDCARD, or None if the
+                                type can never match the hypothesis.
+
+    Example:
+    >>> index_key(CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAtomic("NP")), ((True, "right"),)).show()
+    'NP'
+    """
+    for direction, side in path:
+        while isinstance(ccgtype, CCGTypeAnnotation):
+            ccgtype = ccgtype.type
+        if isinstance(ccgtype, CCGTypeVar):
+            return WILDCARD
+        if not isinstance(ccgtype, CCGTypeComposite) or bool(ccgtype.dir) != direction:
+            return None
+        ccgtype = getattr(ccgtype, side)
+    if not ccgtype.ground:
+        return WILDCARD
+    return erase_annotations(ccgtype)
+
+
+def composition_tag(item):
+    """
+    Return the composition that produced a chart item, if any.
+
+    Args:
+        item (Judgement): A chart item.
+
+    Returns:
+        str or None: The name of the combinator of the first backpointer of
+                     the item if it is a composition ("B>" or "B<"), None
+                     otherwise.
+
+    Example:
+    >>> composition_tag(CompositionRight.match([left, right]))
+    'B>'
+    """
+    derivation = item.derivation[0]["derivation"] if item.derivation else None
+    if derivation and derivation[0].name in (CompositionRight.name, CompositionLeft.name):
+        return derivation[0].name
+    return None
+
+
+def normal_form_allows(combinator, left, right):
+    """
+    Check a combination against the Eisner normal form constraints.
+
+    Eisner (1996) shows that every derivation using application and
+    composition has a semantically equivalent derivation in which the
+    result of a forward composition is never the functor of a forward
+    application or composition, and the result of a backward composition
+    never the functor of a backward application or composition. The
+    combinations breaking these constraints only build spurious
+    derivations, with the same semantics as others, and can be skipped.
+
+    Args:
+        combinator (Inference): A binary combinator.
+        left (Judgement): The left premise.
+        right (Judgement): The right premise.
+
+    Returns:
+        bool: False if the combination breaks a constraint, True otherwise.
+
+    Example:
+    >>> the_big = CompositionRight.match([the, big])
+    >>> normal_form_allows(ApplicationRight, the_big, cat)
+    False
+    """
+    constraint = NORMAL_FORM.get(combinator.name)
+    if constraint is None:
+        return True
+    side, forbidden = constraint
+    return composition_tag((left, right)[side]) != forbidden
+
+
+class ChartCell:
+    """
+    Represents a cell of the CKY chart.
+
+    A cell holds at most one judgement per canonical category (see
+    `CCGType.canonical`). When a judgement is added for a category already
+    present in the cell, its backpointers are merged into the derivation of
+    the judgement already stored, so the size of a cell is bounded by the
+    number of distinct categories instead of the number of derivations.
+
+    In Viterbi mode (`best=True`), the cell only keeps the backpointer of
+    highest inside score (see `inside_score`) for each category, so the
+    best derivation of every item is known as soon as its cell is filled.
+
+    For each combinator and side, the judgements of the cell are indexed by
+    the subterm of their category that the combinator shares between its
+    hypotheses (see `index_key`), so that combining two cells only tries the
+    pairs of judgements whose categories may fit together. Indexes are built
+    on first use and dropped whenever the cell changes.
+
+    The cell also holds the type raising of its judgements: each judgement
+    is raised once, when a raised category of the cell is first needed,
+    and the raised judgement is then combined at every split point, instead
+    of raising the judgement again for every pair. Like the indexes, the
+    raised judgements are dropped whenever the cell changes.
+
+    In normal form mode (`normal_form=True`), the judgements are also told
+    apart by the composition that produced them (see `composition_tag`): a
+    category derived by a composition and by another combinator is held by
+    two judgements, since only the latter may be the functor of some
+    combinations (see `normal_form_allows`).
+
+    Attributes:
+    - items (dict): A dictionary mapping canonical categories to judgements,
+                    or pairs of a canonical category and a composition tag
+                    in normal form mode.
+    - ccg (CCGrammar): The grammar holding the Weight rules, in Viterbi mode.
+    - best (bool): Whether only the best backpointer of each category is
+                   kept.
+    - normal_form (bool): Whether judgements are told apart by their
+                          composition tag.
+
+    Methods:
+    - add(item): Add a judgement to the cell, merging it with the judgement
+                 of the same category if there is one.
+    - prune(width=None, threshold=None): Remove the judgements outside of
+                 the beam of the cell.
+    - index(combinator, side): Return the judgements of the cell indexed for
+                 a side of a combinator.
+    - raised(combinator): Return the judgements of the cell raised by a
+                 type-raising combinator.
+
+    Example:
+    >>> cell = ChartCell()
+    >>> first = cell.add(Judgement(CCGExprString("a"), CCGTypeAtomic("NP")))
+    >>> second = cell.add(Judgement(CCGExprString("a"), CCGTypeAtomic("NP")))
+    >>> print(len(cell), first is second)
+    1 True
+    """
+
+    def __init__(self, items=(), ccg=None, best=False, normal_form=False):
+        """
+        Initialize a ChartCell, optionally filled with some judgements.
+
+        Args:
+        - items (iterable of Judgement): Judgements to add to the cell.
+        - ccg (CCGrammar, optional): The grammar holding the Weight rules.
+        - best (bool, optional): Keep only the best backpointer of each
+                                 category (default is False).
+        - normal_form (bool, optional): Tell judgements apart by their
+                                        composition tag (default is False).
+        """
+        self.items = {}
+        self.ccg = ccg
+        self.best = best
+        self.normal_form = normal_form
+        self._indexes = {}
+        self._raised = {}
+        for item in items:
+            self.add(item)
+
+    def __iter__(self):
+        return iter(self.items.values())
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, item):
+        """
+        Add a judgement to the cell.
+
+        Args:
+        - item (Judgement): The judgement to add.
+
+        Returns:
+        Judgement: The judgement stored in the cell for the category of
+                   `item`, which is `item` itself if the category was new.
+        """
+        key = item.type.canonical()
+        if self.normal_form:
+            key = (key, composition_tag(item))
+        found = self.items.get(key)
+        if found is None:
+            self.items[key] = item
+            self._indexes.clear()
+            self._raised.clear()
+            return item
+        if not self.best:
+            found.derivation.extend(item.derivation)
+        elif inside_score(item, self.ccg) > inside_score(found, self.ccg):
+            found.adopt(item)
+        return found
+
+    def prune(self, width=None, threshold=None):
+        """
+        Remove the judgements outside of the beam of the cell.
+
+        Judgements are ranked by inside score (see `inside_score`); only the
+        `width` best ones are kept, and only those whose score is at least
+        `threshold` times the best score of the cell. Judgements of equal
+        score keep their insertion order, so pruning is deterministic.
+
+        Args:
+        - width (int, optional): The maximal number of judgements to keep.
+        - threshold (float, optional): The minimal score of a judgement,
+                                       relative to the best score of the
+                                       cell.
+
+        Returns:
+        int: The number of judgements removed from the cell.
+
+        Example:
+        >>> cell.prune(width=2)
+        1
+        """
+        scores = {key: inside_score(item, self.ccg)
+                  for key, item in self.items.items()}
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        if width is not None:
+            ranked = ranked[:width]
+        if threshold is not None and ranked:
+            cutoff = scores[ranked[0]] * threshold
+            ranked = [key for key in ranked if scores[key] >= cutoff]
+        kept = set(ranked)
+        removed = len(self.items) - len(kept)
+        self.items = {key: item for key, item in self.items.items()
+                      if key in kept}
+        self._indexes.clear()
+        self._raised.clear()
+        return removed
+
+    def index(self, combinator, side):
+        """
+        Return the judgements of the cell indexed for a side of a combinator.
+
+        Args:
+        - combinator (Inference): A binary combinator with index paths.
+        - side (int): 0 for the left hypothesis, 1 for the right one.
+
+        Returns:
+        dict: A dictionary mapping index keys (see `index_key`) to the lists
+              of judgements having that key. Judgements that can never match
+              the hypothesis are left out.
+
+        Example:
+        >>> cell.index(ApplicationRight, 1)
+        {CCGTypeAtomic("NP"): [Judgement(...)]}
+        """
+        key = (combinator.name, side)
+        if key not in self._indexes:
+            path = combinator.index_paths()[side]
+            buckets = {}
+            for item in self:
+                found = index_key(item.type, path)
+                if found is not None:
+                    buckets.setdefault(found, []).append(item)
+            self._indexes[key] = buckets
+        return self._indexes[key]
+
+    def raised(self, combinator, ccg=None):
+        """
+        Return the judgements of the cell raised by a type-raising
+        combinator.
+
+        Args:
+        - combinator (Inference): TypeRaisingLeft or TypeRaisingRight.
+        - ccg (CCGrammar, optional): The grammar restricting the raising to
+                                     its targets (see `raise_types`;
+                                     default is the grammar of the cell).
+
+        Returns:
+        ChartCell: A cell holding the raised judgements. Judgements whose
+                   category cannot be raised are left out.
+
+        Example:
+        >>> [item.type.show() for item in cell.raised(TypeRaisingRight, ccg)]
+        ['(S \\ (S / NP))']
+        """
+        if combinator.name not in self._raised:
+            raised = ChartCell(ccg=self.ccg, best=self.best)
+            for item in self:
+                for ccgtype in raise_types(combinator, item.type, ccg or self.ccg):
+                    raised.add(combinator.conclude(ccgtype, [item]))
+            self._raised[combinator.name] = raised
+        return self._raised[combinator.name]
+
+
+def raise_types(combinator, ccgtype, ccg=None):
+    """
+    Return the categories of the type raising of a category.
+
+    With a grammar whose functors are known (see
+    `CCGrammar.raising_targets`), the category is only raised to the
+    categories T some functor of the grammar can consume, with T given:
+    raised categories are then ground, so their combinations are cached and
+    indexed like any other. Otherwise, T is a fresh variable.
+
+    Args:
+    - combinator (Inference): TypeRaisingLeft or TypeRaisingRight.
+    - ccgtype (CCGType): The category to raise.
+    - ccg (CCGrammar, optional): The grammar.
+
+    Returns:
+    list of CCGType: The raised categories, empty if the category cannot be
+                     raised (it is not atomic) or is never consumed raised.
+
+    Example:
+    >>> [raised.show() for raised in raise_types(TypeRaisingRight, CCGTypeAtomic("NP"), ccg)]
+    ['(S \\ (S / NP))']
+    """
+    raised = combinator.match_types([ccgtype])
+    if raised is None:
+        return []
+    # The raised category is X in T\(T/X) and T/(T\X).
+    targets = (ccg.raising_targets(combinator.name, raised.right.right)
+               if ccg is not None else None)
+    if targets is None:
+        return [raised]
+    return [raised.replace({raised.left.name: target}) for target in targets]
+
+
+def lexical_item(token, entries):
+    """
+    Build the chart item of a token for one category.
+
+    Args:
+    - token (str): The token.
+    - entries (list of Judgement): The lexical entries of the token sharing
+                                   the same category.
+
+    Returns:
+    Judgement: A fresh judgement with one lexical derivation per entry, each
+               one holding the semantics of its entry.
+    """
+    first = entries[0]
+    derivation = [{"derivation": [], "sem": entry.sem} for entry in entries]
+    return Judgement(first.expr, first.type, sem=first.sem,
+                     derivation=derivation)
+
+
+def lexical_cell(ccg, token, width=None, priors=None):
+    """
+    Build the chart cell of a token.
+
+    With a width, only the categories of the token with the best priors are
+    kept (supertagging). The prior of a category is its score in `priors`,
+    for instance its frequency in a corpus (see `lexical_priors`), or else
+    the best weight of its lexical entries in the grammar. Categories with
+    the same prior keep their order in the lexicon.
+
+    Args:
+    - ccg (CCGrammar): The grammar.
+    - token (str): The token.
+    - width (int, optional): The maximal number of categories kept (default
+                             is all of them).
+    - priors (dict, optional): The priors of the categories, mapping tokens
+                               to dictionaries from the shown categories to
+                               their scores; missing categories score 0.
+
+    Returns:
+    ChartCell: A cell with one item per kept category of the token.
+
+    Raises:
+    - TokenError: If the token is not in the lexicon of the grammar.
+
+    Example:
+    >>> len(lexical_cell(ccg, "qui", width=2))
+    2
+    """
+    if token not in ccg.rules:
+        raise TokenError(token)
+    categories = {}
+    for entry in ccg.rules[token]:
+        categories.setdefault(entry.type.canonical(), []).append(entry)
+    groups = list(categories.values())
+    if width is not None and len(groups) > width:
+        if priors is not None:
+            scores = priors.get(token, {})
+            prior = lambda entries: scores.get(entries[0].type.show(), 0)
+        else:
+            prior = lambda entries: max(entry.weight for entry in entries)
+        groups = sorted(groups, key=prior, reverse=True)[:width]
+    return ChartCell(lexical_item(token, entries) for entries in groups)
+
+
+def lexical_priors(derivations, priors=None):
+    """
+    Count the categories of the tokens in derivations, as priors for
+    `lexical_cell`.
+
+    Args:
+    - derivations (iterable of CKYDerivation): The derivations, for instance
+                                               the best parses of a corpus.
+    - priors (dict, optional): Counts to update (default is new counts).
+
+    Returns:
+    dict: The counts, mapping tokens to dictionaries from the shown
+          categories to their number of occurrences.
+
+    Example:
+    >>> priors = lexical_priors(CCGCKYParser(ccg, line, mode="best")[0][0]
+                                for line in corpus)
+    >>> priors["qui"]
+    {'((GrNom[Masc] \\ GrNom[Masc]) / VbIntransSM)': 12, ...}
+    """
+    if priors is None:
+        priors = {}
+    stack = list(derivations)
+    while stack:
+        derivation = stack.pop()
+        if derivation.past:
+            stack.extend(derivation.past)
+            continue
+        counts = priors.setdefault(derivation.current.expr.str, {})
+        shown = derivation.current.type.show()
+        counts[shown] = counts.get(shown, 0) + 1
+    return priors
+
+
+def add_combinations(combinators, left, right, current_chart, ccg=None):
     """
     Add valid combinations of combinators to the current chart.
 
@@ -661,10 +1342,14 @@ def add_combinations(combinators, left, right, current_chart, ccg):
         combinators (list of Inference): List of combinators to be applied.
         left (Judgement): Left-side judgement.
         right (Judgement): Right-side judgement.
-        current_chart (set of Judgement): Current chart of judgements.
+        current_chart (ChartCell or set of Judgement): Current chart of
+                                                       judgements.
+        ccg (CCGrammar, optional): The grammar being parsed.
 
     Returns:
-        set of Judgement: Updated chart with valid combinations.
+        ChartCell or set of Judgement: Updated chart with valid combinations.
+                                       Combinations breaking the normal form
+                                       of a normal form cell are skipped.
 
     Example:
     >>> combinators = [ApplicationLeft, ApplicationRight, CompositionLeft,
@@ -676,14 +1361,109 @@ def add_combinations(combinators, left, right, current_chart, ccg):
     >>> print(result)
     {0: {1: {Judgement(CCGExprConcat(CCGExprVar("a"), CCGExprVar("b")), CCGTypeVar("X")}}}
     """
+    normal_form = getattr(current_chart, "normal_form", False)
     for combinator in combinators:
+        if normal_form and not normal_form_allows(combinator, left, right):
+            continue
         result = combinator.match([left, right], ccg)
         if result:
             current_chart.add(result)
     return current_chart
 
 
-def compute_chart(combinators, chart, span, start, ccg, use_typer=False):
+def combination_pairs(combinator, left_cell, right_cell):
+    """
+    Enumerate the pairs of judgements of two cells that a combinator may
+    combine.
+
+    Judgements are paired through the indexes of the cells: a judgement is
+    only paired with the judgements of the other cell having the same key or
+    the WILDCARD key. Pairs that are left out are exactly pairs that the
+    combinator would fail to match, so every pair is still checked by
+    `Inference.match`.
+
+    Args:
+        combinator (Inference): The combinator.
+        left_cell (ChartCell): The cell of the left span.
+        right_cell (ChartCell): The cell of the right span.
+
+    Yields:
+        tuple: Pairs (left, right) of judgements.
+
+    Example:
+    >>> for left, right in combination_pairs(ApplicationRight, chart[(0, 1)], chart[(1, 2)]):
+    >>>     print(ApplicationRight.match([left, right]))
+    """
+    if combinator.index_paths() is None:
+        yield from product(left_cell, right_cell)
+        return
+    lefts = left_cell.index(combinator, 0)
+    rights = right_cell.index(combinator, 1)
+    wildcards = rights.get(WILDCARD, [])
+    for key, items in lefts.items():
+        if key == WILDCARD:
+            candidates = [right for bucket in rights.values() for right in bucket]
+        else:
+            candidates = rights.get(key, []) + wildcards
+        for left in items:
+            for right in candidates:
+                yield left, right
+
+
+def table_combinations(compiled, combinators, left_cell, right_cell,
+                       current_chart, ccg=None):
+    """
+    Add the combinations of two cells to the current chart using the rule
+    table of a compiled grammar.
+
+    Pairs of judgements whose categories both have an id in the compiled
+    grammar are combined by looking up the table: the derived category is
+    known, and only the conclusion is built (see `Inference.conclude`).
+    Other pairs, combinations the table leaves open, and combinators that
+    are not in the table fall back to `Inference.match`.
+
+    Args:
+        compiled (CompiledGrammar): The compiled grammar (see CCGCompiler).
+        combinators (list of Inference): List of combinators to be applied.
+        left_cell (ChartCell): The cell of the left span.
+        right_cell (ChartCell): The cell of the right span.
+        current_chart (ChartCell): Current chart of judgements.
+        ccg (CCGrammar, optional): The grammar being parsed.
+
+    Returns:
+        ChartCell: Updated chart with valid combinations.
+
+    Example:
+    >>> compiled = compile_grammar(ccg)
+    >>> cell = table_combinations(compiled, combinators, chart[(0, 1)],
+                                  chart[(1, 2)], ChartCell(), ccg)
+    """
+    others = [c for c in combinators if c not in compiled.combinators]
+    lefts = [(compiled.category_id(item.type), item) for item in left_cell]
+    rights = [(compiled.category_id(item.type), item) for item in right_cell]
+    for left_id, left in lefts:
+        for right_id, right in rights:
+            if left_id is None or right_id is None:
+                current_chart = add_combinations(combinators, left, right, current_chart, ccg)
+                continue
+            for combinator, result_id in compiled.combinations(left_id, right_id):
+                if combinator not in combinators:
+                    continue
+                if current_chart.normal_form and not normal_form_allows(combinator, left, right):
+                    continue
+                if result_id is None:
+                    result = combinator.match([left, right], ccg)
+                else:
+                    result = combinator.conclude(compiled.categories[result_id], [left, right])
+                if result:
+                    current_chart.add(result)
+            if others:
+                current_chart = add_combinations(others, left, right, current_chart, ccg)
+    return current_chart
+
+
+def compute_chart(combinators, chart, span, start, ccg, use_typer=False,
+                  best=False, compiled=None, normal_form=False):
     """
     Compute the chart of valid derivations for a given span of input.
 
@@ -693,9 +1473,15 @@ def compute_chart(combinators, chart, span, start, ccg, use_typer=False):
         span (int): Span of the input to consider.
         start (int): Start position for the span.
         use_typer (bool): Flag to enable type-raising.
+        best (bool): Keep only the best backpointer of each category.
+        compiled (CompiledGrammar, optional): A compiled grammar whose rule
+                                              table is used to combine the
+                                              categories it knows.
+        normal_form (bool): Skip the combinations breaking the Eisner
+                            normal form (see `normal_form_allows`).
 
     Returns:
-        set of Judgement: Updated chart with valid derivations.
+        ChartCell: The cell of the span, with valid derivations.
 
     Example:
     >>> combinators = [ApplicationLeft, ApplicationRight, CompositionLeft,
@@ -714,61 +1500,764 @@ def compute_chart(combinators, chart, span, start, ccg, use_typer=False):
          0: {2: {Judgement(CCGExprConcat(CCGExprVar("a"), CCGExprVar("b")),
                                                           CCGTypeVar("X")}}}}
     """
-    current_chart = set()
+    current_chart = ChartCell(ccg=ccg, best=best, normal_form=normal_form)
     for step in range(1, span):
         mid = start + step
-        left_right_pairs = [(left, right) for left in chart[(start, mid)] for right in chart[(mid, start + span)]]
-
-        for left, right in left_right_pairs:
-            current_chart = add_combinations(combinators, left, right, current_chart, ccg)
-            if use_typer:
-                new_right = TypeRaisingRight.match([right])
-                if new_right:
-                    current_chart = add_combinations(combinators, left, new_right, current_chart, ccg)
-            if use_typer:
-                new_left = TypeRaisingLeft.match([left])
-                if new_left:
-                    current_chart = add_combinations(combinators, new_left, right, current_chart, ccg)
+        left_cell, right_cell = chart[(start, mid)], chart[(mid, start + span)]
+        if compiled is not None:
+            current_chart = table_combinations(compiled, combinators, left_cell, right_cell,
+                                               current_chart, ccg)
+        else:
+            for combinator in combinators:
+                for left, right in combination_pairs(combinator, left_cell, right_cell):
+                    current_chart = add_combinations([combinator], left, right, current_chart, ccg)
+
+        if not use_typer:
+            continue
+        # Each judgement is raised once per cell (see `ChartCell.raised`).
+        raised_right = right_cell.raised(TypeRaisingRight, ccg)
+        raised_left = left_cell.raised(TypeRaisingLeft, ccg)
+        for combinator in combinators:
+            for left, right in combination_pairs(combinator, left_cell, raised_right):
+                current_chart = add_combinations([combinator], left, right, current_chart, ccg)
+            for left, right in combination_pairs(combinator, raised_left, right_cell):
+                current_chart = add_combinations([combinator], left, right, current_chart, ccg)
 
     return current_chart
 
 
+def rule_weight(ccg, combinator, premises):
+    """
+    Compute the weight of a combination from the grammar's Weight rules.
+
+    Args:
+        ccg (CCGrammar): The grammar holding the Weight rules.
+        combinator (Inference): The combinator of the combination.
+        premises (list of Judgement): The combined judgements.
+
+    Returns:
+        float: The product of the weights of the rules whose premises match
+               the categories of the premises (1.0 if none matches).
+
+    Example:
+    >>> rule_weight(ccg, ApplicationRight, [left, right])
+    1.8
+    """
+    weight = 1.0
+    if ccg is not None and combinator.name in ccg.weights:
+        shown = [premise.type.show() for premise in premises]
+        for weighttest in ccg.weights[combinator.name]:
+            if shown == [s.show() for s in weighttest.premices]:
+                weight *= weighttest.weight
+    return weight
+
+
+def inside_score(item, ccg):
+    """
+    Compute the inside score of a chart item.
+
+    The inside score of a backpointer is the weight of its combination times
+    the inside scores of its premises (1.0 for a lexical backpointer), and
+    the inside score of an item is the best score of its backpointers, that
+    is the weight of its best derivation. Scores are stored in the
+    backpointers, so each one is only computed once.
+
+    Args:
+        item (Judgement): The chart item.
+        ccg (CCGrammar): The grammar holding the Weight rules.
+
+    Returns:
+        float: The weight of the best derivation of the item.
+
+    Example:
+    >>> inside_score(item, ccg)
+    1.8
+    """
+    best = None
+    for deriv in item.derivation:
+        if "score" not in deriv:
+            if not deriv["derivation"]:
+                deriv["score"] = 1.0
+            else:
+                comb, _, premises = deriv["derivation"]
+                deriv["score"] = rule_weight(ccg, comb, premises) * prod(
+                    inside_score(premise, ccg) for premise in premises)
+        if best is None or deriv["score"] > best:
+            best = deriv["score"]
+    return best
+
+
+def viterbi(item, ccg):
+    """
+    Build the best derivation of a chart item.
+
+    The backpointer of highest inside score is followed at every node, so
+    building the derivation is linear in its size.
+
+    Args:
+        item (Judgement): The chart item.
+        ccg (CCGrammar): The grammar holding the Weight rules.
+
+    Returns:
+        CKYDerivation: The best derivation of the item, whose weight is the
+                       inside score of the item.
+
+    Example:
+    >>> print(viterbi(root, ccg).weight)
+    1.8
+    """
+    weight = inside_score(item, ccg)
+    deriv = next(d for d in item.derivation if d["score"] == weight)
+    if not deriv["derivation"]:
+        return leaf_derivation(item, deriv)
+    comb, _, premises = deriv["derivation"]
+    past = [viterbi(premise, ccg) for premise in premises]
+    return node_derivation(item, comb, past, weight)
+
+
+def leaf_derivation(item, deriv):
+    """
+    Build the CKY derivation of a lexical backpointer.
+
+    Args:
+        item (Judgement): The chart item.
+        deriv (dict): A lexical backpointer of the item.
+
+    Returns:
+        CKYDerivation: A leaf derivation holding the semantics of the lexical
+                       entry.
+    """
+    leaf = Judgement(item.expr, item.type, sem=deriv.get("sem", item.sem))
+    return CKYDerivation(leaf, None, None, 1.0)
+
+
+def node_derivation(item, combinator, past, weight):
+    """
+    Build the CKY derivation of a combination of sub-derivations.
+
+    Args:
+        item (Judgement): The chart item built by the combination.
+        combinator (Inference): The combinator of the combination.
+        past (list of CKYDerivation): The derivations of the premises.
+        weight (float): The weight of the derivation.
+
+    Returns:
+        CKYDerivation: The derivation, whose semantics is computed from the
+                       semantics of the sub-derivations.
+    """
+    sem = combinator.sem([d.current for d in past]) if combinator.sem else None
+    current = Judgement(item.expr, item.type, sem=sem)
+    return CKYDerivation(current, list(past), combinator, weight)
+
+
+def expand_derivations(item, ccg, memo):
+    """
+    Expand the backpointers of a chart item into CKY derivations.
+
+    Args:
+        item (Judgement): The chart item to expand.
+        ccg (CCGrammar): The grammar holding the Weight rules.
+        memo (dict): The derivations already expanded, by item identity.
+
+    Returns:
+        list of CKYDerivation: One derivation per way of building the item,
+                               with its own semantics and weight.
+    """
+    if id(item) in memo:
+        return memo[id(item)]
+    result = []
+    for deriv in item.derivation:
+        if not deriv["derivation"]:
+            result.append(leaf_derivation(item, deriv))
+            continue
+        comb, _, premises = deriv["derivation"]
+        weight = rule_weight(ccg, comb, premises)
+        pasts = [expand_derivations(p, ccg, memo) for p in premises]
+        for past in product(*pasts):
+            result.append(node_derivation(item, comb, past,
+                                          weight * prod(d.weight for d in past)))
+    memo[id(item)] = result
+    return result
+
+
 def reconstruct(parses, ccg):
     """
     Reconstruct CKY derivations from judgements.
 
+    Every backpointer of a judgement is expanded with every combination of
+    the derivations of its premises, and the semantics of each derivation is
+    computed from the semantics of its own sub-derivations.
+
     Args:
         parses (list of judgements): List of parse trees.
+        ccg (CCGrammar): The grammar holding the Weight rules.
 
     Returns:
-        list of CKYDerivation: List of reconstructed CKY derivations.
+        tuple: The list of reconstructed CKY derivations and the maximal
+               weight among them (1.0 if there is none).
 
     Example:
     >>> parses = [parse_tree1, parse_tree2]
-    >>> result = reconstruct(parses)
+    >>> result = reconstruct(parses, ccg)
     >>> print(result)
-    [CKYDerivation(parse1), CKYDerivation(parse2)]
+    ([CKYDerivation(parse1), CKYDerivation(parse2)], 1.8)
     """
+    memo = {}
     result = []
-    w = 1.0
     for parse in parses:
-        for deriv in parse.derivation:
-            if deriv["derivation"]:
-                p = deriv["derivation"][2]
-                (past, w2) = reconstruct(p, ccg)
-                comb = deriv["derivation"][0]
-                w *= w2
-                if comb.name in ccg.weights:
-                    for weighttest in ccg.weights[comb.name]:
-                        if [s.type.show() for s in p] == [s.show() for s in weighttest.premices]:
-                            w*=weighttest.weight
-                result.append(CKYDerivation(parse, past, comb, w))
+        result.extend(expand_derivations(parse, ccg, memo))
+    return (result, max((d.weight for d in result), default=1.0))
+
+
+def stream_derivations(item, ccg):
+    """
+    Yield the derivations of a chart item one by one.
+
+    The derivations are yielded in the order of `expand_derivations`, but
+    none is kept: the derivations of the premises of a backpointer are
+    enumerated again for each derivation of the premises before them, so
+    the memory used only grows with the size of a derivation, at the cost
+    of rebuilding shared sub-derivations.
+
+    Args:
+        item (Judgement): The chart item to expand.
+        ccg (CCGrammar): The grammar holding the Weight rules.
+
+    Yields:
+        CKYDerivation: One derivation per way of building the item, with its
+                       own semantics and weight.
+    """
+    for deriv in item.derivation:
+        if not deriv["derivation"]:
+            yield leaf_derivation(item, deriv)
+            continue
+        comb, _, premises = deriv["derivation"]
+        weight = rule_weight(ccg, comb, premises)
+        for past in stream_premises(premises, ccg):
+            yield node_derivation(item, comb, past, weight * prod(d.weight for d in past))
+
+
+def stream_premises(premises, ccg):
+    """
+    Yield the combinations of the derivations of some premises, in the order
+    of `itertools.product`, without storing them.
+
+    Args:
+        premises (list of Judgement): The premises of a backpointer.
+        ccg (CCGrammar): The grammar holding the Weight rules.
+
+    Yields:
+        tuple of CKYDerivation: One derivation per premise.
+    """
+    if not premises:
+        yield ()
+        return
+    for first in stream_derivations(premises[0], ccg):
+        for rest in stream_premises(premises[1:], ccg):
+            yield (first,) + rest
+
+
+def iter_derivations(parses, ccg):
+    """
+    Yield the CKY derivations of judgements lazily.
+
+    This is the streaming counterpart of `reconstruct`: the derivations
+    come in the same order, but are built one at a time and never stored,
+    so a caller can stop after the first ones, or write them out one by
+    one, with a memory use that does not depend on the number of
+    derivations.
+
+    Args:
+        parses (list of Judgement): The judgements to expand.
+        ccg (CCGrammar): The grammar holding the Weight rules.
+
+    Yields:
+        CKYDerivation: The derivations, in the order of `reconstruct`.
+
+    Example:
+    >>> for derivation in iter_derivations(parses, ccg):
+    >>>     print(derivation.weight)
+    """
+    for parse in parses:
+        yield from stream_derivations(parse, ccg)
+
+
+def derivation_count(item, memo):
+    """
+    Count the derivations of a chart item.
+
+    Args:
+        item (Judgement): The chart item.
+        memo (dict): The counts already computed, by item identity.
+
+    Returns:
+        int: The number of derivations `expand_derivations` would build for
+             the item: one per lexical entry, and for each backpointer, the
+             product of the counts of its premises.
+    """
+    if id(item) not in memo:
+        memo[id(item)] = sum(prod(derivation_count(premise, memo)
+                                  for premise in deriv["derivation"][2])
+                             if deriv["derivation"] else 1
+                             for deriv in item.derivation)
+    return memo[id(item)]
+
+
+def count_derivations(chart):
+    """
+    Count the derivations of every category of a chart, without building
+    them.
+
+    Counts are computed bottom-up, from the shortest spans to the longest,
+    each item summing over its backpointers the products of the counts of
+    their premises: the cost is linear in the number of backpointers of the
+    chart, while the counts, as Python integers, may grow exponentially
+    with the length of the input. Only the backpointers kept in the chart
+    are counted: a chart built in "best" mode holds one derivation per
+    category.
+
+    Args:
+        chart (dict): A CKY chart, mapping spans to chart cells, such as the
+                      chart of a `ParseForest` or an `IncrementalParser`.
+
+    Returns:
+        dict: A dictionary mapping each span to a dictionary from the shown
+              categories of its cell to their number of derivations.
+
+    Example:
+    >>> forest = CCGCKYParser(ccg, "Le chat mange la souris", mode="forest")
+    >>> count_derivations(forest.chart)[(0, 5)]
+    {'Phrase': 2}
+    """
+    memo = {}
+    counts = {}
+    for span in sorted(chart, key=lambda span: span[1] - span[0]):
+        cell = counts[span] = {}
+        for item in chart[span]:
+            shown = item.type.show()
+            cell[shown] = cell.get(shown, 0) + derivation_count(item, memo)
+    return counts
+
+
+class ParseForest:
+    """
+    Represents the packed forest of the parses of an input.
+
+    The forest keeps the chart computed by the CKY parser, where every item
+    holds the backpointers of all the ways of building it. Derivations are
+    only built when they are extracted: `kbest` yields them in decreasing
+    weight order with the lazy k-best algorithm of Huang and Chiang (2005),
+    so extracting the k best derivations costs about k times the size of a
+    derivation instead of the total number of derivations.
+
+    Attributes:
+    - ccg (CCGrammar): The grammar used to parse the input.
+    - tokens (list of str): The tokens of the input.
+    - chart (dict): The CKY chart, mapping spans to chart cells.
+    - roots (list of Judgement): The items of the whole input whose category
+                                 is the terminal of the grammar.
+    - stats (dict): The statistics of the parse (see `CCGCKYParser`).
+
+    Methods:
+    - kbest(k=None): Yield the k best derivations in decreasing weight order.
+    - reconstruct(): Return all the derivations and their maximal weight.
+    - count(): Return the number of derivations, without building them.
+    - iter_derivations(): Yield all the derivations lazily.
+
+    Example:
+    >>> forest = CCGCKYParser(ccg, "John eats apples", mode="forest")
+    >>> for derivation in forest.kbest(2):
+    >>>     print(derivation.weight)
+    """
+
+    def __init__(self, ccg, tokens, chart, roots, stats=None):
+        """
+        Initialize a ParseForest.
+
+        Args:
+        - ccg (CCGrammar): The grammar used to parse the input.
+        - tokens (list of str): The tokens of the input.
+        - chart (dict): The CKY chart, mapping spans to chart cells.
+        - roots (list of Judgement): The complete parse items.
+        - stats (dict, optional): The statistics of the parse.
+        """
+        self.ccg = ccg
+        self.tokens = tokens
+        self.chart = chart
+        self.roots = roots
+        self.stats = stats if stats is not None else {}
+        self._states = {}
+        self._trees = {}
+
+    def __bool__(self):
+        return bool(self.roots)
+
+    def reconstruct(self):
+        """
+        Return all the derivations of the forest.
+
+        Returns:
+        tuple: The list of CKY derivations and their maximal weight, as
+               returned by `CCGCKYParser` in the default mode.
+        """
+        return reconstruct(self.roots, self.ccg)
+
+    def iter_derivations(self):
+        """
+        Yield all the derivations of the forest lazily, in the order of
+        `reconstruct` (see `iter_derivations`).
+
+        Yields:
+        CKYDerivation: The derivations.
+
+        Example:
+        >>> first = next(forest.iter_derivations(), None)
+        """
+        return iter_derivations(self.roots, self.ccg)
+
+    def count(self):
+        """
+        Return the number of derivations of the forest, without building
+        them (see `count_derivations`).
+
+        Returns:
+        int: The number of derivations `reconstruct` would return.
+
+        Example:
+        >>> CCGCKYParser(ccg, "Le chat mange la souris", mode="forest").count()
+        2
+        """
+        memo = {}
+        return sum(derivation_count(root, memo) for root in self.roots)
+
+    def kbest(self, k=None):
+        """
+        Yield the k best derivations in decreasing weight order.
+
+        Args:
+        - k (int, optional): The maximal number of derivations to yield
+                             (default is all of them).
+
+        Yields:
+        CKYDerivation: The derivations, best first.
+
+        Example:
+        >>> best = next(forest.kbest(), None)
+        """
+        heap = []
+        ids = count()
+        for root in self.roots:
+            found = self._kth(root, 0)
+            if found:
+                heappush(heap, (-found[0], next(ids), root, 0))
+        produced = 0
+        while heap and (k is None or produced < k):
+            _, _, root, rank = heappop(heap)
+            yield self._tree(root, rank)
+            produced += 1
+            found = self._kth(root, rank + 1)
+            if found:
+                heappush(heap, (-found[0], next(ids), root, rank + 1))
+
+    def _state(self, item):
+        """
+        Return the k-best state of an item, creating it with the best
+        candidate of each of its backpointers.
+        """
+        state = self._states.get(id(item))
+        if state is None:
+            state = {"derivs": [], "cand": [], "seen": set(), "last": None,
+                     "ids": count()}
+            self._states[id(item)] = state
+            for index, deriv in enumerate(item.derivation):
+                ranks = (0,) * len(deriv["derivation"][2] if deriv["derivation"] else [])
+                self._push(item, state, index, ranks)
+        return state
+
+    def _push(self, item, state, index, ranks):
+        """
+        Push the candidate of a backpointer with the given premise ranks, if
+        all of them exist and it has not been pushed yet.
+        """
+        if (index, ranks) in state["seen"]:
+            return
+        deriv = item.derivation[index]["derivation"]
+        if not deriv:
+            weight = 1.0
+        else:
+            comb, _, premises = deriv
+            weight = rule_weight(self.ccg, comb, premises)
+            for premise, rank in zip(premises, ranks):
+                found = self._kth(premise, rank)
+                if found is None:
+                    return
+                weight *= found[0]
+        state["seen"].add((index, ranks))
+        heappush(state["cand"], (-weight, next(state["ids"]), index, ranks))
+
+    def _kth(self, item, rank):
+        """
+        Return the derivation of the given rank of an item, as a tuple of its
+        weight, backpointer index and premise ranks, or None if there is no
+        such derivation.
+        """
+        state = self._state(item)
+        derivs = state["derivs"]
+        while len(derivs) <= rank:
+            last = state["last"]
+            if last is not None:
+                state["last"] = None
+                _, index, ranks = last
+                for pos in range(len(ranks)):
+                    succ = ranks[:pos] + (ranks[pos] + 1,) + ranks[pos + 1:]
+                    self._push(item, state, index, succ)
+            if not state["cand"]:
+                break
+            weight, _, index, ranks = heappop(state["cand"])
+            derivs.append((-weight, index, ranks))
+            state["last"] = derivs[-1]
+        return derivs[rank] if rank < len(derivs) else None
+
+    def _tree(self, item, rank):
+        """
+        Build the CKY derivation of the given rank of an item.
+        """
+        key = (id(item), rank)
+        if key not in self._trees:
+            weight, index, ranks = self._kth(item, rank)
+            deriv = item.derivation[index]
+            if not deriv["derivation"]:
+                tree = leaf_derivation(item, deriv)
             else:
-                result.append(CKYDerivation(parse, None, None, w))
-    return (result, w)
+                comb, _, premises = deriv["derivation"]
+                past = [self._tree(p, r) for p, r in zip(premises, ranks)]
+                tree = node_derivation(item, comb, past, weight)
+            self._trees[key] = tree
+        return self._trees[key]
+
+
+class IncrementalParser:
+    """
+    Parses an input token by token, from left to right.
+
+    Each pushed token adds the rightmost column of the chart: the cell of
+    the token, then the cells of all the spans ending with it, from the
+    shortest to the longest. The cells of the previous tokens are never
+    recomputed, so parsing an input token by token costs the same as
+    parsing it at once, and the parses of the prefix read so far are
+    available after each token.
+
+    With a beam, the cell of the whole prefix is only pruned when the next
+    token is pushed, once it is no longer the top cell: the chart is then
+    the same as the one `CCGCKYParser` builds for the prefix.
+
+    Attributes:
+    - ccg (CCGrammar): The grammar.
+    - tokens (list of str): The tokens pushed so far.
+    - chart (dict): The CKY chart of the prefix, mapping spans to cells.
+    - stats (dict): The statistics of the parse (see `CCGCKYParser`).
+
+    Methods:
+    - push(token): Add a token to the prefix.
+    - extend(tokens): Add several tokens to the prefix.
+    - roots(): Return the complete parse items of the prefix.
+    - best(): Return the best derivation of the prefix and its weight.
+    - parses(): Return all the derivations of the prefix and their maximal
+                weight.
+    - forest(): Return the packed parse forest of the prefix.
+
+    Example:
+    >>> parser = IncrementalParser(ccg)
+    >>> for token in "John eats apples".split():
+    >>>     print(token, parser.push(token))
+    John False
+    eats False
+    apples True
+    >>> derivation, weight = parser.best()
+    """
+
+    def __init__(self, ccg, use_typer=False, mode="all", beam_width=None,
+                 beam_threshold=None, compiled=None, normal_form=False):
+        """
+        Initialize an IncrementalParser with an empty prefix.
 
+        Args:
+        - ccg (CCGrammar): The grammar.
+        - use_typer (bool, optional): Flag to enable type-raising (default
+                                      is False).
+        - mode (str, optional): "all" to keep every backpointer of each
+                                category, or "best" to only keep the best
+                                one (default is "all").
+        - beam_width (int, optional): The maximal number of categories kept
+                                      in a cell (default is no limit).
+        - beam_threshold (float, optional): The minimal inside score of a
+                                            category kept in a cell,
+                                            relative to the best score of
+                                            the cell (default is no limit).
+        - compiled (CompiledGrammar, optional): The grammar compiled by
+                                                `CCGCompiler.compile_grammar`.
+        - normal_form (bool, optional): Only build the derivations in Eisner
+                                        normal form (default is False).
+
+        Raises:
+        - ValueError: If the mode or the beam is invalid.
+        """
+        if mode not in ("all", "best"):
+            raise ValueError(f"Unknown parsing mode: {mode}")
+        if beam_width is not None and beam_width < 1:
+            raise ValueError(f"Invalid beam width: {beam_width}")
+        if beam_threshold is not None and not 0 <= beam_threshold <= 1:
+            raise ValueError(f"Invalid beam threshold: {beam_threshold}")
+        self.ccg = ccg
+        self.use_typer = use_typer
+        self.best_only = mode == "best"
+        self.beam_width = beam_width
+        self.beam_threshold = beam_threshold
+        self.compiled = compiled
+        self.normal_form = normal_form
+        self.tokens = []
+        self.chart = {}
+        self.stats = {"cells": 0, "items": 0, "pruned": 0, "pruned_cells": 0}
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def push(self, token):
+        """
+        Add a token to the prefix, computing the cells of the spans ending
+        with it.
+
+        Args:
+        - token (str): The token.
+
+        Returns:
+        bool: True if the new prefix has a complete parse.
+
+        Raises:
+        - TokenError: If the token is not in the lexicon of the grammar; the
+                      prefix is then left unchanged.
+
+        Example:
+        >>> parser.push("John")
+        False
+        """
+        cell = lexical_cell(self.ccg, token)
+        end = len(self.tokens) + 1
+        if end > 2 and (self.beam_width is not None or self.beam_threshold is not None):
+            pruned = self.chart[(0, end - 1)].prune(self.beam_width, self.beam_threshold)
+            self.stats["pruned"] += pruned
+            self.stats["pruned_cells"] += 1 if pruned else 0
+            self.stats["items"] -= pruned
+        self.tokens.append(token)
+        self.chart[(end - 1, end)] = cell
+        self._count(cell)
+
+        for start in range(end - 2, -1, -1):
+            cell = compute_chart(BINARY_COMBINATORS, self.chart, end - start, start, self.ccg,
+                                 self.use_typer, best=self.best_only, compiled=self.compiled,
+                                 normal_form=self.normal_form)
+            if start > 0 and (self.beam_width is not None or self.beam_threshold is not None):
+                pruned = cell.prune(self.beam_width, self.beam_threshold)
+                self.stats["pruned"] += pruned
+                self.stats["pruned_cells"] += 1 if pruned else 0
+            self.chart[(start, end)] = cell
+            self._count(cell)
+        return bool(self.roots())
+
+    def _count(self, cell):
+        self.stats["cells"] += 1
+        self.stats["items"] += len(cell)
+
+    def extend(self, tokens):
+        """
+        Add several tokens to the prefix.
+
+        Args:
+        - tokens (iterable of str): The tokens.
 
-def CCGCKYParser(ccg, input_string, use_typer=False):
+        Returns:
+        bool: True if the new prefix has a complete parse.
+        """
+        for token in tokens:
+            self.push(token)
+        return bool(self.roots())
+
+    def roots(self):
+        """
+        Return the complete parse items of the prefix.
+
+        Returns:
+        list of Judgement: The items of the whole prefix whose category is
+                           the terminal of the grammar.
+        """
+        if not self.tokens:
+            return []
+        return [item for item in self.chart[(0, len(self.tokens))]
+                if item.type.show() == self.ccg.terminal]
+
+    def best(self):
+        """
+        Return the best derivation of the prefix and its weight.
+
+        Returns:
+        tuple: The best derivation (None if the prefix has no parse) and
+               its weight (1.0 if there is none).
+
+        Example:
+        >>> derivation, weight = parser.best()
+        """
+        roots = self.roots()
+        if not roots:
+            return (None, 1.0)
+        root = max(roots, key=lambda item: inside_score(item, self.ccg))
+        derivation = viterbi(root, self.ccg)
+        return (derivation, derivation.weight)
+
+    def parses(self):
+        """
+        Return all the derivations of the prefix and their maximal weight.
+
+        Returns:
+        tuple: The list of the derivations and their maximal weight, as
+               returned by `CCGCKYParser`.
+        """
+        return reconstruct(self.roots(), self.ccg)
+
+    def forest(self):
+        """
+        Return the packed parse forest of the prefix.
+
+        Returns:
+        ParseForest: The forest, sharing the chart of the parser; it must
+                     not be used after more tokens are pushed.
+        """
+        return ParseForest(self.ccg, list(self.tokens), self.chart, self.roots(), self.stats)
+
+
+def result_size(result):
+    """
+    Estimate the memory taken by a result of `CCGCKYParser`, as the size
+    function of a cache of results.
+
+    Args:
+        result (tuple or ParseForest): The result.
+
+    Returns:
+        int: The number of items of the chart of a forest, or the number of
+             derivations of a list (at least 1).
+
+    Example:
+    >>> cache = LRUCache(100000, sizeof=result_size)
+    """
+    if isinstance(result, ParseForest):
+        return max(1, sum(len(cell) for cell in result.chart.values()))
+    return max(1, len(result[0]))
+
+
+def CCGCKYParser(ccg, input_string, use_typer=False, mode="all",
+                 beam_width=None, beam_threshold=None, stats=None,
+                 compiled=None, workers=None, lexical_beam=None, priors=None,
+                 span_cache=None, sentence_cache=None, normal_form=False):
     """
     Parse a given input string using Combinatory Categorial Grammar (CCG) and CKY parsing.
 
@@ -776,9 +2265,114 @@ def CCGCKYParser(ccg, input_string, use_typer=False):
         ccg (CCGGrammar): The CCG grammar for parsing.
         input_string (str): The input string to parse.
         use_typer (bool, optional): Flag to enable type-raising (default is False).
+        mode (str, optional): "all" to reconstruct every derivation,
+                              "stream" to yield them lazily, "forest" to
+                              return the packed parse forest, or "best" to
+                              only keep the best backpointer of each
+                              category while filling the chart (default is
+                              "all").
+        beam_width (int, optional): The maximal number of categories kept
+                                    in a cell (default is no limit).
+        beam_threshold (float, optional): The minimal inside score of a
+                                          category kept in a cell, relative
+                                          to the best score of the cell
+                                          (default is no limit).
+        stats (dict, optional): A dictionary updated with the statistics of
+                                the parse: "cells" and "items" count the
+                                cells and categories of the chart,
+                                "pruned" the categories removed by the beam
+                                and "pruned_cells" the cells where some
+                                were removed.
+        compiled (CompiledGrammar, optional): The grammar compiled by
+                                              `CCGCompiler.compile_grammar`;
+                                              its rule table replaces
+                                              unification for the categories
+                                              it knows.
+        workers (int or Executor, optional): The number of processes filling
+                                             the cells of each diagonal of
+                                             the chart in parallel, or a
+                                             pool created by
+                                             `CCGParallel.parser_pool` (default
+                                             is a sequential parse). Diagonals
+                                             with few categories are still
+                                             filled sequentially.
+        lexical_beam (int, optional): The number of categories of each token
+                                      first put in the chart, those with the
+                                      best priors (default is all of them).
+                                      When no complete parse is found, the
+                                      input is parsed again with twice as
+                                      many, until all the categories are
+                                      used; when one is found, the parses
+                                      needing the other categories are
+                                      missed.
+        priors (dict, optional): The priors of the lexical categories (see
+                                 `lexical_cell`; default is the weights of
+                                 the lexical entries).
+        span_cache (LRUCache, optional): A cache of the completed cells of
+                                         the spans of previous inputs, which
+                                         may be shared by several grammars
+                                         (default is no cache).
+        sentence_cache (LRUCache, optional): A cache of the results of
+                                             previous inputs, which may be
+                                             shared by several grammars
+                                             (default is no cache).
+        normal_form (bool, optional): Only build the derivations in Eisner
+                                      normal form (default is False).
 
     Returns:
-        list of CKYDerivation: List of reconstructed CKY derivations.
+        tuple or ParseForest or iterator: In "all" mode, the list of
+                              reconstructed CKY derivations and their
+                              maximal weight. In "stream" mode, an iterator
+                              over the same derivations, in the same order
+                              (see `iter_derivations`). In "best" mode, a
+                              list holding the best derivation (empty if
+                              there is no parse) and its weight. In
+                              "forest" mode, the packed parse forest.
+
+    The beam only applies to the cells built by combination, below the cell
+    of the whole input: lexical categories all have the same score, and
+    pruning the last cell would not save any work. Scores are the weights
+    of the grammar's Weight rules (see `inside_score`), so a beam trades
+    some recall, that is parses whose sub-derivations were pruned, for
+    cells of bounded size.
+
+    The lexical beam also trades recall for speed: the input is only parsed
+    again, with a wider beam, when its chart has no complete parse at all.
+    When the categories of the beam already parse the input, the readings
+    that need the other categories are lost, in "all" mode, and the best
+    parse found in "best" mode may not be the best one of the grammar. The
+    retries are counted in the "lexical_retries" statistic.
+
+    The cell of a span only depends on its tokens and on the options of the
+    parser, so with a span cache, the cells of the token sequences already
+    parsed (a noun phrase found in many sentences, for instance) are spliced
+    into the chart instead of being computed again. Cells are keyed by the
+    fingerprint of the grammar, the options and the tokens of their span
+    (with their lexical categories under a lexical beam); the lookups are
+    counted in the "span_hits" and "span_misses" statistics. Cached cells
+    are shared between charts and must not be modified.
+
+    With a sentence cache, an input already parsed with the same grammar and
+    options (but any spacing) gets its stored result back, without building
+    a chart: the chart of a forest is shared, a list of derivations is
+    copied. The statistics of a forest from the cache (`ParseForest.stats`)
+    are a copy of those of the parse that filled its chart, while the
+    statistics given by the caller only count the work of the call: a hit
+    only adds to "sentence_hits", a miss to "sentence_misses" and to the
+    counters of the parse. Inputs parsed with priors are not cached, as the
+    priors cannot be part of the key. Bounding the cache by `result_size`
+    rather than by its number of entries bounds the memory it takes.
+
+    With composition, a reading usually has several derivations, which
+    only differ by where application is replaced by composition: "the big
+    cat" is derived by applying "the" to "big cat", and by composing "the"
+    with "big" before applying it to "cat". In normal form mode, the
+    combinations breaking the constraints of Eisner (1996) are skipped (see
+    `normal_form_allows`), which leaves at least one derivation of each
+    reading, and usually only one, so the chart holds fewer backpointers and
+    fewer derivations are reconstructed. The constraints do not cover the
+    ambiguity added by type raising. Weight rules on the skipped
+    combinations no longer apply, so the best weight may be lower.
 
     Example:
     >>> ccg = CCGGrammar(...)
@@ -790,22 +2384,138 @@ def CCGCKYParser(ccg, input_string, use_typer=False):
 
     Raises:
         TokenError: If a token in the input string is not recognized in the CCG grammar.
+        ValueError: If the mode, a beam or the number of workers is invalid.
     """
+    if mode not in ("all", "best", "forest", "stream"):
+        raise ValueError(f"Unknown parsing mode: {mode}")
+    if beam_width is not None and beam_width < 1:
+        raise ValueError(f"Invalid beam width: {beam_width}")
+    if beam_threshold is not None and not 0 <= beam_threshold <= 1:
+        raise ValueError(f"Invalid beam threshold: {beam_threshold}")
+    if isinstance(workers, int) and workers < 1:
+        raise ValueError(f"Invalid number of workers: {workers}")
+    if lexical_beam is not None and lexical_beam < 1:
+        raise ValueError(f"Invalid lexical beam: {lexical_beam}")
+    if stats is None:
+        stats = {}
+    for key in ("cells", "items", "pruned", "pruned_cells"):
+        stats.setdefault(key, 0)
+    if lexical_beam is not None:
+        stats.setdefault("lexical_retries", 0)
+    if span_cache is not None:
+        stats.setdefault("span_hits", 0)
+        stats.setdefault("span_misses", 0)
     if not input_string or input_string.isspace():
         raise SyntaxError("Empty input")
+    if mode == "stream":
+        # The chart is filled here, so that errors are raised by the call:
+        # only the derivations are built lazily.
+        forest = CCGCKYParser(ccg, input_string, use_typer, "forest", beam_width, beam_threshold,
+                              stats, compiled, workers, lexical_beam, priors, span_cache,
+                              sentence_cache, normal_form)
+        return forest.iter_derivations()
     tokens = input_string.strip().split()
+    if sentence_cache is not None and priors is None:
+        stats.setdefault("sentence_hits", 0)
+        stats.setdefault("sentence_misses", 0)
+        key = (ccg.fingerprint, tuple(tokens), use_typer, mode, beam_width, beam_threshold,
+               lexical_beam, normal_form)
+        result = sentence_cache.get(key)
+        if result is None:
+            stats["sentence_misses"] += 1
+            # The cached result keeps its own statistics, those of its parse.
+            parsed = {}
+            result = CCGCKYParser(ccg, input_string, use_typer, mode, beam_width, beam_threshold,
+                                  parsed, compiled, workers, lexical_beam, priors, span_cache,
+                                  normal_form=normal_form)
+            for name, value in parsed.items():
+                stats[name] = stats.get(name, 0) + value
+            sentence_cache.put(key, result)
+        else:
+            stats["sentence_hits"] += 1
+        if mode == "forest":
+            return ParseForest(ccg, result.tokens, result.chart, result.roots, dict(result.stats))
+        return (list(result[0]), result[1])
     num_tokens = len(tokens)
     chart = {}
-    combinators = {ApplicationLeft, ApplicationRight, CompositionLeft, CompositionRight}
+    combinators = BINARY_COMBINATORS
     # Reconnaisance des symboles terminaux
     for i, token in enumerate(tokens):
-        if token not in ccg.rules:
-            raise TokenError(token)
-
-        chart[(i, i+1)] = set(ccg.rules[token])
-
-    for span in range(2, num_tokens + 1):
-        for start in range(0, num_tokens - span + 1):
-            chart[(start, start + span)] = compute_chart(combinators, chart, span, start, ccg, use_typer)
-
-    return reconstruct([elem for elem in chart[(0, num_tokens)] if elem.type.show() == ccg.terminal], ccg)
+        chart[(i, i+1)] = lexical_cell(ccg, token, lexical_beam, priors)
+    # Some categories were left out by the lexical beam.
+    narrowed = lexical_beam is not None and any(
+        len({entry.type.canonical() for entry in ccg.rules[token]}) > lexical_beam
+        for token in tokens)
+
+    if span_cache is not None:
+        words = tuple(tokens) if lexical_beam is None else tuple(
+            (token, tuple(item.type for item in chart[(i, i + 1)]))
+            for i, token in enumerate(tokens))
+        options = (ccg.fingerprint, use_typer, mode == "best", beam_width, beam_threshold,
+                   normal_form)
+
+    pool = workers
+    if workers is not None:
+        # CCGParallel imports this module, it can only be imported here.
+        from CCGParallel import (parser_pool, fill_diagonal, diagonal_pairs, SharedChart,
+                                 MIN_PARALLEL_PAIRS)
+        if isinstance(workers, int):
+            pool = parser_pool(ccg, workers, compiled)
+        shared = SharedChart()
+    try:
+        for span in range(2, num_tokens + 1):
+            starts = range(0, num_tokens - span + 1)
+            pruning = span < num_tokens and (beam_width is not None or beam_threshold is not None)
+            cells, keys = {}, {}
+            if span_cache is not None:
+                for start in starts:
+                    keys[start] = (options, pruning, words[start:start + span])
+                    cell = span_cache.get(keys[start])
+                    if cell is not None:
+                        cells[start] = cell
+                stats["span_hits"] += len(cells)
+                stats["span_misses"] += len(starts) - len(cells)
+            missing = [start for start in starts if start not in cells]
+            if missing and pool is not None and diagonal_pairs(chart, span, num_tokens) >= MIN_PARALLEL_PAIRS:
+                computed = fill_diagonal(pool, chart, span, num_tokens, ccg,
+                                         best=mode == "best", use_typer=use_typer,
+                                         normal_form=normal_form, shared=shared)
+                cells.update((start, computed[start]) for start in missing)
+            else:
+                cells.update((start, compute_chart(combinators, chart, span, start, ccg, use_typer,
+                                                   best=mode == "best", compiled=compiled,
+                                                   normal_form=normal_form))
+                             for start in missing)
+            for start in missing:
+                if pruning:
+                    pruned = cells[start].prune(beam_width, beam_threshold)
+                    stats["pruned"] += pruned
+                    stats["pruned_cells"] += 1 if pruned else 0
+                if span_cache is not None:
+                    span_cache.put(keys[start], cells[start])
+            for start in starts:
+                chart[(start, start + span)] = cells[start]
+    finally:
+        if pool is not None:
+            shared.close()
+        if pool is not workers:
+            pool.shutdown()
+
+    stats["cells"] += len(chart)
+    stats["items"] += sum(len(cell) for cell in chart.values())
+
+    roots = [elem for elem in chart[(0, num_tokens)] if elem.type.show() == ccg.terminal]
+    if not roots and narrowed:
+        stats["lexical_retries"] += 1
+        return CCGCKYParser(ccg, input_string, use_typer, mode, beam_width, beam_threshold,
+                            stats, compiled, workers, lexical_beam * 2, priors, span_cache,
+                            normal_form=normal_form)
+    if mode == "forest":
+        return ParseForest(ccg, tokens, chart, roots, stats)
+    if mode == "best":
+        if not roots:
+            return ([], 1.0)
+        root = max(roots, key=lambda item: inside_score(item, ccg))
+        best = viterbi(root, ccg)
+        return ([best], best.weight)
+    return reconstruct(roots, ccg)
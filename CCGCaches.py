@@ -0,0 +1,159 @@
+"""
+CCG Caches
+
+This module defines the caches used to avoid recomputing the results of
+Combinatory Categorial Grammar (CCG) operations, such as the combination of
+two categories by a combinator, which are repeated many times over a corpus.
+
+Classes:
+- LRUCache: A bounded dictionary that evicts its least recently used entries
+            and counts its hits and misses.
+
+Example:
+>>> cache = LRUCache(maxsize=2)
+>>> cache.put(">", "S")
+>>> print(cache.get(">"), cache.get("<"))
+S None
+>>> print(cache.stats())
+{'size': 1, 'maxsize': 2, 'hits': 1, 'misses': 1}
+"""
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    A bounded dictionary with least recently used eviction.
+
+    When an entry is added to a full cache, the entry that was read or
+    written the longest time ago is evicted, so the size of the cache never
+    exceeds `maxsize`. A cache of size 0 stores nothing. The size of the
+    cache is its number of entries, or the sum of their sizes when the cache
+    has a `sizeof` function, for values of very different sizes; a value
+    larger than the cache is not stored.
+
+    Attributes:
+    - maxsize (int): The maximal size of the cache.
+    - sizeof (callable): The function giving the size of a value, or None
+                         if every entry has size 1.
+    - size (int): The current size of the cache.
+    - hits (int): The number of lookups that found their key.
+    - misses (int): The number of lookups that did not find their key.
+
+    Methods:
+    - get(key, default=None): Return the value of a key, marking it as
+                              recently used.
+    - put(key, value): Store the value of a key, evicting the least recently
+                       used entry if the cache is full.
+    - clear(): Remove all the entries and reset the counters.
+    - stats(): Return the size and counters of the cache.
+
+    Example:
+    >>> cache = LRUCache(maxsize=1)
+    >>> cache.put("a", 1)
+    >>> cache.put("b", 2)
+    >>> print("a" in cache, "b" in cache)
+    False True
+    """
+
+    def __init__(self, maxsize=4096, sizeof=None):
+        """
+        Initialize an empty LRUCache.
+
+        Args:
+        - maxsize (int, optional): The maximal size of the cache (default is
+                                   4096).
+        - sizeof (callable, optional): The function giving the size of a
+                                       value (default is 1 for every value).
+
+        Raises:
+        - ValueError: If the size is negative.
+        """
+        if maxsize < 0:
+            raise ValueError(f"Invalid cache size: {maxsize}")
+        self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._sizes = {}
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+        Return the value of a key, marking it as recently used.
+
+        Args:
+        - key (hashable): The key to look up.
+        - default (any, optional): The value returned if the key is not in
+                                   the cache (default is None).
+
+        Returns:
+        any: The value of the key, or `default`.
+
+        Example:
+        >>> cache.get("b")
+        2
+        """
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """
+        Store the value of a key, evicting the least recently used entries
+        until the cache is no longer full.
+
+        Args:
+        - key (hashable): The key.
+        - value (any): The value of the key.
+
+        Example:
+        >>> cache.put("c", 3)
+        """
+        size = self.sizeof(value) if self.sizeof is not None else 1
+        if size > self.maxsize:
+            return
+        if key in self._data:
+            self.size -= self._sizes[key]
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._sizes[key] = size
+        self.size += size
+        while self.size > self.maxsize:
+            evicted, _ = self._data.popitem(last=False)
+            self.size -= self._sizes.pop(evicted)
+
+    def clear(self):
+        """
+        Remove all the entries and reset the counters.
+        """
+        self._data.clear()
+        self._sizes.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        """
+        Return the size and counters of the cache.
+
+        Returns:
+        dict: The size ("size", the number of entries without `sizeof`),
+              the maximal size ("maxsize"), and the numbers of "hits" and
+              "misses".
+
+        Example:
+        >>> print(cache.stats())
+        {'size': 1, 'maxsize': 1, 'hits': 0, 'misses': 0}
+        """
+        return {"size": self.size, "maxsize": self.maxsize,
+                "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,216 @@
+"""
+CCG Compiler
+
+This module compiles a Combinatory Categorial Grammar (CCG) into a table of
+binary rules over category ids, so that the CKY parser can combine the
+categories of two cells with integer lookups instead of unification.
+
+Without type raising, the categories derivable from the ground categories of
+a lexicon under application and composition form a finite set, usually
+small. The compiler computes this closure, numbering every category, and
+records for every pair of category ids the categories each combinator
+derives from them.
+
+Classes:
+- CompiledGrammar: Represents the closure of the categories of a grammar and
+                   its table of binary rules.
+
+Functions:
+- compile_grammar: Compute the closure of the lexical categories of a grammar
+                   under a set of binary combinators.
+
+Example:
+>>> ccg = CCGrammar(...)
+>>> compiled = compile_grammar(ccg)
+>>> print(len(compiled), compiled.complete)
+215 True
+>>> parses, maxweight = CCGCKYParser(ccg, "John eats apples", compiled=compiled)
+"""
+from CCGCKYParser import Judgement, BINARY_COMBINATORS, WILDCARD, index_key
+from CCGExprs import CCGExprString
+
+
+class CompiledGrammar:
+    """
+    Represents the closure of the categories of a grammar and its table of
+    binary rules.
+
+    Categories are numbered in the order they are found. The table maps a
+    pair of category ids to the combinations it allows, as pairs of a
+    combinator and the id of the derived category. When the closure was cut
+    by a cap, a derived category may have no id: it is then recorded as
+    None, and the parser falls back to unification for that combination.
+
+    Attributes:
+    - combinators (tuple of Inference): The combinators of the table.
+    - categories (list of CCGType): The categories, indexed by id.
+    - ids (dict): A dictionary mapping categories to their ids.
+    - depths (list of int): The derivation depth at which each category was
+                            first found (0 for lexical categories).
+    - table (dict): A dictionary mapping pairs of category ids to tuples of
+                    (combinator, category id or None).
+    - complete (bool): Whether the closure was computed entirely, without
+                       hitting the depth or size cap.
+
+    Methods:
+    - category_id(ccgtype): Return the id of a category, or None.
+    - combinations(left_id, right_id): Return the combinations of a pair of
+                                       category ids.
+    - add(ccgtype, depth): Add a category to the closure.
+
+    Example:
+    >>> compiled = compile_grammar(ccg)
+    >>> left = compiled.category_id(CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAtomic("NP")))
+    >>> right = compiled.category_id(CCGTypeAtomic("NP"))
+    >>> print(compiled.combinations(left, right))
+    ((ApplicationRight, 4),)
+    """
+
+    def __init__(self, combinators):
+        """
+        Initialize an empty CompiledGrammar.
+
+        Args:
+        - combinators (tuple of Inference): The combinators of the table.
+        """
+        self.combinators = tuple(combinators)
+        self.categories = []
+        self.ids = {}
+        self.depths = []
+        self.table = {}
+        self.complete = True
+
+    def __len__(self):
+        return len(self.categories)
+
+    def category_id(self, ccgtype):
+        """
+        Return the id of a category.
+
+        Args:
+        - ccgtype (CCGType): The category.
+
+        Returns:
+        int or None: The id of the category, or None if it is not in the
+                     closure.
+        """
+        return self.ids.get(ccgtype)
+
+    def combinations(self, left_id, right_id):
+        """
+        Return the combinations of a pair of category ids.
+
+        Args:
+        - left_id (int): The id of the left category.
+        - right_id (int): The id of the right category.
+
+        Returns:
+        tuple: The pairs (combinator, id of the derived category or None);
+               empty if the categories do not combine.
+        """
+        return self.table.get((left_id, right_id), ())
+
+    def add(self, ccgtype, depth):
+        """
+        Add a category to the closure if it is not already there.
+
+        Args:
+        - ccgtype (CCGType): The category.
+        - depth (int): The derivation depth at which it was found.
+
+        Returns:
+        int: The id of the category.
+        """
+        if ccgtype not in self.ids:
+            self.ids[ccgtype] = len(self.categories)
+            self.categories.append(ccgtype)
+            self.depths.append(depth)
+        return self.ids[ccgtype]
+
+
+def compile_grammar(ccg, combinators=BINARY_COMBINATORS, max_depth=None,
+                    max_categories=10000):
+    """
+    Compute the closure of the lexical categories of a grammar under a set
+    of binary combinators.
+
+    Every pair of categories of the closure is combined once by unification,
+    and the results are recorded in the table of the compiled grammar. Pairs
+    whose index keys differ (see `CCGCKYParser.index_key`) are skipped, as
+    they never unify. Only ground categories are compiled: lexical
+    categories with variables are left out, and the parser combines them by
+    unification.
+
+    Args:
+        ccg (CCGrammar): The grammar to compile.
+        combinators (iterable of Inference, optional): The binary combinators
+                                                       (default is
+                                                       application and
+                                                       composition).
+        max_depth (int, optional): The maximal derivation depth of the
+                                   categories of the closure (default is
+                                   no limit).
+        max_categories (int, optional): The maximal number of categories of
+                                        the closure (default is 10000).
+
+    Returns:
+        CompiledGrammar: The compiled grammar; its `complete` attribute is
+                         False if a cap was hit.
+
+    Example:
+    >>> compiled = compile_grammar(ccg, max_depth=3)
+    >>> print(compiled.complete)
+    False
+    """
+    compiled = CompiledGrammar(combinators)
+    for entries in ccg.rules.values():
+        for entry in entries:
+            if entry.type.ground:
+                compiled.add(entry.type, 0)
+
+    keys = []
+
+    def compatible(combinator, left_id, right_id):
+        paths = combinator.index_paths()
+        if paths is None:
+            return True
+        while len(keys) < len(compiled):
+            category = compiled.categories[len(keys)]
+            keys.append({c: (index_key(category, c.index_paths()[0]),
+                             index_key(category, c.index_paths()[1]))
+                         for c in compiled.combinators if c.index_paths()})
+        left, right = keys[left_id][combinator][0], keys[right_id][combinator][1]
+        if left is None or right is None:
+            return False
+        return left == WILDCARD or right == WILDCARD or left == right
+
+    def combine(left_id, right_id):
+        depth = max(compiled.depths[left_id], compiled.depths[right_id]) + 1
+        data = [Judgement(CCGExprString(""), compiled.categories[left_id]),
+                Judgement(CCGExprString(""), compiled.categories[right_id])]
+        found = []
+        for combinator in compiled.combinators:
+            if not compatible(combinator, left_id, right_id):
+                continue
+            result = combinator.match(data)
+            if not result:
+                continue
+            if result.type in compiled.ids:
+                found.append((combinator, compiled.ids[result.type]))
+            elif ((max_depth is not None and depth > max_depth)
+                  or len(compiled) >= max_categories):
+                compiled.complete = False
+                found.append((combinator, None))
+            else:
+                found.append((combinator, compiled.add(result.type, depth)))
+        if found:
+            compiled.table[(left_id, right_id)] = tuple(found)
+
+    current = 0
+    while current < len(compiled):
+        for other in range(current):
+            combine(current, other)
+            combine(other, current)
+        combine(current, current)
+        current += 1
+    return compiled
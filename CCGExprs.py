@@ -93,6 +93,16 @@ class CCGExprVar(CCGExpr):
         """
         self.name = name
 
+    def __eq__(self, other):
+        """
+        Structural equality: two variables are equal if they have the same
+        name.
+        """
+        return isinstance(other, CCGExprVar) and self.name == other.name
+
+    def __hash__(self):
+        return hash(("var", self.name))
+
     def show(self):
         """
         Return a string representation of the variable.
@@ -191,6 +201,16 @@ class CCGExprString(CCGExpr):
         """
         self.str = expr_str
 
+    def __eq__(self, other):
+        """
+        Structural equality: two string literals are equal if they hold the
+        same string.
+        """
+        return isinstance(other, CCGExprString) and self.str == other.str
+
+    def __hash__(self):
+        return hash(self.str)
+
     def __len__(self):
         """
         Return the length of the string literal.
@@ -308,6 +328,17 @@ class CCGExprConcat(CCGExpr):
         self.left = left
         self.right = right
 
+    def __eq__(self, other):
+        """
+        Structural equality: two concatenations are equal if their left and
+        right expressions are equal.
+        """
+        return (isinstance(other, CCGExprConcat)
+                and self.left == other.left and self.right == other.right)
+
+    def __hash__(self):
+        return hash((self.left, self.right))
+
     def __len__(self):
         """
         Return the total length of the concatenated expressions.
@@ -0,0 +1,498 @@
+"""
+CCG Parallel
+
+This module fills the chart of the CKY parser on a pool of processes. The
+cells of a diagonal of the chart (the spans of the same length) only depend
+on the cells of shorter spans, so they can be computed independently: each
+cell is a task of the pool.
+
+Chart items cannot travel between processes as they are, since they hold
+backpointers into the whole chart and semantic closures. Each finished
+diagonal is instead shipped once to the workers, in shared memory, as the
+categories of its cells (see `SharedChart`). Every worker keeps a copy of
+the chart made of these categories and fills a cell with
+`CCGCKYParser.compute_chart`, as a sequential parse does. The completed
+cell is sent back in a compact form: its categories, and their
+backpointers as positions in the cells below. The main process builds its
+judgements from them, without combining, unifying or merging anything.
+
+The same pools parse whole corpora: `parse_batch` streams chunks of
+sentences to the workers, which parse them sequentially and send back their
+derivations.
+
+Classes:
+- SharedChart: The finished diagonals of a chart, shared with the workers
+               of a pool.
+
+Functions:
+- parser_pool: Create a process pool whose workers can fill cells of charts
+               of a grammar.
+- fill_cell: Fill a cell of the chart, on a worker.
+- diagonal_pairs: Count the pairs of categories to combine in a diagonal of
+                  the chart.
+- fill_diagonal: Compute the cells of a diagonal of the chart on a pool.
+- parse_chunk: Parse a chunk of sentences, on a worker.
+- parse_batch: Parse sentences on a pool, yielding their results.
+
+Example:
+>>> ccg = CCGrammar(...)
+>>> with parser_pool(ccg, 32) as pool:
+>>>     parses, maxweight = CCGCKYParser(ccg, long_sentence, workers=pool)
+>>> for index, (parses, maxweight) in parse_batch(ccg, sentences, workers=32):
+>>>     print(index, len(parses))
+"""
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
+from multiprocessing.shared_memory import SharedMemory
+from CCGCKYParser import (CCGCKYParser, TokenError, ChartCell, BINARY_COMBINATORS,
+                          TypeRaisingLeft, TypeRaisingRight, compute_chart, inside_score)
+from CCGExprs import CCGExprString
+from CCGrammar import Judgement
+
+# The grammar and compiled grammar of a worker process, set by the pool
+# initializer, and its copy of the chart being parsed (see `fill_cell`).
+_WORKER = {}
+
+# Sides of the type raising of a premise, in the positions sent back by the
+# workers.
+NO_RAISING, RAISE_RIGHT, RAISE_LEFT = 0, 1, 2
+
+# The number of pairs of categories below which a diagonal is not worth
+# sending to the pool. Measured with warm combination caches, the main
+# process spends about 0.6 ms per diagonal and 0.35 us per pair shipping the
+# cells and building the judgements sent back, against 0.7 to 0.8 us per
+# pair for a sequential fill: 4 workers only win from about 2500 pairs (8
+# from 2000), and the diagonals of the sample grammar of main.py, of a few
+# hundred pairs, are faster sequentially.
+MIN_PARALLEL_PAIRS = 2500
+
+# The positions of the binary combinators, as sent between processes.
+_COMBINATORS = {combinator: index for index, combinator in enumerate(BINARY_COMBINATORS)}
+
+# The variables of the expressions of the hypotheses of the binary
+# combinators.
+_HYPOTHESES = {combinator: [hyp.expr.name for hyp in combinator.hyps]
+               for combinator in BINARY_COMBINATORS}
+
+# Workers only combine categories: their items have an empty expression, the
+# expressions of the judgements of the main process are built from the
+# backpointers.
+_NO_EXPR = CCGExprString("")
+
+
+def _init_worker(ccg, compiled):
+    _WORKER["ccg"] = ccg
+    _WORKER["compiled"] = compiled
+
+
+def parser_pool(ccg, workers=None, compiled=None):
+    """
+    Create a process pool whose workers can fill cells of charts of a
+    grammar.
+
+    The grammar, and the compiled grammar if any, are sent once to each
+    worker; each worker keeps its own combination cache. A pool can be
+    reused for many sentences of the same grammar.
+
+    Args:
+        ccg (CCGrammar): The grammar.
+        workers (int, optional): The number of processes (default is the
+                                 number of CPUs).
+        compiled (CompiledGrammar, optional): The grammar compiled by
+                                              `CCGCompiler.compile_grammar`.
+
+    Returns:
+        ProcessPoolExecutor: The pool, to be shut down by the caller.
+
+    Example:
+    >>> pool = parser_pool(ccg, 4)
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(ccg, compiled))
+
+
+class SharedChart:
+    """
+    The finished diagonals of a chart, shared with the workers of a pool.
+
+    Each diagonal is written once in a shared memory segment, which every
+    worker reads once (see `fill_cell`): the cells below a diagonal are not
+    sent again with each of its tasks. A segment holds, for each judgement
+    of the cells of its diagonal, the category of the judgement, the
+    combinator of its first backpointer in normal form mode (see
+    `composition_tag`) and its inside score in Viterbi mode (see
+    `inside_score`), which are all the workers need to fill the cells
+    above.
+
+    Attributes:
+    - segments (list of SharedMemory): The segments of the diagonals
+                                       shipped, by span length.
+
+    Methods:
+    - share(chart, span, num_tokens, ccg): Ship the diagonals shorter than a
+                                           span.
+    - close(): Release the segments.
+
+    Example:
+    >>> shared = SharedChart()
+    >>> cells = fill_diagonal(pool, chart, 2, 3, ccg, shared=shared)
+    >>> shared.close()
+    """
+
+    def __init__(self):
+        """
+        Initialize a SharedChart, with no diagonal shipped.
+        """
+        self.segments = []
+
+    def share(self, chart, span, num_tokens, ccg):
+        """
+        Ship the diagonals of the chart shorter than a span, unless they
+        already are.
+
+        The diagonals must not change once shipped: the parser only ships
+        them after pruning.
+
+        Args:
+        - chart (dict): The chart, filled for the spans shorter than `span`.
+        - span (int): The length of the spans of the next diagonal.
+        - num_tokens (int): The number of tokens of the input.
+        - ccg (CCGrammar): The grammar holding the Weight rules.
+
+        Returns:
+        list of str: The names of the segments of the diagonals shorter than
+                     `span`, by span length.
+        """
+        for length in range(len(self.segments) + 1, span):
+            cells = [_shipped_cell(chart[(start, start + length)], ccg)
+                     for start in range(num_tokens - length + 1)]
+            data = pickle.dumps(cells, protocol=pickle.HIGHEST_PROTOCOL)
+            segment = SharedMemory(create=True, size=len(data))
+            self.segments.append(segment)
+            segment.buf[:len(data)] = data
+        return [segment.name for segment in self.segments[:span - 1]]
+
+    def close(self):
+        """
+        Release the segments of the diagonals shipped.
+        """
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments = []
+
+
+def _shipped_cell(cell, ccg):
+    # The flags of a cell, and the category, first combinator (for the
+    # composition tag) and inside score of each of its judgements.
+    judgements = []
+    for item in cell:
+        first = item.derivation[0]["derivation"]
+        index = _COMBINATORS[first[0]] if cell.normal_form and first else None
+        score = inside_score(item, ccg) if cell.best else None
+        judgements.append((item.type, index, score))
+    return cell.best, cell.normal_form, judgements
+
+
+def _worker_item(ccgtype, index, score):
+    # A judgement of the copy of the chart of a worker.
+    derivation = {"derivation": [BINARY_COMBINATORS[index], {}, []] if index is not None else []}
+    if score is not None:
+        derivation["score"] = score
+    return Judgement(_NO_EXPR, ccgtype, derivation=[derivation])
+
+
+def _worker_chart(names):
+    # The copy of the chart of the worker, completed with the diagonals it
+    # has not read yet; a new chart replaces the previous one.
+    state = _WORKER.get("chart")
+    if state is None or state["names"][:1] != names[:1]:
+        state = _WORKER["chart"] = {"names": [], "cells": {}, "positions": {}}
+    for length in range(len(state["names"]) + 1, len(names) + 1):
+        segment = SharedMemory(name=names[length - 1])
+        try:
+            cells = pickle.loads(segment.buf)
+        finally:
+            segment.close()
+        for start, (best, normal_form, judgements) in enumerate(cells):
+            key = (start, start + length)
+            state["cells"][key] = cell = ChartCell(
+                (_worker_item(*judgement) for judgement in judgements),
+                ccg=_WORKER.get("ccg"), best=best, normal_form=normal_form)
+            for pos, item in enumerate(cell):
+                state["positions"][id(item)] = key + (NO_RAISING, pos)
+        state["names"].append(names[length - 1])
+    return state
+
+
+def fill_cell(task):
+    """
+    Fill a cell of the chart, on a worker.
+
+    The cell is computed by `CCGCKYParser.compute_chart` on the copy of the
+    chart of the worker, so it holds the same categories, in the same
+    order, with the same backpointers in the same order, as the cell of a
+    sequential parse.
+
+    Args:
+        task (tuple): The names of the segments of the diagonals below the
+                      cell (see `SharedChart.share`), the length and start of
+                      its span, and the flags of `compute_chart` (use_typer,
+                      best and normal_form).
+
+    Returns:
+        list of tuple: The judgements of the cell, as pairs of a category and
+                       of the list of its backpointers. A backpointer is a
+                       triple (combinator, left, right) of the index of the
+                       combinator in BINARY_COMBINATORS and of the positions
+                       of the premises, as tuples (start, end, raising,
+                       position): the premise is the judgement at `position`
+                       in the cell of the span (start, end), or in its type
+                       raising when `raising` is RAISE_RIGHT or RAISE_LEFT.
+    """
+    names, span, start, use_typer, best, normal_form = task
+    ccg, compiled = _WORKER.get("ccg"), _WORKER.get("compiled")
+    state = _worker_chart(names)
+    chart, positions = state["cells"], state["positions"]
+    cell = compute_chart(BINARY_COMBINATORS, chart, span, start, ccg, use_typer,
+                         best=best, compiled=compiled, normal_form=normal_form)
+
+    raised = {}
+    if use_typer:
+        for mid in range(start + 1, start + span):
+            for key, combinator, raising in (((start, mid), TypeRaisingLeft, RAISE_LEFT),
+                                             ((mid, start + span), TypeRaisingRight, RAISE_RIGHT)):
+                for pos, item in enumerate(chart[key].raised(combinator, ccg)):
+                    raised[id(item)] = key + (raising, pos)
+
+    def position(item):
+        return positions.get(id(item)) or raised[id(item)]
+
+    return [(item.type, [(_COMBINATORS[combinator], position(left), position(right))
+                         for combinator, _, (left, right)
+                         in (backpointer["derivation"] for backpointer in item.derivation)])
+            for item in cell]
+
+
+def diagonal_pairs(chart, span, num_tokens):
+    """
+    Count the pairs of categories to combine in a diagonal of the chart.
+
+    Diagonals with fewer than MIN_PARALLEL_PAIRS pairs are filled
+    sequentially by the parser: the time spent shipping their cells to the
+    pool and building the judgements sent back would exceed the time saved
+    combining them in parallel.
+
+    Args:
+        chart (dict): The chart, filled for the spans shorter than `span`.
+        span (int): The length of the spans of the diagonal.
+        num_tokens (int): The number of tokens of the input.
+
+    Returns:
+        int: The number of pairs of categories of the split points of the
+             cells of the diagonal.
+
+    Example:
+    >>> diagonal_pairs(chart, 2, 3)
+    6
+    """
+    return sum(len(chart[(start, mid)]) * len(chart[(mid, start + span)])
+               for start in range(num_tokens - span + 1)
+               for mid in range(start + 1, start + span))
+
+
+def _backpointer(combinator, left, right):
+    # A backpointer of a judgement, as built by `Inference.conclude`: the
+    # expressions of the hypotheses of the binary combinators are variables.
+    names = _HYPOTHESES[combinator]
+    return {"derivation": [combinator, {names[0]: left.expr, names[1]: right.expr}, [left, right]]}
+
+
+def fill_diagonal(pool, chart, span, num_tokens, ccg, best=False, use_typer=False,
+                  normal_form=False, shared=None):
+    """
+    Compute the cells of a diagonal of the chart on a pool.
+
+    The diagonals below are shipped to the workers, unless `shared` already
+    holds them, and each worker sends back complete cells (see
+    `fill_cell`). The judgement of each category is built here from its
+    first backpointer, with `Inference.conclude`, and its other
+    backpointers are appended to its derivation: the cells are the same as
+    those of a sequential parse.
+
+    Args:
+        pool (Executor): A pool created by `parser_pool`.
+        chart (dict): The chart, filled for the spans shorter than `span`.
+        span (int): The length of the spans of the diagonal.
+        num_tokens (int): The number of tokens of the input.
+        ccg (CCGrammar): The grammar being parsed.
+        best (bool): Keep only the best backpointer of each category.
+        use_typer (bool): Flag to enable type-raising.
+        normal_form (bool): Skip the combinations breaking the Eisner
+                            normal form (see `normal_form_allows`).
+        shared (SharedChart, optional): The diagonals of the chart already
+                                        shipped, to which the missing ones
+                                        are added (default is a SharedChart
+                                        released on return).
+
+    Returns:
+        list of ChartCell: The cells of the diagonal, by start position.
+
+    Example:
+    >>> cells = fill_diagonal(pool, chart, 2, 3, ccg)
+    """
+    own_shared = shared is None
+    if own_shared:
+        shared = SharedChart()
+    try:
+        names = shared.share(chart, span, num_tokens, ccg)
+        tasks = [(names, span, start, use_typer, best, normal_form)
+                 for start in range(num_tokens - span + 1)]
+        # A few tasks per process: fewer messages, still balanced.
+        chunksize = max(1, len(tasks) // (4 * (os.cpu_count() or 1)))
+        sources, premises = {}, {}
+
+        def premise(position):
+            # The judgement at a position sent back by a worker.
+            found = premises.get(position)
+            if found is None:
+                start, end, raising, pos = position
+                if (start, end, raising) not in sources:
+                    source = chart[(start, end)]
+                    if raising == RAISE_RIGHT:
+                        source = source.raised(TypeRaisingRight, ccg)
+                    elif raising == RAISE_LEFT:
+                        source = source.raised(TypeRaisingLeft, ccg)
+                    sources[(start, end, raising)] = list(source)
+                found = premises[position] = sources[(start, end, raising)][pos]
+            return found
+
+        cells = []
+        for judgements in pool.map(fill_cell, tasks, chunksize=chunksize):
+            cell = ChartCell(ccg=ccg, best=best, normal_form=normal_form)
+            for ccgtype, backpointers in judgements:
+                judgement = None
+                for index, left, right in backpointers:
+                    combinator = BINARY_COMBINATORS[index]
+                    if judgement is None:
+                        judgement = combinator.conclude(ccgtype, [premise(left), premise(right)])
+                    else:
+                        judgement.derivation.append(_backpointer(combinator, premise(left),
+                                                                 premise(right)))
+                cell.add(judgement)
+            cells.append(cell)
+        return cells
+    finally:
+        if own_shared:
+            shared.close()
+
+
+def parse_chunk(chunk):
+    """
+    Parse a chunk of sentences, on a worker.
+
+    Args:
+        chunk (tuple): A pair of the list of the sentences, as pairs of an
+                       index and a sentence, and of the keyword arguments of
+                       `CCGCKYParser`.
+
+    Returns:
+        list of tuple: The pairs of the index of each sentence and its
+                       result, which is the exception raised by the parser
+                       if the sentence could not be parsed.
+    """
+    sentences, options = chunk
+    ccg, compiled = _WORKER.get("ccg"), _WORKER.get("compiled")
+    results = []
+    for index, sentence in sentences:
+        try:
+            results.append((index, CCGCKYParser(ccg, sentence, compiled=compiled, **options)))
+        except (TokenError, SyntaxError) as error:
+            results.append((index, error))
+    return results
+
+
+def parse_batch(ccg, sentences, workers=None, chunksize=16, ordered=True,
+                compiled=None, pool=None, **options):
+    """
+    Parse sentences on a pool, yielding their results.
+
+    The sentences are read lazily and sent to the workers in chunks, with a
+    few chunks per worker in flight, so that a corpus never has to be held
+    in memory. The workers are started once, with the grammar loaded (see
+    `parser_pool`), unless a pool is given.
+
+    Args:
+        ccg (CCGrammar): The grammar.
+        sentences (iterable of str): The sentences to parse.
+        workers (int, optional): The number of processes (default is the
+                                 number of CPUs).
+        chunksize (int, optional): The number of sentences of a task
+                                   (default is 16).
+        ordered (bool, optional): Yield the results in the order of the
+                                  sentences, rather than as soon as their
+                                  chunk is parsed (default is True).
+        compiled (CompiledGrammar, optional): The grammar compiled by
+                                              `CCGCompiler.compile_grammar`.
+        pool (Executor, optional): A pool created by `parser_pool` for the
+                                   same grammar, which is not shut down; its
+                                   workers use their own compiled grammar.
+        **options: The keyword arguments of `CCGCKYParser`, such as
+                   `use_typer`, `mode` or the beam.
+
+    Yields:
+        tuple: The pairs of the index of each sentence and its result, which
+               is the result of `CCGCKYParser`, or the TokenError or
+               SyntaxError raised by the parser.
+
+    Example:
+    >>> results = dict(parse_batch(ccg, ["John eats apples", "eats"], workers=2))
+    >>> print(len(results[0][0]), results[1])
+    1 ([], 1.0)
+
+    Raises:
+        ValueError: If the chunk size or the options are invalid.
+    """
+    if chunksize < 1:
+        raise ValueError(f"Invalid chunk size: {chunksize}")
+    if options.get("mode") == "forest":
+        raise ValueError("Parse forests cannot be sent back by the workers")
+    if options.get("mode") == "stream":
+        raise ValueError("Derivation streams cannot be sent back by the workers")
+    for option in ("workers", "stats"):
+        if option in options:
+            raise ValueError(f"Unsupported option for batch parsing: {option}")
+
+    own_pool = pool is None
+    if own_pool:
+        pool = parser_pool(ccg, workers, compiled)
+    in_flight = 2 * (workers or os.cpu_count() or 1)
+    sentences = enumerate(sentences)
+
+    def submit():
+        chunk = list(islice(sentences, chunksize))
+        return pool.submit(parse_chunk, (chunk, options)) if chunk else None
+
+    try:
+        pending = deque() if ordered else set()
+        future = submit()
+        while future is not None or pending:
+            while future is not None and len(pending) < in_flight:
+                if ordered:
+                    pending.append(future)
+                else:
+                    pending.add(future)
+                future = submit()
+            if ordered:
+                yield from pending.popleft().result()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for finished in done:
+                    pending.remove(finished)
+                    yield from finished.result()
+    finally:
+        if own_pool:
+            pool.shutdown(cancel_futures=True)
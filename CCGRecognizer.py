@@ -0,0 +1,233 @@
+"""
+CCG Recognizer
+
+This module decides whether an input is generated by a Combinatory
+Categorial Grammar (CCG), without building its parses. It runs the same CKY
+algorithm as `CCGCKYParser`, but the cells of its chart only hold sets of
+categories: no semantics are computed, no judgements nor backpointers are
+built, and the top cell stops being filled as soon as the terminal category
+of the grammar appears in it.
+
+Classes:
+- CategorySet: Represents a cell of the recognition chart, holding a set of
+               canonical categories.
+
+Functions:
+- CCGRecognizer: Decide whether an input string is recognized by a grammar.
+- compute_categories: Computes the categories of a span of input.
+
+Example:
+>>> ccg = CCGrammar(...)
+>>> print(CCGRecognizer(ccg, "John eats apples"))
+True
+
+Raises:
+- TokenError: If a token in the input string is not recognized in the
+              CCG grammar.
+"""
+from itertools import product
+from CCGCKYParser import (TokenError, BINARY_COMBINATORS, TypeRaisingLeft,
+                          TypeRaisingRight, combination_pairs, index_key, raise_types)
+
+
+class CategorySet:
+    """
+    Represents a cell of the recognition chart.
+
+    A cell holds a set of canonical categories (see `CCGType.canonical`) in
+    insertion order. Like `ChartCell`, it indexes its categories for each
+    combinator and side, so that `combination_pairs` only yields the pairs
+    of categories that may fit together.
+
+    Attributes:
+    - categories (dict): The categories of the cell, as the keys of a
+                         dictionary.
+
+    Methods:
+    - add(ccgtype): Add a category to the cell.
+    - index(combinator, side): Return the categories of the cell indexed for
+                               a side of a combinator.
+
+    Example:
+    >>> cell = CategorySet([CCGTypeAtomic("NP")])
+    >>> print(cell.add(CCGTypeAtomic("NP")), len(cell))
+    False 1
+    """
+
+    def __init__(self, categories=()):
+        """
+        Initialize a CategorySet, optionally filled with some categories.
+
+        Args:
+        - categories (iterable of CCGType): Categories to add to the cell.
+        """
+        self.categories = {}
+        self._indexes = {}
+        for ccgtype in categories:
+            self.add(ccgtype)
+
+    def __iter__(self):
+        return iter(self.categories)
+
+    def __len__(self):
+        return len(self.categories)
+
+    def __contains__(self, ccgtype):
+        return ccgtype.canonical() in self.categories
+
+    def add(self, ccgtype):
+        """
+        Add a category to the cell.
+
+        Args:
+        - ccgtype (CCGType): The category to add.
+
+        Returns:
+        bool: True if the category was not in the cell.
+        """
+        key = ccgtype.canonical()
+        if key in self.categories:
+            return False
+        self.categories[key] = None
+        self._indexes.clear()
+        return True
+
+    def index(self, combinator, side):
+        """
+        Return the categories of the cell indexed for a side of a combinator.
+
+        Args:
+        - combinator (Inference): A binary combinator with index paths.
+        - side (int): 0 for the left hypothesis, 1 for the right one.
+
+        Returns:
+        dict: A dictionary mapping index keys (see `index_key`) to the lists
+              of categories having that key.
+        """
+        key = (combinator.name, side)
+        if key not in self._indexes:
+            path = combinator.index_paths()[side]
+            buckets = {}
+            for ccgtype in self:
+                found = index_key(ccgtype, path)
+                if found is not None:
+                    buckets.setdefault(found, []).append(ccgtype)
+            self._indexes[key] = buckets
+        return self._indexes[key]
+
+
+def compute_categories(combinators, chart, span, start, ccg, use_typer=False,
+                       compiled=None, goal=None):
+    """
+    Compute the categories of a span of input.
+
+    Args:
+        combinators (list of Inference): List of combinators to be applied.
+        chart (dict): Chart of category sets, by span.
+        span (int): Span of the input to consider.
+        start (int): Start position for the span.
+        ccg (CCGrammar): The grammar being recognized.
+        use_typer (bool): Flag to enable type-raising.
+        compiled (CompiledGrammar, optional): A compiled grammar whose rule
+                                              table is used to combine the
+                                              categories it knows.
+        goal (str, optional): A category whose appearance stops the
+                              computation.
+
+    Returns:
+        CategorySet: The categories of the span; only complete if the goal
+                     was not found.
+
+    Example:
+    >>> cell = compute_categories(BINARY_COMBINATORS, chart, 2, 0, ccg)
+    """
+    cell = CategorySet()
+
+    def add(ccgtype):
+        return cell.add(ccgtype) and goal is not None and ccgtype.show() == goal
+
+    for step in range(1, span):
+        mid = start + step
+        left_cell, right_cell = chart[(start, mid)], chart[(mid, start + span)]
+        if compiled is not None:
+            for left, right in product(left_cell, right_cell):
+                left_id = compiled.category_id(left)
+                right_id = compiled.category_id(right)
+                if left_id is None or right_id is None:
+                    found = (c.match_types([left, right], ccg) for c in combinators)
+                else:
+                    found = (compiled.categories[result_id] if result_id is not None
+                             else c.match_types([left, right], ccg)
+                             for c, result_id in compiled.combinations(left_id, right_id)
+                             if c in combinators)
+                if any(add(result) for result in found if result is not None):
+                    return cell
+        else:
+            for combinator in combinators:
+                for left, right in combination_pairs(combinator, left_cell, right_cell):
+                    result = combinator.match_types([left, right], ccg)
+                    if result is not None and add(result):
+                        return cell
+
+        if not use_typer:
+            continue
+        # Each category is raised once, as in `ChartCell.raised`.
+        raised_rights = {right: raise_types(TypeRaisingRight, right, ccg) for right in right_cell}
+        raised_lefts = {left: raise_types(TypeRaisingLeft, left, ccg) for left in left_cell}
+        for left, right in product(left_cell, right_cell):
+            pairs = ([[left, raised] for raised in raised_rights[right]]
+                     + [[raised, right] for raised in raised_lefts[left]])
+            for pair in pairs:
+                for combinator in combinators:
+                    result = combinator.match_types(pair, ccg)
+                    if result is not None and add(result):
+                        return cell
+    return cell
+
+
+def CCGRecognizer(ccg, input_string, use_typer=False, compiled=None):
+    """
+    Decide whether an input string is recognized by a grammar.
+
+    The chart is filled with sets of categories only, which is much cheaper
+    than parsing when the parses themselves are not needed. The answer is
+    the same as whether `CCGCKYParser` finds a parse.
+
+    Args:
+        ccg (CCGrammar): The CCG grammar.
+        input_string (str): The input string to recognize.
+        use_typer (bool, optional): Flag to enable type-raising (default is
+                                    False).
+        compiled (CompiledGrammar, optional): The grammar compiled by
+                                              `CCGCompiler.compile_grammar`.
+
+    Returns:
+        bool: True if the terminal category of the grammar spans the whole
+              input.
+
+    Example:
+    >>> CCGRecognizer(ccg, "John eats apples")
+    True
+
+    Raises:
+        SyntaxError: If the input is empty.
+        TokenError: If a token in the input string is not recognized in the
+                    CCG grammar.
+    """
+    if not input_string or input_string.isspace():
+        raise SyntaxError("Empty input")
+    tokens = input_string.strip().split()
+    num_tokens = len(tokens)
+    chart = {}
+    for i, token in enumerate(tokens):
+        if token not in ccg.rules:
+            raise TokenError(token)
+        chart[(i, i + 1)] = CategorySet(entry.type for entry in ccg.rules[token])
+
+    for span in range(2, num_tokens + 1):
+        goal = ccg.terminal if span == num_tokens else None
+        for start in range(0, num_tokens - span + 1):
+            chart[(start, start + span)] = compute_categories(BINARY_COMBINATORS, chart, span, start,
+                                                              ccg, use_typer, compiled, goal)
+
+    return any(ccgtype.show() == ccg.terminal for ccgtype in chart[(0, num_tokens)])
@@ -0,0 +1,263 @@
+"""
+CCG Server
+
+This module implements a local parsing service for Combinatory Categorial
+Grammars (CCG). The grammars are loaded once, when the server starts, and
+sent to a pool of worker processes; requests are then only parsed, on the
+pool, so that their latency is not spent parsing grammars or starting
+processes.
+
+The server listens on a localhost TCP port or on a Unix socket, and speaks
+JSON lines: each line received is a request, answered by one line. A
+request is an object with the fields:
+- "grammar" (str): The name of the grammar.
+- "sentence" (str): The sentence to parse.
+- "mode" (str, optional): "all" or "best" (default is "all").
+- "k" (int, optional): Only return the k best derivations.
+- "use_typer" (bool, optional): Enable type raising.
+- "beam_width", "beam_threshold" (optional): The beam of the parser.
+- "timeout" (float, optional): The deadline of the request, in seconds
+  (positive).
+- "id" (optional): Copied into the response.
+
+A response holds "ok": true, the derivations ("parses", see
+`CKYDerivation.to_dict`) and their maximal "weight", or "ok": false and an
+"error" message.
+
+Classes:
+- CCGServer: A parsing service for a set of grammars.
+
+Functions:
+- parse_request: Parse a sentence for a request, on a worker.
+- run_server: Run a parsing service until it is interrupted.
+
+Example:
+>>> server = CCGServer({"fr": GRAMMAR}, workers=4, timeout=5.0)
+>>> await server.serve(port=8765)
+$ echo '{"grammar": "fr", "sentence": "Un chat dort", "mode": "best"}' | nc localhost 8765
+{"ok": true, "parses": [{"expr": "\"Un chat dort\"", "type": "Phrase", ...}], "weight": 3.24}
+"""
+import asyncio
+import json
+from concurrent.futures import ProcessPoolExecutor
+from CCGCKYParser import CCGCKYParser, TokenError
+from CCGrammar import CCGrammar
+
+# The grammars of a worker process, by name, set by the pool initializer.
+_GRAMMARS = {}
+
+# The parser options a request may set.
+OPTIONS = ("mode", "use_typer", "beam_width", "beam_threshold")
+
+
+def _init_worker(grammars):
+    _GRAMMARS.update(grammars)
+
+
+def parse_request(name, sentence, options, k=None):
+    """
+    Parse a sentence for a request, on a worker.
+
+    Args:
+        name (str): The name of the grammar.
+        sentence (str): The sentence to parse.
+        options (dict): The keyword arguments of `CCGCKYParser`.
+        k (int, optional): Only return the k best derivations.
+
+    Returns:
+        dict: The response, with the derivations as dictionaries.
+
+    Example:
+    >>> parse_request("fr", "Un chat dort", {"mode": "best"})["weight"]
+    3.24
+    """
+    ccg = _GRAMMARS[name]
+    if k is not None:
+        options = {key: value for key, value in options.items() if key != "mode"}
+        parses = list(CCGCKYParser(ccg, sentence, mode="forest", **options).kbest(k))
+        weight = parses[0].weight if parses else 1.0
+    else:
+        parses, weight = CCGCKYParser(ccg, sentence, **options)
+    return {"ok": True, "parses": [parse.to_dict() for parse in parses], "weight": weight}
+
+
+class CCGServer:
+    """
+    A parsing service for a set of grammars.
+
+    Requests are parsed on a process pool whose workers hold all the
+    grammars. Each request has a deadline: when it expires, the client gets
+    an error, and the request is cancelled if it was still waiting for a
+    worker. A request a worker already started cannot be interrupted; it
+    keeps the worker busy until it ends.
+
+    Attributes:
+    - grammars (dict): The grammars, by name.
+    - timeout (float): The default deadline of the requests, in seconds.
+    - pool (ProcessPoolExecutor): The pool parsing the requests.
+
+    Methods:
+    - handle(request): Answer a request.
+    - serve(host, port, path): Start listening for requests.
+    - close(): Shut the pool down.
+
+    Example:
+    >>> server = CCGServer({"fr": GRAMMAR})
+    >>> await server.handle({"grammar": "fr", "sentence": "Un chat dort"})
+    {'ok': True, 'parses': [...], 'weight': 3.24}
+    """
+
+    def __init__(self, grammars, workers=None, timeout=10.0):
+        """
+        Initialize a CCGServer, loading its grammars and starting its pool.
+
+        Args:
+        - grammars (dict): The grammars, by name, as CCGrammar objects or as
+                           grammar sources.
+        - workers (int, optional): The number of processes (default is the
+                                   number of CPUs).
+        - timeout (float, optional): The default deadline of the requests,
+                                     in seconds (default is 10).
+
+        Raises:
+        - ValueError: If there is no grammar or the timeout is not positive.
+        """
+        if not grammars:
+            raise ValueError("No grammar to serve")
+        if timeout <= 0:
+            raise ValueError(f"Invalid timeout: {timeout}")
+        self.grammars = {name: CCGrammar(ccg) if isinstance(ccg, str) else ccg
+                         for name, ccg in grammars.items()}
+        self.timeout = timeout
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                        initargs=(self.grammars,))
+
+    async def handle(self, request):
+        """
+        Answer a request.
+
+        Args:
+        - request (dict): The request.
+
+        Returns:
+        dict: The response.
+
+        Example:
+        >>> await server.handle({"grammar": "en", "sentence": "John"})
+        {'ok': False, 'error': 'Unknown grammar: en'}
+        """
+        response = await self._answer(request)
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def _answer(self, request):
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "A request must be a JSON object"}
+        name, sentence = request.get("grammar"), request.get("sentence")
+        if name not in self.grammars:
+            return {"ok": False, "error": f"Unknown grammar: {name}"}
+        if not isinstance(sentence, str):
+            return {"ok": False, "error": "Missing sentence"}
+        options = {key: request[key] for key in OPTIONS if key in request}
+        if options.get("mode", "all") not in ("all", "best"):
+            return {"ok": False, "error": f"Unknown parsing mode: {options['mode']}"}
+        k = request.get("k")
+        if k is not None and (not isinstance(k, int) or k < 1):
+            return {"ok": False, "error": f"Invalid number of derivations: {k}"}
+        timeout = request.get("timeout", self.timeout)
+        if isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0:
+            return {"ok": False, "error": f"Invalid timeout: {timeout}"}
+
+        try:
+            future = self.pool.submit(parse_request, name, sentence, options, k)
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            return {"ok": False, "error": f"Timeout after {timeout} seconds"}
+        except (TokenError, SyntaxError, ValueError, TypeError) as error:
+            return {"ok": False, "error": str(error)}
+        except Exception as error:
+            # A crashed worker (BrokenProcessPool), a too deep or too large
+            # parse: the client still gets an answer.
+            return {"ok": False, "error": f"{type(error).__name__}: {error}"}
+
+    async def _client(self, reader, writer):
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as error:
+                    response = {"ok": False, "error": f"Invalid JSON: {error}"}
+                else:
+                    response = await self.handle(request)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, path=None):
+        """
+        Start listening for requests.
+
+        Args:
+        - host (str, optional): The address to listen on (default is
+                                localhost).
+        - port (int, optional): The TCP port (default is 8765; 0 picks a
+                                free port).
+        - path (str, optional): The path of a Unix socket, listened on
+                                instead of the TCP port.
+
+        Returns:
+        asyncio.Server: The server, already listening.
+
+        Example:
+        >>> server = await CCGServer({"fr": GRAMMAR}).serve(path="/tmp/ccg.sock")
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self._client, path=path)
+        return await asyncio.start_server(self._client, host, port)
+
+    def close(self):
+        """
+        Shut the pool down, cancelling the requests that did not start.
+        """
+        self.pool.shutdown(cancel_futures=True)
+
+
+def run_server(grammars, host="127.0.0.1", port=8765, path=None, workers=None,
+               timeout=10.0):
+    """
+    Run a parsing service until it is interrupted.
+
+    Args:
+        grammars (dict): The grammars, by name, as CCGrammar objects or as
+                         grammar sources.
+        host (str, optional): The address to listen on (default is
+                              localhost).
+        port (int, optional): The TCP port (default is 8765).
+        path (str, optional): The path of a Unix socket, listened on instead
+                              of the TCP port.
+        workers (int, optional): The number of processes (default is the
+                                 number of CPUs).
+        timeout (float, optional): The default deadline of the requests, in
+                                   seconds (default is 10).
+
+    Example:
+    >>> run_server({"fr": GRAMMAR}, port=8765)
+    """
+    service = CCGServer(grammars, workers, timeout)
+
+    async def main():
+        server = await service.serve(host, port, path)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(main())
+    finally:
+        service.close()
@@ -8,19 +8,64 @@ It includes classes for CCG types, type unification, type variables,
 atomic types, composite types, annotations, and type operations.
 
 Classes:
+- CCGTypeFactory: The metaclass of CCG types, which interns them so that
+                  structurally equal types are the same object.
 - CCGType: Represents CCG types and provides methods for type unification.
 - CCGTypeVar: Represents a CCG type variable.
 - CCGTypeAtomicVar: Represents an atomic CCG type with a variable.
 - CCGTypeAtomic: Represents an atomic CCG type.
 - CCGTypeComposite: Represents a composite CCG type.
 - CCGTypeAnnotation: Represents a CCG type with an annotation.
+- CCGUnifier: A unification engine binding type variables in place, with a
+              trail to undo bindings.
 
 The module aims to assist in working with CCG types and type operations
 in natural language understanding and parsing tasks.
 """
+from itertools import count
+from weakref import WeakValueDictionary
 
 
-class CCGType:
+class CCGTypeFactory(type):
+    """
+    The metaclass of CCG types, which makes them hash-consed.
+
+    Building a type looks up a table of the types alive, keyed by the class
+    and the arguments of the type, and returns the existing object if there
+    is one. Since the components of a type are themselves interned,
+    structurally equal types are the same object: equality is identity, and
+    the hash of a type, computed once from the hashes of its components, is
+    constant time. Every type also gets an integer `uid`, unique for the
+    lifetime of the process, and a `ground` flag telling whether it is free
+    of variables.
+
+    The table holds weak references, so types that are no longer used are
+    freed as usual.
+
+    Example:
+    >>> t1 = CCGTypeComposite(True, CCGTypeAtomic("NP"), CCGTypeAtomic("N"))
+    >>> t2 = CCGTypeComposite(1, CCGTypeAtomic("NP"), CCGTypeAtomic("N"))
+    >>> print(t1 is t2, t1.uid == t2.uid)
+    True True
+    """
+    table = WeakValueDictionary()
+    uids = count()
+
+    def __call__(cls, *args, **kwargs):
+        key = cls.intern_key(*args, **kwargs)
+        found = CCGTypeFactory.table.get((cls, key))
+        if found is None:
+            found = super().__call__(*args, **kwargs)
+            found.args = key
+            found.uid = next(CCGTypeFactory.uids)
+            found.ground = not cls.variable and all(
+                arg.ground for arg in key if isinstance(arg, CCGType))
+            found.hashed = hash((cls.__name__,) + key)
+            CCGTypeFactory.table[(cls, key)] = found
+        return found
+
+
+class CCGType(metaclass=CCGTypeFactory):
     """
     Represents a Combinatory Categorial Grammar (CCG) type for
     semantic composition.
@@ -28,9 +73,19 @@ class CCGType:
     This class provides a representation of CCG types and methods for
     type unification.
 
+    Types are interned by their metaclass (see `CCGTypeFactory`): building
+    a type equal to an existing one returns the existing object, so types
+    compare by identity and must never be mutated. Their string form is
+    computed once and cached.
+
     Class Attributes:
     - count (int): A class-level counter used for generating fresh
                     variable names.
+    - variable (bool): Whether the instances of the class are variables.
+
+    Attributes:
+    - uid (int): A unique integer id of the type.
+    - ground (bool): Whether the type does not contain any variable.
 
     Methods:
     - `fresh(var)`: Generate a fresh variable name based on the input variable.
@@ -38,6 +93,9 @@ class CCGType:
                  variable names.
     - `unify(left, right, sigma)`: Attempt to unify two CCG types and update
                                     a type substitution.
+    - `canonical()`: Return the type with its variables renamed in order of
+                     first occurrence, so alpha-equivalent types compare
+                     equal.
 
     Args:
     - left (CCGType): The left type for unification.
@@ -57,6 +115,41 @@ class CCGType:
     "X_0"
     """
     count = -1
+    variable = False
+    shown = None
+    canonical_form = None
+    # The type without annotations, cached by `CCGCKYParser.erase_annotations`.
+    erased_form = None
+
+    @classmethod
+    def intern_key(cls, name):
+        """
+        Return the key of a type in the table of interned types, from the
+        arguments of its constructor.
+
+        Args:
+        - name (str): The name of the type.
+
+        Returns:
+        tuple: The key of the type.
+        """
+        return (name,)
+
+    def __eq__(self, other):
+        """
+        Equality of interned types is identity.
+        """
+        return self is other
+
+    def __hash__(self):
+        return self.hashed
+
+    def __reduce__(self):
+        """
+        Pickle a type by its constructor arguments, so that it is interned
+        again when it is unpickled.
+        """
+        return (type(self), self.args)
 
     @classmethod
     def fresh(cls, var):
@@ -168,6 +261,35 @@ class CCGType:
 
         return result
 
+    def canonical(self):
+        """
+        Return the type with its variables renamed in order of first
+        occurrence.
+
+        Two types that only differ by the names of their variables have the
+        same canonical form, which makes it usable as a key for deduplicating
+        categories (e.g. in the cells of a CKY chart).
+
+        Returns:
+        CCGType: The canonical form of the type (the type itself if it does
+                 not contain any variable).
+
+        Example:
+        >>> t1 = CCGTypeComposite(True, CCGTypeVar("T_1"), CCGTypeAtomic("N"))
+        >>> t2 = CCGTypeComposite(True, CCGTypeVar("T_7"), CCGTypeAtomic("N"))
+        >>> print(t1.canonical() == t2.canonical())
+        True
+        """
+        if self.ground:
+            return self
+        if self.canonical_form is None:
+            sigma = {}
+            for var in self.variables():
+                if var.name not in sigma:
+                    sigma[var.name] = type(var)(f"%{len(sigma)}")
+            self.canonical_form = self.replace(sigma)
+        return self.canonical_form
+
 
 class CCGTypeVar(CCGType):
     """
@@ -183,6 +305,8 @@ class CCGTypeVar(CCGType):
     >>> type_variable = CCGTypeVar("X")
     """
 
+    variable = True
+
     def __init__(self, name):
         """
         Initialize a CCGTypeVar object with a type variable.
@@ -195,6 +319,15 @@ class CCGTypeVar(CCGType):
         """
         self.name = name
 
+    def variables(self):
+        """
+        Return the list of the variables occurring in the type.
+
+        Returns:
+        list: A list containing the CCGTypeVar itself.
+        """
+        return [self]
+
     def show(self):
         """
         Return a string representation of the CCGTypeVar.
@@ -206,7 +339,9 @@ class CCGTypeVar(CCGType):
         >>> type_variable = CCGTypeVar("X")
         >>> print(type_variable.show())
         """
-        return f"${self.name}"
+        if self.shown is None:
+            self.shown = f"${self.name}"
+        return self.shown
 
     def expand(self, name, ccgtype):
         """
@@ -268,6 +403,8 @@ class CCGTypeAtomicVar(CCGType):
     >>> atomic_var_type = CCGTypeAtomicVar("X")
     """
 
+    variable = True
+
     def __init__(self, name):
         """
         Initialize a CCGTypeAtomicVar object with a type variable.
@@ -280,6 +417,15 @@ class CCGTypeAtomicVar(CCGType):
         """
         self.name = name
 
+    def variables(self):
+        """
+        Return the list of the variables occurring in the type.
+
+        Returns:
+        list: A list containing the CCGTypeAtomicVar itself.
+        """
+        return [self]
+
     def show(self):
         """
         Return a string representation of the CCGTypeAtomicVar.
@@ -292,7 +438,9 @@ class CCGTypeAtomicVar(CCGType):
         >>> atomic_var_type = CCGTypeAtomicVar("X")
         >>> print(atomic_var_type.show())
         """
-        return f"@{self.name}"
+        if self.shown is None:
+            self.shown = f"@{self.name}"
+        return self.shown
 
     def expand(self, name, ccgtype):
         """
@@ -362,6 +510,15 @@ class CCGTypeAtomic(CCGType):
         """
         self.name = name
 
+    def variables(self):
+        """
+        Return the list of the variables occurring in the type.
+
+        Returns:
+        list: An empty list, atomic types do not contain variables.
+        """
+        return []
+
     def show(self):
         """
         Return a string representation of the CCGTypeAtomic.
@@ -458,6 +615,25 @@ class CCGTypeComposite(CCGType):
         self.left = left
         self.right = right
 
+    @classmethod
+    def intern_key(cls, direction, left, right):
+        """
+        Return the key of a composite type; directions are compared as
+        booleans.
+        """
+        return (bool(direction), left, right)
+
+    def variables(self):
+        """
+        Return the list of the variables occurring in the type, from left to
+        right.
+
+        Returns:
+        list: The variables of the left component followed by those of the
+              right component.
+        """
+        return self.left.variables() + self.right.variables()
+
     def show(self):
         """
         Return a string representation of the CCGTypeComposite.
@@ -470,8 +646,10 @@ class CCGTypeComposite(CCGType):
                                               CCGTypeAtomic("N"))
         >>> print(ccg_type.show())
         """
-        slash = "/" if self.dir else "\\"
-        return f"({self.left.show()} {slash} {self.right.show()})"
+        if self.shown is None:
+            slash = "/" if self.dir else "\\"
+            self.shown = f"({self.left.show()} {slash} {self.right.show()})"
+        return self.shown
 
     def expand(self, name, ccgtype):
         """
@@ -557,6 +735,22 @@ class CCGTypeAnnotation(CCGType):
         self.type = ccgtype
         self.annot = annot
 
+    @classmethod
+    def intern_key(cls, ccgtype, annot):
+        """
+        Return the key of an annotated type.
+        """
+        return (ccgtype, annot)
+
+    def variables(self):
+        """
+        Return the list of the variables occurring in the type.
+
+        Returns:
+        list: The variables of the base type.
+        """
+        return self.type.variables()
+
     def show(self):
         """
         Return a string representation of the CCGTypeAnnotation.
@@ -568,7 +762,9 @@ class CCGTypeAnnotation(CCGType):
         >>> ccg_type = CCGTypeAnnotation(CCGTypeAtomic("NP"), "SBJ")
         >>> print(ccg_type.show())
         """
-        return f"{self.type.show()}[{self.annot}]"
+        if self.shown is None:
+            self.shown = f"{self.type.show()}[{self.annot}]"
+        return self.shown
 
     def expand(self, name, ccgtype):
         """
@@ -613,3 +809,230 @@ class CCGTypeAnnotation(CCGType):
         >>> replaced_type = ccg_type.replace(substitution)
         """
         return CCGTypeAnnotation(self.type.replace(sigma), self.annot)
+
+
+class CCGUnifier:
+    """
+    A unification engine binding type variables in place.
+
+    Variables are bound by name in a union-find forest: a bound variable
+    points to the type it was unified with, which may be another variable,
+    and `deref` follows these links, compressing them on the way. Every
+    change is recorded on a trail, so the bindings made since a `mark` can
+    be undone. A failed unification undoes its own partial bindings, which
+    leaves the unifier as it was before the call.
+
+    Unlike `CCGType.unify`, types are never copied while unifying: the
+    bindings are only applied when the result is built with `resolve`. The
+    cases are those of `CCGType.unify` (annotations are ignored against
+    types without annotation, atomic variables only bind atomic types),
+    with two differences: a variable always unifies with itself, and a
+    variable does not unify with a type containing it (occurs check).
+
+    Attributes:
+    - bindings (dict): A dictionary mapping variable names to the types they
+                       are bound to.
+    - trail (list): The changes made to the bindings, as pairs of a variable
+                    name and its previous binding (None if it was unbound).
+
+    Methods:
+    - mark(): Return the current position of the trail.
+    - undo(mark): Undo the bindings made since a mark.
+    - deref(ccgtype): Return the type a variable is bound to, transitively.
+    - unify(left, right): Unify two types, binding their variables.
+    - resolve(ccgtype): Return a type with all its bound variables replaced.
+
+    Example:
+    >>> unifier = CCGUnifier()
+    >>> pattern = CCGTypeComposite(1, CCGTypeVar("X"), CCGTypeVar("Y"))
+    >>> data = CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAtomic("NP"))
+    >>> print(unifier.unify(pattern, data))
+    True
+    >>> print(unifier.resolve(CCGTypeVar("X")).show())
+    S
+    """
+
+    def __init__(self):
+        """
+        Initialize a CCGUnifier without bindings.
+        """
+        self.bindings = {}
+        self.trail = []
+
+    def mark(self):
+        """
+        Return the current position of the trail.
+
+        Returns:
+        int: A mark to pass to `undo`.
+        """
+        return len(self.trail)
+
+    def undo(self, mark):
+        """
+        Undo the bindings made since a mark.
+
+        Args:
+        - mark (int): A mark returned by `mark`.
+        """
+        while len(self.trail) > mark:
+            name, previous = self.trail.pop()
+            if previous is None:
+                del self.bindings[name]
+            else:
+                self.bindings[name] = previous
+
+    def bind(self, name, ccgtype):
+        """
+        Bind a variable, recording its previous binding on the trail.
+
+        Args:
+        - name (str): The name of the variable.
+        - ccgtype (CCGType): The type to bind it to.
+        """
+        self.trail.append((name, self.bindings.get(name)))
+        self.bindings[name] = ccgtype
+
+    def deref(self, ccgtype):
+        """
+        Return the type a variable is bound to, transitively.
+
+        The links followed are compressed, so that the next lookup of the
+        variables on the way takes a single step.
+
+        Args:
+        - ccgtype (CCGType): A type.
+
+        Returns:
+        CCGType: The type itself if it is not a bound variable, or the end of
+                 its chain of bindings.
+        """
+        path = []
+        while ccgtype.variable and ccgtype.name in self.bindings:
+            path.append(ccgtype.name)
+            ccgtype = self.bindings[ccgtype.name]
+        for name in path[:-1]:
+            self.bind(name, ccgtype)
+        return ccgtype
+
+    def occurs(self, var, ccgtype):
+        """
+        Check whether a variable occurs in a type, through the bindings.
+
+        Args:
+        - var (CCGType): A variable.
+        - ccgtype (CCGType): A type.
+
+        Returns:
+        bool: True if the variable occurs in the type.
+        """
+        if ccgtype.ground:
+            return False
+        ccgtype = self.deref(ccgtype)
+        if ccgtype.variable:
+            return ccgtype.name == var.name
+        if isinstance(ccgtype, CCGTypeComposite):
+            return self.occurs(var, ccgtype.left) or self.occurs(var, ccgtype.right)
+        if isinstance(ccgtype, CCGTypeAnnotation):
+            return self.occurs(var, ccgtype.type)
+        return False
+
+    def unify(self, left, right):
+        """
+        Unify two types, binding their variables.
+
+        Args:
+        - left (CCGType): The left type for unification.
+        - right (CCGType): The right type for unification.
+
+        Returns:
+        bool: True if unification is successful; False otherwise, in which
+              case the bindings are left unchanged.
+
+        Example:
+        >>> unifier.unify(CCGTypeVar("X"), CCGTypeAtomic("NP"))
+        True
+        """
+        mark = self.mark()
+        if self.unify_terms(left, right):
+            return True
+        self.undo(mark)
+        return False
+
+    def unify_terms(self, left, right):
+        """
+        Unify two types, leaving the bindings made on failure.
+        """
+        left = self.deref(left)
+        right = self.deref(right)
+        if left is right:
+            return True
+
+        match (left, right):
+
+            case (CCGTypeVar(), _):
+                return self.bind_checked(left, right)
+
+            case (_, CCGTypeVar()):
+                return self.bind_checked(right, left)
+
+            case (CCGTypeAtomicVar(name=name), CCGTypeAtomicVar() | CCGTypeAtomic()):
+                self.bind(name, right)
+                return True
+
+            case (CCGTypeAtomic(), CCGTypeAtomicVar(name=name)):
+                self.bind(name, left)
+                return True
+
+            case (CCGTypeAnnotation(type=CCGTypeAtomic()), CCGTypeAtomicVar(name=name)):
+                self.bind(name, left)
+                return True
+
+            case (CCGTypeAnnotation(type=t1, annot=annot1), CCGTypeAnnotation(type=t2, annot=annot2)):
+                return annot1 == annot2 and self.unify_terms(t1, t2)
+
+            case (CCGTypeAnnotation(type=t1), any_type):
+                return self.unify_terms(t1, any_type)
+
+            case (any_type, CCGTypeAnnotation(type=t2)):
+                return self.unify_terms(any_type, t2)
+
+            case (CCGTypeComposite(dir=dir1, left=left1, right=right1), CCGTypeComposite(dir=dir2, left=left2, right=right2)):
+                return (bool(dir1) == bool(dir2) and self.unify_terms(left1, left2)
+                        and self.unify_terms(right1, right2))
+
+        return False
+
+    def bind_checked(self, var, ccgtype):
+        """
+        Bind a type variable, unless it occurs in the type.
+        """
+        if self.occurs(var, ccgtype):
+            return False
+        self.bind(var.name, ccgtype)
+        return True
+
+    def resolve(self, ccgtype):
+        """
+        Return a type with all its bound variables replaced.
+
+        Args:
+        - ccgtype (CCGType): A type.
+
+        Returns:
+        CCGType: The type where every bound variable is replaced by the
+                 resolution of its binding.
+
+        Example:
+        >>> unifier.resolve(CCGTypeComposite(1, CCGTypeVar("X"), CCGTypeAtomic("N"))).show()
+        '(NP / N)'
+        """
+        if ccgtype.ground:
+            return ccgtype
+        ccgtype = self.deref(ccgtype)
+        if isinstance(ccgtype, CCGTypeComposite):
+            return CCGTypeComposite(ccgtype.dir, self.resolve(ccgtype.left),
+                                    self.resolve(ccgtype.right))
+        if isinstance(ccgtype, CCGTypeAnnotation):
+            return CCGTypeAnnotation(self.resolve(ccgtype.type), ccgtype.annot)
+        return ccgtype
@@ -10,6 +10,8 @@ Classes:
                 methods for parsing and processing CCG grammar definitions.
 - `Judgement`: Represents a judgment in a CCG, including expression, type,
                 semantics, and derivation information.
+- `SemanticThunk`: Represents the semantics of a judgement before it is
+                   computed.
 - `Alias`: Represents an alias definition in a CCG, including the key and
             its associated value.
 - `Weight`: Represents a combinator weight in a CCG, associated with premises
@@ -31,12 +33,13 @@ Example:
     >>> print(grammar.terminal)
     >>> print(grammar.show())
 """
+import hashlib
 from functools import reduce
-from itertools import product
 from RDParser import RDParser as rd
+from CCGCaches import LRUCache
 from CCGExprs import CCGExprString
 from CCGTypes import (CCGType, CCGTypeVar, CCGTypeAtomic, CCGTypeComposite,
-                      CCGTypeAnnotation)
+                      CCGTypeAnnotation, CCGUnifier)
 from CCGLambdas import (LambdaTermVar, LambdaTermBinop, LambdaTermPredicate,
                         LambdaTermApplication, LambdaTermLambda,
                         LambdaTermExists)
@@ -119,6 +122,55 @@ WeightParser = rd.act(
 )
 
 
+class SemanticThunk:
+    """
+    Represents the semantics of a judgement before it is computed.
+
+    A thunk holds a semantic function and the judgements it applies to; the
+    function only runs when the semantics is read (see `Judgement.sem`),
+    and its result is kept. Judgements of a chart that never take part in an
+    extracted derivation thus never build lambda terms.
+
+    Attributes:
+    - function (callable): The semantic function, taking a list of
+                           judgements.
+    - data (list of Judgement): The judgements the function applies to.
+
+    Methods:
+    - force(): Compute the semantics, once.
+
+    Example:
+    >>> thunk = SemanticThunk(ApplicationRight.sem, [left, right])
+    >>> print(thunk.force().show())
+    """
+    __slots__ = ("function", "data", "value")
+
+    def __init__(self, function, data):
+        """
+        Initialize a SemanticThunk.
+
+        Args:
+        - function (callable): The semantic function.
+        - data (list of Judgement): The judgements the function applies to.
+        """
+        self.function = function
+        self.data = data
+        self.value = None
+
+    def force(self):
+        """
+        Compute the semantics, once.
+
+        Returns:
+        Optional[LambdaTerm]: The result of the semantic function on the
+                              data.
+        """
+        if self.function is not None:
+            self.value = self.function(self.data)
+            self.function = self.data = None
+        return self.value
+
+
 class Judgement:
     """
     Represents a judgment in a Combinatory Categorial Grammar (CCG).
@@ -133,12 +185,16 @@ class Judgement:
     - expr (CCGExprString): The expression of the judgment.
     - type (CCGTypeParser): The type of the judgment.
     - cpt (int): A counter for the judgment.
+    - weight (int): The weight of a lexical entry, a prior on its category
+                    (see `CCGCKYParser.lexical_cell`).
     - sem (Optional[CCGTypeParser]): The semantics associated with the
-                                     judgment.
+                                     judgment; a `SemanticThunk` stored here
+                                     is forced when the semantics is read.
     - derivation (list): Information about the derivation of the judgment.
 
     Methods:
     - show(printsem=False): Generate a string representation of the judgment.
+    - adopt(other): Take the derivation and semantics of another judgment.
     - expand(name, type): Expand the judgment with a new name and type.
     - match(data, sigma): Match the judgment with another judgment.
     - replace(sigma): Replace values in the judgment based on a substitution.
@@ -179,9 +235,31 @@ class Judgement:
         self.expr = expr
         self.type = type_judg
         self.cpt = 0
+        self.weight = weight
         self.sem = sem
         self.derivation = derivation if derivation else [{"derivation": []}]
 
+    @property
+    def sem(self):
+        if isinstance(self._sem, SemanticThunk):
+            self._sem = self._sem.force()
+        return self._sem
+
+    @sem.setter
+    def sem(self, sem):
+        self._sem = sem
+
+    def __eq__(self, other):
+        """
+        Structural equality: two judgements are equal if they have equal
+        expressions and types, whatever their semantics and derivations.
+        """
+        return (isinstance(other, Judgement)
+                and self.expr == other.expr and self.type == other.type)
+
+    def __hash__(self):
+        return hash((self.expr, self.type))
+
     def show(self, printsem=False):
         """
         Generate a string representation of the judgment.
@@ -215,7 +293,8 @@ class Judgement:
                                            CCGTypeParser("new_type"))
         """
         ex = self.type.expand(name, type_judg)
-        return Judgement(self.expr, ex, sem=self.sem, derivation=self.derivation)
+        return Judgement(self.expr, ex, sem=self._sem, derivation=self.derivation,
+                         weight=self.weight)
 
     def match(self, data, sigma):
         """
@@ -257,7 +336,7 @@ class Judgement:
         exp = self.expr.replace(sigma)
         typ = self.type.replace(sigma)
         der = self.derivation
-        return Judgement(exp, typ, sem=self.sem, derivation=der)
+        return Judgement(exp, typ, sem=self._sem, derivation=der)
 
     def deriving(self, combinator, sigma, judmts, sem=None, combinator_weight=0):
         """
@@ -275,20 +354,38 @@ class Judgement:
         Judgement: The current Judgement object with updated derivation
                     and semantics.
 
+        The derivation holds a single backpointer to the input judgements:
+        the alternative derivations of the inputs are kept by the inputs
+        themselves and are only expanded when the derivations are
+        reconstructed.
+
         Example:
         >>> new_judgments = judgment.deriving("combinator", sigma,
                                             [judgment1, judgment2],
                                             sem=CCGTypeParser("new_semantics"))
         """
-        self.derivation = []
-        derivations_list = [judgment.derivation for judgment in judmts]
-        for derivations in product(*derivations_list):
-            pst = [combinator, sigma, judmts]
-            der = {"derivation": pst}
-            self.derivation.append(der)
+        self.derivation = [{"derivation": [combinator, sigma, judmts]}]
         self.sem = sem
         return self
 
+    def adopt(self, other):
+        """
+        Take the derivation and semantics of another judgment, without
+        computing the semantics.
+
+        Args:
+        - other (Judgement): The judgment whose derivation is taken.
+
+        Returns:
+        Judgement: The current Judgement object.
+
+        Example:
+        >>> judgment.adopt(better_judgment)
+        """
+        self.derivation = other.derivation
+        self._sem = other._sem
+        return self
+
 
 class Alias:
     """
@@ -443,6 +540,11 @@ class CCGrammar:
     - rules (dict): A dictionary of rules for type judgments.
     - weights (dict): A dictionary of combinator weights.
     - terminal (str): The terminal axiom.
+    - combination_cache (LRUCache): The results of the combinations of
+                                    ground categories already computed while
+                                    parsing with the grammar.
+    - fingerprint (str): A digest of the definition of the grammar, which
+                         identifies it in caches shared by several grammars.
 
     Methods:
     - parse(grammar_str): Parse a CCGrammar definition string and return a
@@ -458,6 +560,9 @@ class CCGrammar:
     - process_weight(weight): Process and store a weight definition from
                                 the grammar.
     - expand_aliases(): Expand aliases in the grammar.
+    - functors(): Return the functor categories derivable in the grammar.
+    - raising_targets(name, ccgtype): Return the categories to which a
+                                      category may usefully be raised.
     - show(): Generate a string representation of the CCGrammar object.
     """
     newLines = rd.lst1(rd.str("\n"))
@@ -503,13 +608,16 @@ class CCGrammar:
             return res[0]
         raise ParseError(grammar_str)
 
-    def __init__(self, str_gram):
+    def __init__(self, str_gram, cache_size=4096):
         """
         Initialize a CCGrammar object from a string representation of the
         grammar.
 
         Args:
         - str_gram (str): A string containing the CCGrammar definition.
+        - cache_size (int, optional): The maximal number of combinations kept
+                                      in the combination cache, 0 to disable
+                                      it (default is 4096).
 
         This method parses the provided string representation of the grammar
         and initializes the CCGrammar object with axioms, aliases, rules,
@@ -528,6 +636,10 @@ class CCGrammar:
         self.rules = {}
         self.weights = {}
         self.terminal = None
+        self.combination_cache = LRUCache(cache_size)
+        self.fingerprint = hashlib.sha1(str_gram.encode("utf-8")).hexdigest()
+        self._functors = None
+        self._raising = {}
 
         for stmt in self.parse(str_gram):
             if stmt is None:
@@ -631,6 +743,121 @@ class CCGrammar:
             for (weik, weivs) in self.weights.items():
                 self.weights[weik] = [w.expand(alv.key, alv.value) for w in weivs]
 
+    def functors(self):
+        """
+        Return the functor categories derivable in the grammar.
+
+        The functors are the composite subterms of the lexical categories,
+        closed under forward and backward composition, and under the type
+        raising of their atomic subterms to the categories the functors can
+        consume (see `raising_targets`). This over-approximates the functors
+        found in charts, as it ignores which categories are adjacent in the
+        input: a functor missing from the set is never derived. The set is
+        computed on first use, once the grammar is complete.
+
+        Returns:
+        set or None: The functors, as triples (direction, result, argument)
+                     of ground categories, or None if a lexical category
+                     holds variables, which may stand for any functor.
+
+        Example:
+        >>> grammar = CCGrammar(":- S, NP\\nJohn => NP\\nsleeps => S\\\\NP")
+        >>> grammar.functors()
+        {(0, CCGTypeAtomic("S"), CCGTypeAtomic("NP"))}
+        """
+        if self._functors is not None:
+            return self._functors or None
+        types = [entry.type for entries in self.rules.values() for entry in entries]
+        if not all(ccgtype.ground for ccgtype in types):
+            self._functors = False
+            return None
+
+        functors, atoms, stack = set(), set(), list(types)
+        while stack:
+            ccgtype = stack.pop()
+            if isinstance(ccgtype, CCGTypeComposite):
+                functors.add((ccgtype.dir, ccgtype.left, ccgtype.right))
+                stack.extend((ccgtype.left, ccgtype.right))
+            elif isinstance(ccgtype, CCGTypeAnnotation) and isinstance(ccgtype.type, CCGTypeComposite):
+                stack.append(ccgtype.type)
+            else:
+                atoms.add(ccgtype)
+
+        # CCGCKYParser imports this module, it can only be imported here.
+        from CCGCKYParser import erase_annotations
+
+        def unify(left, right):
+            return CCGUnifier().unify(left, right)
+
+        # Categories that unify are equal once their annotations are erased,
+        # so functors are bucketed by their erased result and argument.
+        by_result, by_argument, raisable = {}, {}, {}
+        for atom in atoms:
+            # Raising binds an atomic variable, which drops the annotation.
+            if isinstance(atom, CCGTypeAnnotation):
+                atom = atom.type
+            raisable.setdefault(erase_annotations(atom), []).append(atom)
+        known, pending = set(), list(functors)
+        while pending:
+            functor = pending.pop()
+            if functor in known:
+                continue
+            known.add(functor)
+            direction, result, argument = functor
+            by_result.setdefault((direction, erase_annotations(result)), []).append(functor)
+            by_argument.setdefault((direction, erase_annotations(argument)), []).append(functor)
+            # Forward composition: A/B and B/C make A/C; backward
+            # composition: B\C and A\B make A\C.
+            for _, other_result, other_argument in by_result.get((direction, erase_annotations(argument)), []):
+                if unify(argument, other_result):
+                    pending.append((direction, result, other_argument))
+            for _, other_result, other_argument in by_argument.get((direction, erase_annotations(result)), []):
+                if unify(other_argument, result):
+                    pending.append((direction, other_result, argument))
+            # Type raising: X becomes T\(T/X) if T/X is a functor, and
+            # T/(T\X) if T\X is one.
+            for atom in raisable.get(erase_annotations(argument), []):
+                if unify(argument, atom):
+                    pending.append((1 - direction, result, CCGTypeComposite(direction, result, atom)))
+        functors = known
+        self._functors = functors
+        return functors
+
+    def raising_targets(self, name, ccgtype):
+        """
+        Return the categories to which a category may usefully be raised.
+
+        Raising X to T\\(T/X) (combinator "T<") is only useful if some
+        functor T/X may take X as argument; raising X to T/(T\\X)
+        (combinator "T>") if some functor T\\X may. The targets are the
+        results T of those functors (see `functors`).
+
+        Args:
+        - name (str): The name of the type-raising combinator, "T<" or "T>".
+        - ccgtype (CCGType): The category to raise.
+
+        Returns:
+        list or None: The target categories, in a fixed order, or None if
+                      the functors of the grammar are not known, in which
+                      case the category may be raised to any category.
+
+        Example:
+        >>> grammar.raising_targets("T<", CCGTypeAtomic("NP"))
+        [CCGTypeAtomic("S")]
+        """
+        functors = self.functors()
+        if functors is None:
+            return None
+        key = (name, ccgtype)
+        if key not in self._raising:
+            direction = 1 if name == "T<" else 0
+            targets = {}
+            for functor_dir, result, argument in sorted(functors, key=lambda f: (f[1].show(), f[2].show())):
+                if functor_dir == direction and CCGUnifier().unify(argument, ccgtype):
+                    targets[result] = True
+            self._raising[key] = list(targets)
+        return self._raising[key]
+
     def show(self):
         """
         Generate a string representation of the CCGrammar object.
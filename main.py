@@ -17,7 +17,9 @@ Example usage:
 run(TXT_SAMPLE, GRAMMAR)
 """
 import time
+from itertools import takewhile
 from CCGCKYParser import CCGCKYParser
+from CCGRecognizer import CCGRecognizer
 from CCGrammar import CCGrammar
 from nltk.tree import Tree
 from random import randint, choice
@@ -305,8 +307,7 @@ def run_random(grammar):
                 for j in range(i):
                     txt_test += " " + choice(list(words))
                 for line in txt_test.splitlines():
-                    parses = CCGCKYParser(ccg, line, use_typer=False)
-                    if parses:
+                    if CCGRecognizer(ccg, line, use_typer=False):
                         if line not in mem:
                             f.write(line + "\n")
                             print(line)
@@ -346,12 +347,16 @@ def run(txt, grammar):
         # print("##########################################################")
         # print(f"# Parsing of: \"{sentence}\":")
         # print("##########################################################\n")
-        # Use the CCGCKYParser to parse the current sentence,
-        # setting 'use_typer' to False.
-        parses, maxweight = CCGCKYParser(ccg, sentence, use_typer=False)
+        # Use the CCGCKYParser to get the parse forest of the current
+        # sentence, setting 'use_typer' to False.
+        forest = CCGCKYParser(ccg, sentence, use_typer=False, mode="forest")
         onlymax = True
+        # Derivations are extracted best first, so only the top-weighted ones
+        # are built when 'onlymax' is set.
+        parses = forest.kbest()
         if onlymax:
-            parses = [parse for parse in parses if parse.weight == maxweight]
+            best = next(parses, None)
+            parses = [best] + list(takewhile(lambda parse: parse.weight == best.weight, parses)) if best else []
         cpt_n = 0
 
         if parses and word_test in sentence:
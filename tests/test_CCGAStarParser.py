@@ -0,0 +1,70 @@
+import unittest
+from CCGAStarParser import CCGAStarParser, split_bounds, type_atoms
+from CCGCKYParser import CCGCKYParser, TokenError
+from CCGrammar import CCGrammar
+from CCGTypes import CCGTypeAtomic, CCGTypeComposite, CCGTypeVar
+
+
+class TestCCGAStarParser(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        John => NP
+                        sleeps => S\\NP
+                        sees => (S\\NP)/NP
+                        Weight(">", N/N, N) = 2.0
+                        Weight("B>", NP/N, N/N) = 0.5''')
+
+    def test_best_parse(self):
+        for sentence in ["the big old cat sleeps", "John sees the big old big cat",
+                         "John sleeps", "the cat sees John"]:
+            for use_typer in (False, True):
+                parses, weight = CCGAStarParser(self.ccg, sentence, use_typer)
+                best, maxweight = CCGCKYParser(self.ccg, sentence, use_typer, mode="best")
+                self.assertEqual(weight, maxweight)
+                self.assertEqual(len(parses), 1)
+                self.assertEqual(parses[0].weight, maxweight)
+                self.assertEqual(parses[0].to_dict()["type"], "S")
+
+    def test_no_parse(self):
+        self.assertEqual(CCGAStarParser(self.ccg, "sleeps the cat"), ([], 1.0))
+
+    def test_stats(self):
+        stats = {}
+        CCGAStarParser(self.ccg, "John sees the big old big old cat", stats=stats)
+        chart = {}
+        CCGCKYParser(self.ccg, "John sees the big old big old cat", mode="best", stats=chart)
+        self.assertLessEqual(stats["items"], stats["popped"])
+        self.assertLessEqual(stats["popped"], stats["pushed"])
+        self.assertLess(stats["items"], chart["items"])
+
+    def test_invalid_input(self):
+        with self.assertRaises(TokenError):
+            CCGAStarParser(self.ccg, "the dog sleeps")
+        with self.assertRaises(SyntaxError):
+            CCGAStarParser(self.ccg, "")
+
+
+class TestSplitBounds(unittest.TestCase):
+
+    def test_type_atoms(self):
+        functor = CCGTypeComposite(1, CCGTypeAtomic("NP"), CCGTypeAtomic("N"))
+        self.assertEqual(type_atoms(functor), {"NP", "N"})
+        self.assertIsNone(type_atoms(CCGTypeComposite(1, CCGTypeVar("X"), CCGTypeAtomic("N"))))
+
+    def test_bounds(self):
+        ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        cat => N
+                        sleeps => S\\NP
+                        Weight(">", N/N, N) = 2.0
+                        Weight(">", NP/N, N) = 0.5''')
+        self.assertEqual(split_bounds(ccg, "the big cat sleeps".split()), [2.0, 2.0, 1.0])
+        self.assertEqual(split_bounds(ccg, "the big cat sleeps".split(), use_typer=True),
+                         [2.0, 2.0, 2.0])
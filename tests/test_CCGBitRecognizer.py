@@ -0,0 +1,56 @@
+import unittest
+from CCGBitRecognizer import BitRecognizer
+from CCGCKYParser import CCGCKYParser, TokenError
+from CCGCompiler import compile_grammar
+from CCGrammar import CCGrammar
+
+
+class TestBitRecognizer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        John => NP
+                        sleeps => S\\NP
+                        sees => (S\\NP)/NP''')
+        cls.recognizer = BitRecognizer(cls.ccg, compile_grammar(cls.ccg))
+
+    def test_recognize(self):
+        self.assertTrue(self.recognizer.recognize("the big old cat sleeps"))
+        self.assertFalse(self.recognizer.recognize("the cat"))
+        self.assertEqual(self.recognizer.recognize_batch(["John sleeps", "sleeps John"]),
+                         [True, False])
+
+    def test_agrees_with_parser(self):
+        for sentence in ["John sleeps", "the cat sees John", "John sees big",
+                         "big old cat", "John sees the old cat", "cat the sleeps",
+                         "John sees the big big big old cat", "the cat sleeps sees John"]:
+            parses, _ = CCGCKYParser(self.ccg, sentence)
+            self.assertEqual(self.recognizer.recognize(sentence), bool(parses))
+
+    def test_batch(self):
+        sentences = ["John sleeps", "the cat sees John", "sleeps John", "John sees the old cat",
+                     "the cat sleeps sees John", "the old cat sleeps"] * 10
+        self.assertEqual(self.recognizer.recognize_batch(sentences),
+                         [self.recognizer.recognize(sentence) for sentence in sentences])
+        self.assertEqual(self.recognizer.recognize_batch([]), [])
+
+    def test_invalid_input(self):
+        with self.assertRaises(TokenError):
+            self.recognizer.recognize("the dog sleeps")
+        with self.assertRaises(SyntaxError):
+            self.recognizer.recognize("")
+
+    def test_uncompiled_grammars(self):
+        with self.assertRaises(ValueError):
+            BitRecognizer(self.ccg, compile_grammar(self.ccg, max_categories=3))
+        ccg = CCGrammar(''':- S, NP
+                        John => NP
+                        and => ($X\\$X)/$X
+                        sleeps => S\\NP''')
+        with self.assertRaises(ValueError):
+            BitRecognizer(ccg, compile_grammar(ccg)).recognize("John and John sleeps")
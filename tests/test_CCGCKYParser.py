@@ -1,13 +1,17 @@
+import pickle
 import unittest
 from CCGCKYParser import (CCGCKYParser, TokenError, Inference,
-                          CKYDerivation, add_combinations,
+                          CKYDerivation, add_combinations, ChartCell,
+                          ParseForest, IncrementalParser, lexical_cell, result_size, raise_types, lexical_priors, index_key, combination_pairs, WILDCARD,
+                          normal_form_allows, composition_tag, count_derivations,
                           Judgement, CCGExprVar, CCGTypeComposite, CCGExprConcat,
                           CCGTypeVar, ApplicationLeft, ApplicationRight,
                           CompositionLeft, CompositionRight,
                           TypeRaisingLeft, TypeRaisingRight)
 from CCGrammar import CCGrammar
+from CCGCaches import LRUCache
 from CCGExprs import CCGExprString
-from CCGTypes import CCGTypeAtomic, CCGTypeAtomicVar
+from CCGTypes import CCGTypeAtomic, CCGTypeAtomicVar, CCGTypeAnnotation
 from CCGLambdas import LambdaTermLambda, LambdaTermApplication, LambdaTermVar
 from nltk.tree import Tree
 
@@ -22,8 +26,107 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(len(chart), 1)
         self.assertEqual(chart.pop().show(), '"eats John":(S \\ NP)')
 
+    def test_chart_cell_merges_categories(self):
+        cell = ChartCell()
+        left = Judgement(CCGExprString("eats"), CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAtomic("NP")))
+        right = Judgement(CCGExprString("John"), CCGTypeAtomic("NP"))
+        first = cell.add(ApplicationRight.match([left, right]))
+        second = cell.add(ApplicationRight.match([left, right]))
+
+        self.assertEqual(len(cell), 1)
+        self.assertIs(first, second)
+        self.assertEqual(len(first.derivation), 2)
+
+    def test_index_key(self):
+        path = ApplicationRight.index_paths()[0]
+        verb = CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAnnotation(CCGTypeAtomic("NP"), "Masc"))
+        self.assertEqual(index_key(verb, path), CCGTypeAtomic("NP"))
+        self.assertEqual(index_key(CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeVar("X")), path), WILDCARD)
+        self.assertEqual(index_key(CCGTypeVar("X"), path), WILDCARD)
+        self.assertIsNone(index_key(CCGTypeComposite(0, CCGTypeAtomic("S"), CCGTypeAtomic("NP")), path))
+        self.assertIsNone(index_key(CCGTypeAtomic("NP"), path))
+
+    def test_combination_pairs(self):
+        verb = Judgement(CCGExprString("eats"), CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAtomic("NP")))
+        noun = Judgement(CCGExprString("cat"), CCGTypeAtomic("N"))
+        name = Judgement(CCGExprString("John"), CCGTypeAtomic("NP"))
+        anything = Judgement(CCGExprString("it"), CCGTypeVar("X"))
+        lefts, rights = ChartCell([verb, noun]), ChartCell([noun, name, anything])
+
+        pairs = list(combination_pairs(ApplicationRight, lefts, rights))
+        self.assertCountEqual(pairs, [(verb, name), (verb, anything)])
+        self.assertEqual(len(list(combination_pairs(TypeRaisingRight, lefts, rights))), 6)
+
+    def test_chart_cell_prune(self):
+        def scored(name, score):
+            return Judgement(CCGExprString(name), CCGTypeAtomic(name),
+                             derivation=[{"derivation": [], "score": score}])
+
+        cell = ChartCell([scored("S", 0.5), scored("NP", 2.0), scored("N", 1.0)])
+        self.assertEqual(cell.prune(width=2), 1)
+        self.assertEqual([item.type.show() for item in cell], ["NP", "N"])
+
+        cell = ChartCell([scored("S", 0.5), scored("NP", 2.0), scored("N", 1.0)])
+        self.assertEqual(cell.prune(threshold=0.5), 1)
+        self.assertEqual([item.type.show() for item in cell], ["NP", "N"])
+
+    def test_chart_cell_raised(self):
+        verb = Judgement(CCGExprString("eats"), CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAtomic("NP")))
+        name = Judgement(CCGExprString("John"), CCGTypeAtomic("NP"))
+        cell = ChartCell([verb, name])
+        raised = cell.raised(TypeRaisingRight)
+        self.assertEqual(len(raised), 1)
+        self.assertIs(cell.raised(TypeRaisingRight), raised)
+        self.assertEqual(next(iter(raised)).derivation[0]["derivation"][2], [name])
+
+        cell.add(Judgement(CCGExprString("cat"), CCGTypeAtomic("N")))
+        self.assertEqual(len(cell.raised(TypeRaisingRight)), 2)
+        self.assertEqual(len(cell.raised(TypeRaisingLeft)), 2)
+
+    def test_raise_types(self):
+        ccg = CCGrammar(''':- S, NP, N
+                        John => NP
+                        cat => N
+                        eats => (S\\NP)/NP''')
+        raised = raise_types(TypeRaisingLeft, CCGTypeAtomic("NP"), ccg)
+        self.assertEqual([ccgtype.show() for ccgtype in raised], ["(S / (S \\ NP))"])
+        # S/NP is derived by composing the raised subject with the verb.
+        self.assertEqual([ccgtype.show() for ccgtype in raise_types(TypeRaisingRight, CCGTypeAtomic("NP"), ccg)],
+                         ["((S \\ NP) \\ ((S \\ NP) / NP))", "(S \\ (S / NP))"])
+        self.assertEqual(raise_types(TypeRaisingLeft, CCGTypeAtomic("N"), ccg), [])
+        self.assertEqual(len(raise_types(TypeRaisingLeft, CCGTypeAtomic("N"))), 1)
+        self.assertFalse(raise_types(TypeRaisingLeft, CCGTypeAtomic("N"))[0].ground)
+
+
 class TestInference(unittest.TestCase):
 
+    def test_pickle(self):
+        self.assertIs(pickle.loads(pickle.dumps(ApplicationRight)), ApplicationRight)
+        error = pickle.loads(pickle.dumps(TokenError("dog")))
+        self.assertEqual((error.token, error.message), ("dog", 'Token not found: "dog"'))
+        with self.assertRaises(pickle.PicklingError):
+            pickle.dumps(Inference("local", [], None))
+
+    def test_index_paths(self):
+        self.assertEqual(ApplicationRight.index_paths(), (((True, "right"),), ()))
+        self.assertEqual(CompositionLeft.index_paths(), (((False, "left"),), ((False, "right"),)))
+        self.assertIsNone(TypeRaisingLeft.index_paths())
+
+    def test_match_cache(self):
+        ccg = CCGrammar(":- S\nJohn => NP")
+        left = Judgement(CCGExprString("eats"), CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAtomic("NP")))
+        right = Judgement(CCGExprString("John"), CCGTypeAtomic("NP"))
+
+        first = ApplicationRight.match([left, right], ccg)
+        second = ApplicationRight.match([left, right], ccg)
+        self.assertIsNone(ApplicationLeft.match([left, right], ccg))
+        self.assertIsNone(ApplicationLeft.match([left, right], ccg))
+
+        self.assertEqual(second, first)
+        self.assertEqual(second.expr.show(), '"eats John"')
+        self.assertEqual(ccg.combination_cache.stats()["hits"], 2)
+        self.assertEqual(ccg.combination_cache.stats()["misses"], 2)
+
     def test_inference_init(self):
         hyp1 = CCGExprVar("X")
         hyp2 = CCGExprString("apple")
@@ -188,6 +291,429 @@ class TestCCGParser(unittest.TestCase):
         self.assertGreater(len(result), 1)  # Ensure that the input is ambiguous
 
 
+    def test_packed_derivations(self):
+        ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        sleeps => S\\NP''')
+        parses, weight = CCGCKYParser(ccg, "the big old cat sleeps")
+        # "the (big (old cat))", "the ((big old) cat)", "(the big) (old cat)"...
+        # composition makes the noun phrase ambiguous, each derivation is
+        # reconstructed exactly once.
+        shown = [parse.show() for parse in parses]
+        self.assertEqual(len(shown), len(set(shown)))
+        self.assertEqual(len(parses), 5)
+        self.assertEqual(weight, 1.0)
+
+    def test_type_raising_runs(self):
+        parses, _ = CCGCKYParser(self.ccg, "John eats apples", use_typer=True)
+        self.assertTrue(all(isinstance(derivation, CKYDerivation) for derivation in parses))
+        self.assertGreater(len(parses), 0)
+
+
+class TestParseForest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        sleeps => S\\NP
+                        Weight(">", N/N, N) = 2.0
+                        Weight("B>", NP/N, N/N) = 0.5''')
+
+    def test_forest_mode(self):
+        forest = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="forest")
+        self.assertIsInstance(forest, ParseForest)
+        self.assertTrue(forest)
+        self.assertEqual(forest.tokens, ["the", "big", "old", "cat", "sleeps"])
+
+    def test_kbest_order(self):
+        forest = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="forest")
+        weights = [derivation.weight for derivation in forest.kbest()]
+        parses, maxweight = CCGCKYParser(self.ccg, "the big old cat sleeps")
+
+        self.assertEqual(len(weights), len(parses))
+        self.assertEqual(weights, sorted(weights, reverse=True))
+        self.assertEqual(weights, sorted((parse.weight for parse in parses), reverse=True))
+        self.assertEqual(weights[0], maxweight)
+        self.assertEqual(weights[0], 4.0)
+
+    def test_kbest_limit(self):
+        forest = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="forest")
+        self.assertEqual(len(list(forest.kbest(2))), 2)
+        self.assertEqual(len(list(forest.kbest(100))), len(forest.reconstruct()[0]))
+
+    def test_empty_forest(self):
+        forest = CCGCKYParser(self.ccg, "sleeps the cat", mode="forest")
+        self.assertFalse(forest)
+        self.assertEqual(list(forest.kbest()), [])
+        self.assertEqual(forest.count(), 0)
+
+    def test_count(self):
+        for use_typer in (False, True):
+            forest = CCGCKYParser(self.ccg, "the big old cat sleeps", use_typer, mode="forest")
+            self.assertEqual(forest.count(), len(forest.reconstruct()[0]))
+        forest = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="forest")
+        counts = count_derivations(forest.chart)
+        self.assertEqual(counts[(0, 5)]["S"], forest.count())
+        self.assertEqual(counts[(1, 4)]["N"], 2)
+        self.assertEqual(counts[(0, 1)], {"(NP / N)": 1})
+
+        forest = CCGCKYParser(self.ccg, "the " + "big " * 25 + "cat sleeps", mode="forest")
+        self.assertGreater(forest.count(), 10 ** 12)
+
+    def test_stream_mode(self):
+        parses, _ = CCGCKYParser(self.ccg, "the big old cat sleeps", use_typer=True)
+        stream = CCGCKYParser(self.ccg, "the big old cat sleeps", use_typer=True, mode="stream")
+        self.assertNotIsInstance(stream, (list, tuple))
+        self.assertEqual([(d.to_dict(), d.weight) for d in stream],
+                         [(d.to_dict(), d.weight) for d in parses])
+        self.assertEqual(list(CCGCKYParser(self.ccg, "sleeps the cat", mode="stream")), [])
+        with self.assertRaises(TokenError):
+            CCGCKYParser(self.ccg, "the dog sleeps", mode="stream")
+
+    def test_iter_derivations(self):
+        forest = CCGCKYParser(self.ccg, "the " + "big " * 25 + "cat sleeps", mode="forest")
+        first = next(forest.iter_derivations())
+        self.assertEqual(first.current.type.show(), "S")
+        self.assertEqual(first.to_dict()["expr"], '"' + " ".join(forest.tokens) + '"')
+
+    def test_best_mode(self):
+        parses, maxweight = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="best")
+        self.assertEqual(len(parses), 1)
+        self.assertEqual(maxweight, 4.0)
+        self.assertEqual(parses[0].weight, 4.0)
+        self.assertEqual(parses[0].current.type.show(), "S")
+
+        self.assertEqual(CCGCKYParser(self.ccg, "sleeps the cat", mode="best"), ([], 1.0))
+
+    def test_beam(self):
+        ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        old => N
+                        cat => N
+                        sleeps => S\\NP
+                        Weight(">", N/N, N) = 2.0''')
+        stats = {}
+        parses, maxweight = CCGCKYParser(ccg, "the big old cat sleeps",
+                                         beam_width=1, stats=stats)
+        self.assertEqual(maxweight, 4.0)
+        self.assertEqual(stats["cells"], 15)
+        self.assertGreater(stats["pruned"], 0)
+        self.assertLess(len(parses), len(CCGCKYParser(ccg, "the big old cat sleeps")[0]))
+
+        forest = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="forest", beam_threshold=1.0)
+        self.assertIn("pruned", forest.stats)
+
+        with self.assertRaises(ValueError):
+            CCGCKYParser(self.ccg, "the cat sleeps", beam_width=0)
+        with self.assertRaises(ValueError):
+            CCGCKYParser(self.ccg, "the cat sleeps", beam_threshold=2)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            CCGCKYParser(self.ccg, "the cat sleeps", mode="unknown")
+
+
+class TestIncrementalParser(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        sleeps => S\\NP
+                        Weight(">", N/N, N) = 2.0
+                        Weight("B>", NP/N, N/N) = 0.5''')
+
+    def test_push(self):
+        parser = IncrementalParser(self.ccg)
+        self.assertEqual([parser.push(token) for token in "the big cat sleeps".split()],
+                         [False, False, False, True])
+        self.assertEqual(len(parser), 4)
+        self.assertEqual(set(parser.chart), {(start, end) for end in range(1, 5)
+                                             for start in range(end)})
+
+    def test_same_as_parser(self):
+        sentence = "the big old cat sleeps"
+        parser = IncrementalParser(self.ccg)
+        parser.extend(sentence.split())
+        forest = CCGCKYParser(self.ccg, sentence, mode="forest")
+        for span, cell in forest.chart.items():
+            self.assertEqual([item.type for item in parser.chart[span]],
+                             [item.type for item in cell])
+        parses, weight = parser.parses()
+        expected, expected_weight = CCGCKYParser(self.ccg, sentence)
+        self.assertEqual(len(parses), len(expected))
+        self.assertEqual(weight, expected_weight)
+        derivation, best_weight = parser.best()
+        self.assertEqual(best_weight, expected_weight)
+        self.assertEqual(next(parser.forest().kbest()).weight, expected_weight)
+
+    def test_beam(self):
+        sentence = "the big old cat sleeps"
+        parser = IncrementalParser(self.ccg, beam_width=1)
+        parser.extend(sentence.split())
+        stats = {}
+        forest = CCGCKYParser(self.ccg, sentence, mode="forest", beam_width=1, stats=stats)
+        self.assertEqual(parser.stats, stats)
+        self.assertEqual(len(parser.roots()), len(forest.roots))
+
+    def test_unknown_token(self):
+        parser = IncrementalParser(self.ccg)
+        parser.push("the")
+        with self.assertRaises(TokenError):
+            parser.push("dog")
+        self.assertEqual(parser.tokens, ["the"])
+        self.assertEqual(parser.best(), (None, 1.0))
+        self.assertTrue(parser.extend(["cat", "sleeps"]))
+
+    def test_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            IncrementalParser(self.ccg, mode="forest")
+
+
+class TestLexicalBeam(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        the => (2) N/N
+                        big => N/N
+                        big => N
+                        cat => N
+                        cat => (1) NP
+                        sleeps => S\\NP''')
+
+    def test_lexical_cell(self):
+        self.assertEqual(len(lexical_cell(self.ccg, "the")), 2)
+        self.assertEqual([item.type.show() for item in lexical_cell(self.ccg, "the", 1)],
+                         ["(N / N)"])
+        priors = {"the": {"(NP / N)": 5}}
+        self.assertEqual([item.type.show() for item in lexical_cell(self.ccg, "the", 1, priors)],
+                         ["(NP / N)"])
+
+    def test_retry(self):
+        stats = {}
+        parses, weight = CCGCKYParser(self.ccg, "the big cat sleeps", lexical_beam=1, stats=stats)
+        expected, expected_weight = CCGCKYParser(self.ccg, "the big cat sleeps")
+        self.assertEqual(len(parses), len(expected))
+        self.assertEqual(weight, expected_weight)
+        self.assertEqual(stats["lexical_retries"], 1)
+
+    def test_missed_readings(self):
+        ccg = CCGrammar(''':- S, NP
+                        John => (2) NP
+                        John => S/(S\\NP)
+                        sleeps => S\\NP
+                        Weight(">", S/(S\\NP), S\\NP) = 3.0''')
+        stats = {}
+        parses, weight = CCGCKYParser(ccg, "John sleeps", lexical_beam=1, stats=stats)
+        self.assertEqual(stats["lexical_retries"], 0)
+        self.assertEqual((len(parses), weight), (1, 1.0))
+        self.assertEqual(len(CCGCKYParser(ccg, "John sleeps")[0]), 2)
+        self.assertEqual(CCGCKYParser(ccg, "John sleeps", mode="best", lexical_beam=1)[1], 1.0)
+        self.assertEqual(CCGCKYParser(ccg, "John sleeps", mode="best")[1], 3.0)
+
+    def test_no_retry(self):
+        stats = {}
+        parses, _ = CCGCKYParser(self.ccg, "cat sleeps", lexical_beam=1, stats=stats)
+        self.assertEqual(len(parses), 1)
+        self.assertEqual(stats["lexical_retries"], 0)
+        self.assertEqual(stats["items"], 3)
+        self.assertEqual(CCGCKYParser(self.ccg, "sleeps cat", lexical_beam=1), ([], 1.0))
+
+    def test_priors(self):
+        parses, _ = CCGCKYParser(self.ccg, "the cat sleeps", mode="best")
+        priors = lexical_priors(parses)
+        self.assertEqual(priors["the"], {"(NP / N)": 1})
+        self.assertEqual(priors["cat"], {"N": 1})
+        stats = {}
+        parses, _ = CCGCKYParser(self.ccg, "the big cat sleeps", lexical_beam=1,
+                                 priors=priors, stats=stats)
+        self.assertTrue(parses)
+        self.assertEqual(stats["lexical_retries"], 0)
+
+    def test_invalid_beam(self):
+        with self.assertRaises(ValueError):
+            CCGCKYParser(self.ccg, "cat sleeps", lexical_beam=0)
+
+
+class TestSpanCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        sleeps => S\\NP
+                        Weight(">", N/N, N) = 2.0
+                        Weight("B>", NP/N, N/N) = 0.5''')
+
+    def test_splice(self):
+        cache = LRUCache()
+        stats = {}
+        CCGCKYParser(self.ccg, "the big old cat sleeps", span_cache=cache, stats=stats)
+        self.assertEqual(stats["span_hits"], 0)
+        self.assertEqual(stats["span_misses"], 10)
+
+        stats = {}
+        parses, weight = CCGCKYParser(self.ccg, "the big old cat", span_cache=cache, stats=stats)
+        expected, expected_weight = CCGCKYParser(self.ccg, "the big old cat")
+        self.assertEqual(stats["span_hits"], 6)
+        self.assertEqual(stats["span_misses"], 0)
+        self.assertEqual(len(parses), len(expected))
+        self.assertEqual(weight, expected_weight)
+        self.assertEqual(cache.stats()["hits"], 6)
+
+    def test_options(self):
+        cache = LRUCache()
+        CCGCKYParser(self.ccg, "the big cat sleeps", span_cache=cache)
+        stats = {}
+        CCGCKYParser(self.ccg, "the big cat sleeps", mode="best", span_cache=cache, stats=stats)
+        self.assertEqual(stats["span_hits"], 0)
+        other = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        cat => N
+                        sleeps => S\\NP''')
+        stats = {}
+        CCGCKYParser(other, "the big cat sleeps", span_cache=cache, stats=stats)
+        self.assertEqual(stats["span_hits"], 0)
+
+    def test_beam(self):
+        cache = LRUCache()
+        sentence = "the big old cat sleeps"
+        CCGCKYParser(self.ccg, sentence, beam_width=1, span_cache=cache)
+        parses, weight = CCGCKYParser(self.ccg, sentence, beam_width=1, span_cache=cache)
+        expected, expected_weight = CCGCKYParser(self.ccg, sentence, beam_width=1)
+        self.assertEqual(len(parses), len(expected))
+        self.assertEqual(weight, expected_weight)
+
+
+class TestSentenceCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        sleeps => S\\NP
+                        Weight(">", N/N, N) = 2.0
+                        Weight("B>", NP/N, N/N) = 0.5''')
+
+    def test_hit(self):
+        cache = LRUCache()
+        stats = {}
+        parses, weight = CCGCKYParser(self.ccg, "the big old cat sleeps",
+                                      sentence_cache=cache, stats=stats)
+        items = stats["items"]
+        again, again_weight = CCGCKYParser(self.ccg, " the  big old cat sleeps ",
+                                           sentence_cache=cache, stats=stats)
+        self.assertEqual(again, parses)
+        self.assertIsNot(again, parses)
+        self.assertEqual(again_weight, weight)
+        self.assertEqual(stats["items"], items)
+        self.assertEqual((stats["sentence_hits"], stats["sentence_misses"]), (1, 1))
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_key(self):
+        cache = LRUCache()
+        CCGCKYParser(self.ccg, "the big cat sleeps", sentence_cache=cache)
+        forest = CCGCKYParser(self.ccg, "the big cat sleeps", mode="forest", sentence_cache=cache)
+        self.assertIsInstance(forest, ParseForest)
+        self.assertIs(CCGCKYParser(self.ccg, "the big cat sleeps", mode="forest",
+                                   sentence_cache=cache).chart, forest.chart)
+        stats = {}
+        CCGCKYParser(self.ccg, "the big cat sleeps", use_typer=True, sentence_cache=cache,
+                     stats=stats)
+        self.assertEqual(stats["sentence_misses"], 1)
+        self.assertEqual(len(cache), 3)
+
+    def test_forest_stats(self):
+        cache = LRUCache()
+        first, second = {}, {}
+        forest = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="forest",
+                              sentence_cache=cache, stats=first)
+        again = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="forest",
+                             sentence_cache=cache, stats=second)
+        self.assertEqual(first["items"], forest.stats["items"])
+        self.assertEqual((second["items"], second["sentence_hits"]), (0, 1))
+        self.assertEqual(again.stats, forest.stats)
+        self.assertIsNot(again.stats, forest.stats)
+        self.assertNotIn("sentence_hits", again.stats)
+
+    def test_result_size(self):
+        cache = LRUCache(20, sizeof=result_size)
+        forest = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="forest", sentence_cache=cache)
+        self.assertEqual(result_size(forest), forest.stats["items"])
+        self.assertEqual(cache.size, forest.stats["items"])
+        CCGCKYParser(self.ccg, "the cat sleeps", sentence_cache=cache)
+        self.assertEqual(cache.size, forest.stats["items"] + 1)
+
+
+class TestNormalForm(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        John => NP
+                        that => (N\\N)/(S/NP)
+                        sees => (S\\NP)/NP
+                        sleeps => S\\NP''')
+
+    def test_normal_form_allows(self):
+        the, big, cat = (next(iter(lexical_cell(self.ccg, token))) for token in ("the", "big", "cat"))
+        the_big = CompositionRight.match([the, big])
+        self.assertEqual(composition_tag(the_big), "B>")
+        self.assertIsNone(composition_tag(the))
+        self.assertFalse(normal_form_allows(ApplicationRight, the_big, cat))
+        self.assertFalse(normal_form_allows(CompositionRight, the_big, big))
+        self.assertTrue(normal_form_allows(CompositionRight, the, the_big))
+        self.assertTrue(normal_form_allows(ApplicationLeft, the_big, cat))
+
+    def test_spurious_ambiguity(self):
+        parses, weight = CCGCKYParser(self.ccg, "the big old cat sleeps")
+        normal, normal_weight = CCGCKYParser(self.ccg, "the big old cat sleeps", normal_form=True)
+        self.assertGreater(len(parses), 1)
+        self.assertEqual(len(normal), 1)
+        self.assertEqual(normal_weight, weight)
+        forest = CCGCKYParser(self.ccg, "the big old cat sleeps", mode="forest", normal_form=True)
+        self.assertEqual(len(list(forest.kbest())), 1)
+
+    def test_composition_kept(self):
+        parses, _ = CCGCKYParser(self.ccg, "the cat that John sees sleeps", use_typer=True)
+        normal, _ = CCGCKYParser(self.ccg, "the cat that John sees sleeps", use_typer=True,
+                                 normal_form=True)
+        self.assertGreater(len(normal), 0)
+        self.assertLess(len(normal), len(parses))
+        self.assertEqual(CCGCKYParser(self.ccg, "the cat that John sees sleeps",
+                                      normal_form=True), ([], 1.0))
+
+    def test_incremental(self):
+        parser = IncrementalParser(self.ccg, normal_form=True)
+        parser.extend("the big old cat sleeps".split())
+        self.assertEqual(len(parser.parses()[0]), 1)
+
+
 class TestCKYDerivation(unittest.TestCase):
 
     @classmethod
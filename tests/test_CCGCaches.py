@@ -0,0 +1,53 @@
+import unittest
+from CCGCaches import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_get_put(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("b", 0), 0)
+        self.assertEqual(cache.stats(), {"size": 1, "maxsize": 2, "hits": 1, "misses": 2})
+
+    def test_eviction(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+
+    def test_disabled(self):
+        cache = LRUCache(maxsize=0)
+        cache.put("a", 1)
+        self.assertEqual(len(cache), 0)
+        with self.assertRaises(ValueError):
+            LRUCache(maxsize=-1)
+
+    def test_clear(self):
+        cache = LRUCache()
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+        self.assertEqual(cache.stats(), {"size": 0, "maxsize": 4096, "hits": 0, "misses": 0})
+
+    def test_sizeof(self):
+        cache = LRUCache(maxsize=5, sizeof=len)
+        cache.put("a", "xx")
+        cache.put("b", "yyy")
+        self.assertEqual(cache.size, 5)
+        cache.put("c", "z")
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.size, 4)
+        cache.put("b", "y")
+        self.assertEqual(cache.size, 2)
+        cache.put("d", "too long")
+        self.assertNotIn("d", cache)
+        self.assertEqual(cache.stats()["size"], 2)
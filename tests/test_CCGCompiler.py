@@ -0,0 +1,53 @@
+import unittest
+from CCGCompiler import compile_grammar
+from CCGCKYParser import CCGCKYParser, ApplicationRight, CompositionRight
+from CCGrammar import CCGrammar
+from CCGTypes import CCGTypeAtomic, CCGTypeComposite
+
+
+class TestCompileGrammar(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        sleeps => S\\NP
+                        Weight(">", N/N, N) = 2.0''')
+
+    def test_closure(self):
+        compiled = compile_grammar(self.ccg)
+        self.assertTrue(compiled.complete)
+        self.assertEqual(len(compiled), 6)
+        self.assertEqual(compiled.depths[compiled.category_id(CCGTypeAtomic("S"))], 2)
+
+    def test_table(self):
+        compiled = compile_grammar(self.ccg)
+        det = compiled.category_id(CCGTypeComposite(1, CCGTypeAtomic("NP"), CCGTypeAtomic("N")))
+        adj = compiled.category_id(CCGTypeComposite(1, CCGTypeAtomic("N"), CCGTypeAtomic("N")))
+        noun = compiled.category_id(CCGTypeAtomic("N"))
+        noun_phrase = compiled.category_id(CCGTypeAtomic("NP"))
+
+        self.assertEqual(compiled.combinations(det, noun), ((ApplicationRight, noun_phrase),))
+        self.assertEqual(compiled.combinations(det, adj), ((CompositionRight, det),))
+        self.assertEqual(compiled.combinations(noun, det), ())
+        self.assertIsNone(compiled.category_id(CCGTypeAtomic("PP")))
+
+    def test_caps(self):
+        compiled = compile_grammar(self.ccg, max_depth=1)
+        self.assertFalse(compiled.complete)
+        self.assertIsNone(compiled.category_id(CCGTypeAtomic("S")))
+        compiled = compile_grammar(self.ccg, max_categories=5)
+        self.assertFalse(compiled.complete)
+        self.assertEqual(len(compiled), 5)
+
+    def test_parse_with_table(self):
+        sentence = "the big old cat sleeps"
+        parses, maxweight = CCGCKYParser(self.ccg, sentence)
+        for compiled in (compile_grammar(self.ccg), compile_grammar(self.ccg, max_depth=1)):
+            table_parses, table_maxweight = CCGCKYParser(self.ccg, sentence, compiled=compiled)
+            self.assertEqual(table_maxweight, maxweight)
+            self.assertEqual(sorted(parse.weight for parse in table_parses),
+                             sorted(parse.weight for parse in parses))
@@ -103,3 +103,12 @@ class TestCCGExpressions(unittest.TestCase):
         result = var_expr.match(data_expr, sigma)
         self.assertFalse(result)
         self.assertEqual({k: v.show() for k, v in sigma.items()}, {"X": CCGExprString("banana").show()})
+
+    def test_ccg_expr_equality(self):
+        concat1 = CCGExprConcat(CCGExprString("Hello"), CCGExprString("World"))
+        concat2 = CCGExprConcat(CCGExprString("Hello"), CCGExprString("World"))
+
+        self.assertEqual(concat1, concat2)
+        self.assertEqual(hash(concat1), hash(concat2))
+        self.assertNotEqual(concat1, CCGExprString("Hello World"))
+        self.assertNotEqual(CCGExprVar("X"), CCGExprString("X"))
@@ -0,0 +1,110 @@
+import unittest
+from itertools import product
+from CCGCKYParser import CCGCKYParser, TokenError, ChartCell, compute_chart, lexical_item, BINARY_COMBINATORS
+from CCGParallel import parser_pool, fill_diagonal, diagonal_pairs, parse_batch, SharedChart
+from CCGrammar import CCGrammar
+
+
+class TestParallel(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        big => N
+                        old => N/N
+                        cat => N
+                        sleeps => S\\NP
+                        Weight(">", N/N, N) = 2.0''')
+        cls.pool = parser_pool(cls.ccg, 2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+
+    def chart(self, sentence):
+        tokens = sentence.split()
+        return {(i, i + 1): ChartCell(lexical_item(token, [entry])
+                                      for entry in self.ccg.rules[token])
+                for i, token in enumerate(tokens)}
+
+    def test_fill_diagonal(self):
+        sentence = "the big old big cat sleeps"
+        serial, parallel = self.chart(sentence), self.chart(sentence)
+        for span in range(2, 7):
+            cells = fill_diagonal(self.pool, parallel, span, 6, self.ccg)
+            for start, cell in enumerate(cells):
+                expected = compute_chart(BINARY_COMBINATORS, serial, span, start, self.ccg)
+                serial[(start, start + span)] = expected
+                parallel[(start, start + span)] = cell
+                self.assertEqual([item.type for item in cell], [item.type for item in expected])
+                self.assertEqual([len(item.derivation) for item in cell],
+                                 [len(item.derivation) for item in expected])
+
+    def test_fill_diagonal_modes(self):
+        sentence = "the big old big cat sleeps"
+
+        def backpointers(item):
+            return [(d["derivation"][0].name, [p.type.show() for p in d["derivation"][2]])
+                    for d in item.derivation]
+
+        for use_typer, best, normal_form in product((False, True), repeat=3):
+            serial, parallel = self.chart(sentence), self.chart(sentence)
+            shared = SharedChart()
+            try:
+                for span in range(2, 7):
+                    cells = fill_diagonal(self.pool, parallel, span, 6, self.ccg, best=best,
+                                          use_typer=use_typer, normal_form=normal_form,
+                                          shared=shared)
+                    self.assertEqual(len(shared.segments), span - 1)
+                    for start, cell in enumerate(cells):
+                        expected = compute_chart(BINARY_COMBINATORS, serial, span, start, self.ccg,
+                                                 use_typer, best=best, normal_form=normal_form)
+                        serial[(start, start + span)] = expected
+                        parallel[(start, start + span)] = cell
+                        self.assertEqual([item.type for item in cell],
+                                         [item.type for item in expected])
+                        self.assertEqual([backpointers(item) for item in cell],
+                                         [backpointers(item) for item in expected])
+            finally:
+                shared.close()
+            self.assertEqual(shared.segments, [])
+
+    def test_diagonal_pairs(self):
+        chart = self.chart("the big cat")
+        self.assertEqual(diagonal_pairs(chart, 2, 3), 4)
+
+    def test_parse(self):
+        sentence = "the big old big cat sleeps"
+        parses, weight = CCGCKYParser(self.ccg, sentence, workers=self.pool)
+        expected, expected_weight = CCGCKYParser(self.ccg, sentence)
+        self.assertEqual(len(parses), len(expected))
+        self.assertEqual(weight, expected_weight)
+        best, _ = CCGCKYParser(self.ccg, sentence, mode="best", workers=1)
+        self.assertEqual(best[0].weight, expected_weight)
+
+    def test_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            CCGCKYParser(self.ccg, "the cat sleeps", workers=0)
+
+    def test_parse_batch(self):
+        sentences = ["the big cat sleeps", "the dog sleeps", "big cat", "the old cat sleeps"]
+        results = list(parse_batch(self.ccg, iter(sentences), chunksize=1, pool=self.pool))
+        self.assertEqual([index for index, _ in results], [0, 1, 2, 3])
+        self.assertIsInstance(results[1][1], TokenError)
+        self.assertEqual(results[2][1], ([], 1.0))
+        parses, weight = results[0][1]
+        expected, expected_weight = CCGCKYParser(self.ccg, sentences[0])
+        self.assertEqual(sorted(d.show() for d in parses), sorted(d.show() for d in expected))
+        self.assertEqual(weight, expected_weight)
+
+        unordered = dict(parse_batch(self.ccg, sentences, chunksize=3, ordered=False,
+                                     pool=self.pool, mode="best"))
+        self.assertEqual(sorted(unordered), [0, 1, 2, 3])
+        self.assertEqual(unordered[3][1], 2.0)
+
+    def test_parse_batch_options(self):
+        for options in ({"mode": "forest"}, {"mode": "stream"}, {"chunksize": 0}, {"stats": {}}):
+            with self.assertRaises(ValueError):
+                next(parse_batch(self.ccg, ["the cat sleeps"], pool=self.pool, **options))
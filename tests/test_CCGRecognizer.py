@@ -0,0 +1,61 @@
+import unittest
+from CCGCKYParser import CCGCKYParser, TokenError, ApplicationRight
+from CCGCompiler import compile_grammar
+from CCGRecognizer import CCGRecognizer, CategorySet
+from CCGrammar import CCGrammar
+from CCGTypes import CCGTypeAtomic, CCGTypeComposite
+
+
+class TestCCGRecognizer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.ccg = CCGrammar(''':- S, NP, N
+                        the => NP/N
+                        big => N/N
+                        old => N/N
+                        cat => N
+                        John => NP
+                        sleeps => S\\NP
+                        sees => (S\\NP)/NP''')
+
+    def test_recognized(self):
+        self.assertTrue(CCGRecognizer(self.ccg, "the big old cat sleeps"))
+        self.assertTrue(CCGRecognizer(self.ccg, "John sees the cat"))
+
+    def test_not_recognized(self):
+        self.assertFalse(CCGRecognizer(self.ccg, "the cat"))
+        self.assertFalse(CCGRecognizer(self.ccg, "sleeps the cat"))
+
+    def test_agrees_with_parser(self):
+        compiled = compile_grammar(self.ccg)
+        for sentence in ["John sleeps", "the cat sees John", "John sees big",
+                         "big old cat", "John sees the old cat", "cat the sleeps"]:
+            for use_typer in (False, True):
+                parses, _ = CCGCKYParser(self.ccg, sentence, use_typer)
+                self.assertEqual(CCGRecognizer(self.ccg, sentence, use_typer), bool(parses))
+                self.assertEqual(CCGRecognizer(self.ccg, sentence, use_typer, compiled=compiled),
+                                 bool(parses))
+
+    def test_invalid_input(self):
+        with self.assertRaises(TokenError):
+            CCGRecognizer(self.ccg, "the dog sleeps")
+        with self.assertRaises(SyntaxError):
+            CCGRecognizer(self.ccg, "  ")
+
+
+class TestCategorySet(unittest.TestCase):
+
+    def test_add(self):
+        cell = CategorySet([CCGTypeAtomic("NP")])
+        self.assertFalse(cell.add(CCGTypeAtomic("NP")))
+        self.assertTrue(cell.add(CCGTypeAtomic("N")))
+        self.assertEqual(len(cell), 2)
+        self.assertIn(CCGTypeAtomic("N"), cell)
+
+    def test_index(self):
+        functor = CCGTypeComposite(1, CCGTypeAtomic("NP"), CCGTypeAtomic("N"))
+        cell = CategorySet([functor, CCGTypeAtomic("N")])
+        self.assertEqual(cell.index(ApplicationRight, 0), {CCGTypeAtomic("N"): [functor]})
+        cell.add(CCGTypeComposite(1, CCGTypeAtomic("N"), CCGTypeAtomic("N")))
+        self.assertEqual(len(cell.index(ApplicationRight, 0)[CCGTypeAtomic("N")]), 2)
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from CCGServer import CCGServer
+
+GRAMMAR = ''':- S, NP, N
+            the => NP/N
+            big => N/N
+            big => N
+            cat => N
+            sleeps => S\\NP
+            Weight(">", N/N, N) = 2.0'''
+
+
+class TestCCGServer(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = CCGServer({"en": GRAMMAR}, workers=1, timeout=30.0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    async def test_handle(self):
+        response = await self.server.handle({"grammar": "en", "sentence": "the big cat sleeps",
+                                             "id": 7})
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["id"], 7)
+        self.assertEqual(len(response["parses"]), 2)
+        self.assertEqual(response["weight"], 2.0)
+        parse = response["parses"][0]
+        self.assertEqual((parse["type"], parse["rule"]), ("S", "<"))
+        self.assertEqual(parse["children"][1]["children"], [])
+
+    async def test_kbest(self):
+        response = await self.server.handle({"grammar": "en", "sentence": "the big big cat sleeps",
+                                             "k": 1})
+        self.assertTrue(response["ok"])
+        self.assertEqual(len(response["parses"]), 1)
+        self.assertEqual(response["weight"], 4.0)
+
+    async def test_errors(self):
+        for request in ({"grammar": "fr", "sentence": "the cat"},
+                        {"grammar": "en"},
+                        {"grammar": "en", "sentence": "the dog sleeps"},
+                        {"grammar": "en", "sentence": "the cat", "mode": "forest"},
+                        {"grammar": "en", "sentence": "the cat", "k": 0},
+                        {"grammar": "en", "sentence": "the cat", "timeout": 0},
+                        {"grammar": "en", "sentence": "the cat", "timeout": -1.0},
+                        {"grammar": "en", "sentence": "the cat", "timeout": "soon"},
+                        ["the cat"]):
+            response = await self.server.handle(request)
+            self.assertFalse(response["ok"])
+            self.assertIn("error", response)
+
+    async def test_timeout(self):
+        busy = self.server.pool.submit(time.sleep, 0.5)
+        response = await self.server.handle({"grammar": "en", "sentence": "the cat sleeps",
+                                             "timeout": 0.1})
+        busy.result()
+        self.assertFalse(response["ok"])
+        self.assertIn("Timeout", response["error"])
+
+    async def test_worker_crash(self):
+        server = CCGServer({"en": GRAMMAR}, workers=1)
+        try:
+            crash = server.pool.submit(os._exit, 1)
+            with self.assertRaises(Exception):
+                crash.result()
+            response = await server.handle({"grammar": "en", "sentence": "the cat sleeps"})
+            self.assertFalse(response["ok"])
+            self.assertIn("BrokenProcessPool", response["error"])
+        finally:
+            server.close()
+
+    async def test_socket(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "ccg.sock")
+            listener = await self.server.serve(path=path)
+            async with listener:
+                reader, writer = await asyncio.open_unix_connection(path)
+                writer.write(b'{"grammar": "en", "sentence": "the cat sleeps"}\nnot json\n')
+                await writer.drain()
+                first = json.loads(await reader.readline())
+                second = json.loads(await reader.readline())
+                writer.close()
+                await writer.wait_closed()
+        self.assertTrue(first["ok"])
+        self.assertFalse(second["ok"])
@@ -1,5 +1,6 @@
+import pickle
 import unittest
-from CCGTypes import CCGType, CCGTypeVar, CCGTypeAtomicVar, CCGTypeAtomic, CCGTypeComposite, CCGTypeAnnotation
+from CCGTypes import CCGType, CCGTypeVar, CCGTypeAtomicVar, CCGTypeAtomic, CCGTypeComposite, CCGTypeAnnotation, CCGUnifier
 
 class TestCCGTypes(unittest.TestCase):
     def test_ccg_type_var(self):
@@ -67,3 +68,79 @@ class TestCCGTypes(unittest.TestCase):
         CCGType.reset()
         t2 = CCGType.fresh("X")
         self.assertEqual(t1, t2)
+
+    def test_ccg_type_equality(self):
+        t1 = CCGTypeComposite(True, CCGTypeAnnotation(CCGTypeAtomic("GrNom"), "Masc"), CCGTypeAtomic("Nom"))
+        t2 = CCGTypeComposite(1, CCGTypeAnnotation(CCGTypeAtomic("GrNom"), "Masc"), CCGTypeAtomic("Nom"))
+        t3 = CCGTypeComposite(False, CCGTypeAnnotation(CCGTypeAtomic("GrNom"), "Masc"), CCGTypeAtomic("Nom"))
+
+        self.assertEqual(t1, t2)
+        self.assertEqual(hash(t1), hash(t2))
+        self.assertNotEqual(t1, t3)
+        self.assertNotEqual(CCGTypeVar("X"), CCGTypeAtomicVar("X"))
+        self.assertEqual(len({t1, t2, t3}), 2)
+
+    def test_ccg_type_canonical(self):
+        t1 = CCGTypeComposite(True, CCGTypeVar("T_1"), CCGTypeComposite(False, CCGTypeVar("T_1"), CCGTypeAtomic("NP")))
+        t2 = CCGTypeComposite(True, CCGTypeVar("T_8"), CCGTypeComposite(False, CCGTypeVar("T_8"), CCGTypeAtomic("NP")))
+        t3 = CCGTypeComposite(True, CCGTypeVar("T_8"), CCGTypeComposite(False, CCGTypeVar("T_9"), CCGTypeAtomic("NP")))
+        ground = CCGTypeComposite(True, CCGTypeAtomic("S"), CCGTypeAtomic("NP"))
+
+        self.assertNotEqual(t1, t2)
+        self.assertEqual(t1.canonical(), t2.canonical())
+        self.assertNotEqual(t1.canonical(), t3.canonical())
+        self.assertIs(ground.canonical(), ground)
+
+    def test_ccg_type_interning(self):
+        t1 = CCGTypeComposite(True, CCGTypeAnnotation(CCGTypeAtomic("GrNom"), "Masc"), CCGTypeAtomic("Nom"))
+        t2 = CCGTypeComposite(1, CCGTypeAnnotation(CCGTypeAtomic("GrNom"), "Masc"), CCGTypeAtomic("Nom"))
+        t3 = CCGTypeComposite(False, CCGTypeAnnotation(CCGTypeAtomic("GrNom"), "Masc"), CCGTypeAtomic("Nom"))
+
+        self.assertIs(t1, t2)
+        self.assertEqual(t1.uid, t2.uid)
+        self.assertNotEqual(t1.uid, t3.uid)
+        self.assertIs(t1.show(), t2.show())
+        self.assertIs(pickle.loads(pickle.dumps(t1)), t1)
+
+    def test_ccg_type_ground(self):
+        self.assertTrue(CCGTypeComposite(True, CCGTypeAtomic("S"), CCGTypeAtomic("NP")).ground)
+        self.assertFalse(CCGTypeComposite(True, CCGTypeAtomic("S"), CCGTypeVar("X")).ground)
+        self.assertFalse(CCGTypeAnnotation(CCGTypeAtomicVar("X"), "Masc").ground)
+
+
+class TestCCGUnifier(unittest.TestCase):
+
+    def test_unify_resolve(self):
+        unifier = CCGUnifier()
+        pattern = CCGTypeComposite(1, CCGTypeVar("X"), CCGTypeVar("Y"))
+        data = CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAnnotation(CCGTypeAtomic("NP"), "Masc"))
+
+        self.assertTrue(unifier.unify(pattern, data))
+        self.assertTrue(unifier.unify(CCGTypeVar("Y"), CCGTypeAtomic("NP")))
+        self.assertIs(unifier.resolve(CCGTypeComposite(0, CCGTypeVar("X"), CCGTypeVar("Y"))),
+                      CCGTypeComposite(0, CCGTypeAtomic("S"), CCGTypeAnnotation(CCGTypeAtomic("NP"), "Masc")))
+
+    def test_failure_undoes_bindings(self):
+        unifier = CCGUnifier()
+        pattern = CCGTypeComposite(1, CCGTypeVar("X"), CCGTypeVar("X"))
+        data = CCGTypeComposite(1, CCGTypeAtomic("S"), CCGTypeAtomic("NP"))
+
+        self.assertFalse(unifier.unify(pattern, data))
+        self.assertEqual(unifier.bindings, {})
+        self.assertFalse(unifier.unify(CCGTypeComposite(0, CCGTypeAtomic("S"), CCGTypeAtomic("NP")), data))
+
+    def test_mark_undo(self):
+        unifier = CCGUnifier()
+        self.assertTrue(unifier.unify(CCGTypeVar("X"), CCGTypeVar("Y")))
+        mark = unifier.mark()
+        self.assertTrue(unifier.unify(CCGTypeVar("Y"), CCGTypeAtomic("NP")))
+        self.assertIs(unifier.resolve(CCGTypeVar("X")), CCGTypeAtomic("NP"))
+        unifier.undo(mark)
+        self.assertIs(unifier.resolve(CCGTypeVar("X")), CCGTypeVar("Y"))
+
+    def test_atomic_variables_and_occurs_check(self):
+        unifier = CCGUnifier()
+        self.assertTrue(unifier.unify(CCGTypeAtomicVar("A"), CCGTypeAtomic("N")))
+        self.assertFalse(unifier.unify(CCGTypeAtomicVar("B"), CCGTypeComposite(1, CCGTypeAtomic("N"), CCGTypeAtomic("N"))))
+        self.assertFalse(unifier.unify(CCGTypeVar("X"), CCGTypeComposite(1, CCGTypeVar("X"), CCGTypeAtomic("N"))))
+        self.assertTrue(unifier.unify(CCGTypeVar("X"), CCGTypeVar("X")))
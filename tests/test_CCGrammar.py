@@ -1,6 +1,6 @@
 import unittest
-from CCGrammar import CCGrammar, Alias, Judgement, Weight, CCGExprString, CCGTypeParser, ParseError
-from CCGTypes import CCGTypeVar
+from CCGrammar import CCGrammar, Alias, Judgement, Weight, CCGExprString, CCGTypeParser, ParseError, SemanticThunk
+from CCGTypes import CCGTypeVar, CCGTypeAtomic
 
 class TestCCGrammar(unittest.TestCase):
 
@@ -33,6 +33,11 @@ class TestCCGrammar(unittest.TestCase):
         self.assertEqual({}, grammar.aliases)
         self.assertEqual({}, grammar.rules)
 
+    def test_fingerprint(self):
+        grammar = CCGrammar(":- S\ncat => S")
+        self.assertEqual(grammar.fingerprint, CCGrammar(":- S\ncat => S").fingerprint)
+        self.assertNotEqual(grammar.fingerprint, CCGrammar(":- S\ndog => S").fingerprint)
+
     def test_init(self):
         grammar_str = ":- S, N, NP" + "\n" + "Adv :: S/NP" + "\n" + 'cat => N'
         grammar = CCGrammar(grammar_str)
@@ -116,3 +121,43 @@ class TestCCGrammar(unittest.TestCase):
         expr = Judgement(CCGExprString("expression"), "type")
         expr2 = Judgement(CCGExprString("expression_bis"), "type")
         self.assertIsNone(expr.match(expr2, {}))
+
+    def test_judgement_equality(self):
+        expr1 = Judgement(CCGExprString("cat"), CCGTypeVar("N"), sem="a")
+        expr2 = Judgement(CCGExprString("cat"), CCGTypeVar("N"), sem="b")
+        expr3 = Judgement(CCGExprString("cat"), CCGTypeVar("NP"))
+
+        self.assertEqual(expr1, expr2)
+        self.assertEqual(len({expr1, expr2, expr3}), 2)
+
+    def test_lazy_semantics(self):
+        calls = []
+
+        def semantics(data):
+            calls.append(data)
+            return data[0].sem + data[1].sem
+
+        left = Judgement(CCGExprString("big"), CCGTypeVar("N"), sem="big ")
+        right = Judgement(CCGExprString("cat"), CCGTypeVar("N"), sem="cat")
+        judgement = Judgement(CCGExprString("big cat"), CCGTypeVar("N"),
+                              sem=SemanticThunk(semantics, [left, right]))
+        copy = Judgement(CCGExprString("cat"), CCGTypeVar("N")).adopt(judgement)
+        self.assertEqual(calls, [])
+        self.assertEqual(judgement.sem, "big cat")
+        self.assertEqual(judgement.sem, "big cat")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(copy.sem, "big cat")
+        self.assertEqual(len(calls), 1)
+
+    def test_raising_targets(self):
+        grammar = CCGrammar(''':- S, NP, N
+                           John => NP
+                           cat => N
+                           sleeps => S\\NP
+                           sees => (S\\NP)/NP''')
+        self.assertIn((0, CCGTypeAtomic("S"), CCGTypeAtomic("NP")), grammar.functors())
+        self.assertEqual([t.show() for t in grammar.raising_targets("T>", CCGTypeAtomic("NP"))], ["S"])
+        self.assertEqual(grammar.raising_targets("T>", CCGTypeAtomic("N")), [])
+        open_grammar = CCGrammar(":- S, NP\nJohn => NP\nand => ($X\\$X)/$X")
+        self.assertIsNone(open_grammar.functors())
+        self.assertIsNone(open_grammar.raising_targets("T<", CCGTypeAtomic("NP")))